@@ -3,11 +3,24 @@
 clean_8051_ida.py  –  Strip & translate an IDA-style C51 listing
 into something ASEM-51/Proteus 8 Pro will actually assemble.
 
+Lines are streamed through a generator pipeline, so memory stays flat
+no matter how long the listing is.
+
 Usage:
     python clean_8051_ida.py raw_ida.asm cleaned.asm
+    python clean_8051_ida.py --batch listings/ cleaned/ [-j 4] [--glob '*.asm']
+    python clean_8051_ida.py --dialect a51 raw_ida.asm cleaned_a51.asm
+    python clean_8051_ida.py --bench firmware_backup.bin.asm firmware_backup_raw.bin.asm
+    python clean_8051_ida.py --incremental firmware_backup.bin.asm firmware_clean.asm
 """
+import argparse
+import hashlib
+import os
+import pickle
 import re
 import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 # ────────────────────────────────────────────────────────── helpers
@@ -16,17 +29,15 @@ def kill_header(lines):
     Throw away the banner & meta block IDA adds on top
     (everything until the first blank line).
     """
-    out, skipping = [], True
+    lines = iter(lines)
     for ln in lines:
-        if skipping and ln.strip() == '':
-            skipping = False
-            continue
-        if not skipping:
-            out.append(ln)
-    return out
+        if ln.strip() == '':
+            break
+    yield from lines
 
 def rewrite_directives(ln: str) -> str:
     """
+    Reference (pre-single-pass) ASEM-51 rewrite, kept for --bench:
     • .segment code  →   CSEG
     • .segment RAM   →   DSEG   (Proteus just ignores unknown segs)
     • .segment FSR   →   ; (commented – SFR list can live in header)
@@ -57,26 +68,313 @@ JUNK = re.compile(
 def is_garbage(ln: str) -> bool:
     return bool(JUNK.match(ln))
 
-# ────────────────────────────────────────────────────────── main
-def clean(src: Path, dst: Path):
-    with src.open(encoding='utf-8', errors='ignore') as f:
-        lines = f.readlines()
+# ────────────────────────────────────────────────────────── dialects
+# Output rule tables. 'segments' maps IDA's "; segment <kind>" comment lines,
+# 'directives' maps the dotted IDA directives (name without the dot),
+# 'hex_h' rewrites 0x1F → 01FH for assemblers that don't take C-style hex.
+# 'equ_form' turns IDA's ".equ NAME,VALUE" into the assembler's own order;
+# None keeps the plain token swap of the reference rewrite (ASEM-51 output
+# must stay identical to it for --bench).
+DIALECTS = {
+    'asem51': {                          # ASEM-51 / Proteus 8 Pro
+        'segments':   {'code': 'CSEG', 'rom': 'CSEG', 'ram': 'DSEG', 'fsr': '; FSR list follows'},
+        'directives': {'segment': 'CSEG', 'byte': 'DB', 'equ': 'EQU'},
+        'hex_h':      False,
+        'equ_form':   None,
+    },
+    'as8051': {                          # SDCC asxxxx
+        'segments':   {'code': '.area CSEG (CODE)', 'rom': '.area CSEG (CODE)',
+                       'ram': '.area DSEG (DATA)', 'fsr': '; FSR list follows'},
+        'directives': {'segment': '.area CSEG (CODE)', 'byte': '.db', 'equ': '='},
+        'hex_h':      False,
+        'equ_form':   '{} = {}',
+    },
+    'a51': {                             # Keil A51
+        'segments':   {'code': 'CSEG', 'rom': 'CSEG', 'ram': 'DSEG', 'fsr': '; FSR list follows'},
+        'directives': {'segment': 'CSEG', 'byte': 'DB', 'equ': 'EQU'},
+        'hex_h':      True,
+        'equ_form':   '{} EQU {}',
+    },
+}
 
-    lines = kill_header(lines)
+SEG_COMMENT = re.compile(r'^\s*;\s*segment\s+(code|rom|ram|fsr)', re.I)
+INLINE      = re.compile(r'\.(segment)\s+\w+|\.(byte|equ)\b', re.I)
+C_HEX       = re.compile(r'\b0x([0-9A-Fa-f]+)\b')
 
-    cleaned = []
-    for ln in lines:
+def make_translator(dialect: str = 'asem51'):
+    """
+    Build a one-pass line translator for `dialect`. Returns f(line) → cleaned
+    line, or None if the line is junk. Dispatch is on the first character /
+    token; plain instruction lines never touch a regex unless they contain a dot.
+    """
+    d = DIALECTS[dialect]
+    segs, dirs, equ_form = d['segments'], d['directives'], d['equ_form']
+    inline = lambda m: dirs[(m.group(1) or m.group(2)).lower()]
+    hexfix = (lambda ln: C_HEX.sub(lambda m: f"0{m.group(1)}H", ln) if '0x' in ln else ln) \
+        if d['hex_h'] else (lambda ln: ln)
+    junk = JUNK.match
+    seg = SEG_COMMENT.match
+    sub = INLINE.sub
+
+    def comment(ln, s):
+        if junk(ln):
+            return None
+        m = seg(ln)
+        if m:
+            return segs[m.group(1).lower()] + '\n'
+        return (sub(inline, ln) if '.' in s else ln).rstrip() + '\n'
+
+    def directive(ln, s):
+        tok = s.split(None, 1)[0]
+        rep = dirs.get(tok[1:].lower()) if tok[1:].lower() != 'segment' else None
+        if rep is not None:
+            i = len(ln) - len(s)
+            rest = ln[i + len(tok):]
+            if equ_form and tok[1:].lower() == 'equ':
+                code, sc, cmt = rest.partition(';')
+                name, comma, value = code.partition(',')
+                if comma:                        # .equ NAME,VALUE  →  NAME = VALUE / NAME EQU VALUE
+                    out = equ_form.format(name.strip(), value.strip())
+                    return hexfix(ln[:i] + out + (' ' + sc + cmt if sc else '')).rstrip() + '\n'
+            if '.' in rest:
+                rest = sub(inline, rest)
+            return hexfix(ln[:i] + rep + rest).rstrip() + '\n'
+        return hexfix(sub(inline, ln)).rstrip() + '\n'
+
+    def other(ln, s):
+        if '.' in s:
+            ln = sub(inline, ln)
+        return hexfix(ln).rstrip() + '\n'
+
+    dispatch = {';': comment, '.': directive}
+
+    def translate(ln):
+        s = ln.lstrip()
+        if not s:
+            return '\n'
+        return dispatch.get(s[0], other)(ln, s)
+    return translate
+
+def clean_lines(lines, dialect: str = 'asem51'):
+    """Generator: raw listing lines in, cleaned lines (with '\\n') out."""
+    translate = make_translator(dialect)
+    for ln in kill_header(lines):
+        out = translate(ln)
+        if out is not None:
+            yield out
+
+def legacy_clean_lines(lines):
+    """The original seven-regex path; --bench measures against it."""
+    for ln in kill_header(lines):
         if is_garbage(ln):
             continue
-        ln = rewrite_directives(ln)
-        cleaned.append(ln.rstrip() + '\n')
+        yield rewrite_directives(ln).rstrip() + '\n'
+
+# ────────────────────────────────────────────────────────── incremental
+# Function blocks are delimited by the IDA S U B R O U T I N E banner and the
+# "; End of function" trailer. Translation is line-local, so a block's cleaned
+# text depends only on its raw text and the dialect → cache by content hash.
+FUNC_START = re.compile(r'^\s*;\s*=+\s*S\s*U\s*B\s*R\s*O\s*U\s*T\s*I\s*N\s*E', re.I)
+FUNC_END   = re.compile(r'^\s*;\s*End\s+of\s+function\b', re.I)
+CACHE_VERSION = 2                        # bump whenever translation output changes
+
+def split_functions(lines):
+    """Generator: group listing lines into function blocks (and the data between them)."""
+    block = []
+    for ln in lines:
+        if block and FUNC_START.match(ln):
+            yield block
+            block = []
+        block.append(ln)
+        if FUNC_END.match(ln):
+            yield block
+            block = []
+    if block:
+        yield block
+
+def load_cache(path: Path) -> dict:
+    try:
+        with path.open('rb') as f:
+            ver, blocks = pickle.load(f)
+        return blocks if ver == CACHE_VERSION else {}
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return {}
+
+def save_cache(path: Path, blocks: dict):
+    tmp = path.with_name(path.name + '.tmp')
+    with tmp.open('wb') as f:
+        pickle.dump((CACHE_VERSION, blocks), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def clean_incremental(src: Path, dst: Path, cache_path: Path = None, dialect: str = 'asem51',
+                      quiet: bool = False) -> dict:
+    """
+    Like clean(), but reuses cleaned function blocks from `cache_path`
+    (default: DST.cache) and only translates blocks whose text changed.
+    The cache is rewritten with just the blocks seen in this run.
+    """
+    cache_path = cache_path or dst.with_name(dst.name + '.cache')
+    t0 = time.perf_counter()
+    old = load_cache(cache_path)
+    new = {}
+    translate = make_translator(dialect)
+    n_in = n_out = hits = misses = 0
+
+    def counted(f):                          # header lines count too, as in clean()
+        nonlocal n_in
+        for n_in, ln in enumerate(f, 1):
+            yield ln
+
+    with src.open(encoding='utf-8', errors='ignore') as f, replacing(dst) as out:
+        for block in split_functions(kill_header(counted(f))):
+            raw = ''.join(block)
+            key = hashlib.blake2b(f"{dialect}\0{raw}".encode(), digest_size=16).digest()
+            if key in new:                   # '' is a valid cleaned block, so test membership
+                text = new[key]; hits += 1
+            elif key in old:
+                text = old[key]; hits += 1
+            else:
+                text = ''.join(o for o in map(translate, block) if o is not None)
+                misses += 1
+            new[key] = text
+            n_out += text.count('\n')
+            out.write(text)
+    save_cache(cache_path, new)
+
+    dt = time.perf_counter() - t0
+    stats = {'src': str(src), 'dst': str(dst), 'lines_in': n_in, 'lines_out': n_out, 'blocks_reused': hits,
+             'blocks_cleaned': misses, 'seconds': dt, 'lines_per_s': n_in / dt if dt else 0.0,
+             'peak_rss_kb': peak_rss_kb()}
+    if not quiet:
+        print(f"[+] Wrote cleaned file → {dst}  ({hits} blocks reused, {misses} re-cleaned)")
+    return stats
+
+def peak_rss_kb():
+    """High-water RSS of this process in KiB (None where the OS won't tell us)."""
+    try:
+        import resource
+    except ImportError:                      # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+@contextmanager
+def replacing(dst: Path):
+    """
+    Text file handle on DST.tmp that is os.replace()d over DST once the block
+    exits cleanly, so SRC == DST (or --batch d d) cleans in place instead of
+    truncating the input before it is read.
+    """
+    tmp = dst.with_name(dst.name + '.tmp')
+    try:
+        with tmp.open('w', encoding='utf-8') as out:
+            yield out
+        os.replace(tmp, dst)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+# ────────────────────────────────────────────────────────── main
+def clean(src: Path, dst: Path, quiet: bool = False, dialect: str = 'asem51') -> dict:
+    t0 = time.perf_counter()
+    n_in = n_out = 0
+
+    def counted(f):
+        nonlocal n_in
+        for n_in, ln in enumerate(f, 1):
+            yield ln
+
+    with src.open(encoding='utf-8', errors='ignore') as f, replacing(dst) as out:
+        for ln in clean_lines(counted(f), dialect):
+            out.write(ln)
+            n_out += 1
+
+    dt = time.perf_counter() - t0
+    stats = {'src': str(src), 'dst': str(dst), 'lines_in': n_in, 'lines_out': n_out,
+             'seconds': dt, 'lines_per_s': n_in / dt if dt else 0.0, 'peak_rss_kb': peak_rss_kb()}
+    if not quiet:
+        print(f"[+] Wrote cleaned file → {dst}")
+    return stats
+
+def _clean_job(job):
+    src, dst, dialect = job
+    return clean(Path(src), Path(dst), quiet=True, dialect=dialect)
+
+def report(st: dict):
+    rss = f"{st['peak_rss_kb'] / 1024:.1f} MiB" if st['peak_rss_kb'] is not None else "n/a"
+    print(f"{st['src']}: {st['lines_in']} → {st['lines_out']} lines  "
+          f"{st['lines_per_s']:,.0f} lines/s  peak RSS {rss}")
+
+def clean_batch(src_dir: Path, dst_dir: Path, pattern: str = '*.asm', jobs: int = 0,
+                dialect: str = 'asem51') -> list:
+    """Clean every listing matching `pattern` in src_dir into dst_dir across a process pool."""
+    from concurrent.futures import ProcessPoolExecutor   # ~40 ms of multiprocessing imports, only --batch needs them
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    work = [(str(p), str(dst_dir / p.name), dialect) for p in sorted(src_dir.glob(pattern)) if p.is_file()]
+    if not work:
+        return []
+    jobs = jobs or min(len(work), os.cpu_count() or 1)
+    kw = {'max_workers': jobs}
+    if sys.version_info >= (3, 11):
+        kw['max_tasks_per_child'] = 1        # fresh worker per file → per-file peak RSS
+    results = []
+    with ProcessPoolExecutor(**kw) as pool:
+        for st in pool.map(_clean_job, work):
+            report(st)
+            results.append(st)
+    return results
+
+def bench(paths, repeat: int = 3):
+    """Time the legacy seven-regex cleaner against the one-pass translator (in memory, best of N)."""
+    def best(fn, lines):
+        t = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = list(fn(lines))
+            t = min(t, time.perf_counter() - t0)
+        return t, out
 
-    with dst.open('w', encoding='utf-8') as f:
-        f.writelines(cleaned)
+    for p in paths:
+        with p.open(encoding='utf-8', errors='ignore') as f:
+            lines = f.readlines()
+        t_old, ref = best(legacy_clean_lines, lines)
+        print(f"{p}  ({len(lines)} lines)")
+        print(f"  {'legacy':8s} {t_old * 1000:8.1f} ms  {len(lines) / t_old:12,.0f} lines/s")
+        for name in DIALECTS:
+            t, out = best(lambda ls: clean_lines(ls, name), lines)
+            same = '' if name != 'asem51' else ('  identical' if out == ref else '  OUTPUT DIFFERS')
+            print(f"  {name:8s} {t * 1000:8.1f} ms  {len(lines) / t:12,.0f} lines/s  x{t_old / t:4.1f}{same}")
 
-    print(f"[+] Wrote cleaned file → {dst}")
+def main():
+    ap = argparse.ArgumentParser(description="Clean IDA 8051 listings for ASEM-51 / SDCC as8051 / Keil A51")
+    ap.add_argument('paths', type=Path, nargs='+',
+                    help="SRC DST; SRC_DIR DST_DIR with --batch; listings to time with --bench")
+    ap.add_argument('--dialect', choices=sorted(DIALECTS), default='asem51', help="output assembler (default asem51)")
+    ap.add_argument('--batch', action='store_true', help="clean every listing in SRC_DIR into DST_DIR")
+    ap.add_argument('--glob', default='*.asm', help="file pattern for --batch (default *.asm)")
+    ap.add_argument('-j', '--jobs', type=int, default=0, help="worker processes for --batch (default: CPUs)")
+    ap.add_argument('--stats', action='store_true', help="print lines/s and peak RSS")
+    ap.add_argument('--bench', action='store_true', help="benchmark against the legacy cleaner")
+    ap.add_argument('--incremental', action='store_true', help="reuse unchanged function blocks from a cache")
+    ap.add_argument('--cache', type=Path, default=None, help="cache file for --incremental (default DST.cache)")
+    a = ap.parse_args()
+    if a.bench:
+        bench(a.paths)
+        sys.exit(0)
+    if len(a.paths) != 2:
+        ap.error("expected SRC and DST")
+    src, dst = a.paths
+    if a.batch:
+        if not clean_batch(src, dst, a.glob, a.jobs, a.dialect):
+            sys.exit(f"No files matching {a.glob} in {src}")
+    elif a.incremental or a.cache:
+        st = clean_incremental(src, dst, a.cache, dialect=a.dialect)
+        if a.stats:
+            report(st)
+    else:
+        st = clean(src, dst, dialect=a.dialect)
+        if a.stats:
+            report(st)
 
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
-        sys.exit("Usage: python clean_8051_ida.py raw_ida.asm cleaned.asm")
-    clean(Path(sys.argv[1]), Path(sys.argv[2]))
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+snxfw_asmindex.py — indexed queries over IDA 8051 listings
+
+Parses an IDA .asm export once (functions, labels, instructions, operands,
+CODE/DATA XREF comments, RAM_xx / SFR / XDATA references) into a columnar
+index and pickles it next to the listing (<listing>.idx). Later queries load
+the index in milliseconds and never rescan the text. The index is rebuilt
+automatically when the listing's size or mtime changes.
+
+Addresses are recovered without IDA: the listing has no address column, so
+they are computed from 8051 instruction lengths and re-anchored at every
+label whose address is known (code_XXXX names, the map file, the interrupt
+vectors) and at IDA's "; .equ $, 0x10000" origin comments.
+
+Usage
+  python snxfw_asmindex.py build ../gpt5/firmware_backup.bin.asm --map ../gpt5/firmware_backup.bin.map
+  python snxfw_asmindex.py xref     LISTING code_C84        # XREF comments + operand uses
+  python snxfw_asmindex.py callers  LISTING code_C84
+  python snxfw_asmindex.py callees  LISTING code_D83
+  python snxfw_asmindex.py xdata    LISTING 0xB77 [--writes | --reads]
+  python snxfw_asmindex.py range    LISTING 0xD83 0xE00
+  python snxfw_asmindex.py grep     LISTING --mnem movx --ops '@DPTR'
+  python snxfw_asmindex.py func     LISTING code_D83
+"""
+import argparse, os, pickle, re, sys, time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from snxfw_map import CODE, SymbolTable
+
+INDEX_VERSION = 2
+
+# 8051 / C517 interrupt vectors as named by IDA
+VECTORS = {"RESET": 0x00, "IE0": 0x03, "TF0": 0x0B, "IE1": 0x13, "TF1": 0x1B, "RI0_TI0": 0x23,
+           "TF2_EXF2": 0x2B, "IADC": 0x43, "IEX2": 0x4B, "IEX3": 0x53, "IEX4": 0x5B, "IEX5": 0x63,
+           "IEX6": 0x6B, "RI1_TI1": 0x83, "CTF": 0x9B}
+
+# operands that are encoded in the opcode itself
+IMPLICIT = {"a", "c", "ab", "dptr", "@dptr", "@a+dptr", "@a+pc", "@r0", "@r1",
+            "r0", "r1", "r2", "r3", "r4", "r5", "r6", "r7"}
+CALLS = {"lcall", "acall", "call"}
+JUMPS = {"ljmp", "ajmp", "sjmp", "jmp", "jc", "jnc", "jz", "jnz", "jb", "jnb", "jbc", "djnz", "cjne"}
+
+LABEL   = re.compile(r"^([A-Za-z_$?@][\w$?@]*):")
+ANCHOR  = re.compile(r"^(?:code|loc|sub|unk|byte|word|off|ROM)_([0-9A-Fa-f]+)$")
+ORIGIN  = re.compile(r"^\s*;\s*\.equ\s+\$\s*,\s*(\w+)", re.I)
+EQU     = re.compile(r"^\s*\.equ\s+(\w+)\s*,\s*(\w+)", re.I)
+FUNC_END = re.compile(r"^\s*;\s*End\s+of\s+function\s+(\S+)", re.I)
+XREF    = re.compile(r";\s*(CODE|DATA)\s+XREF:\s*(.*)$")
+XREF_TOK = re.compile(r"([\w$?@]+)(?::([\w$?@]+))?([+-][0-9A-Fa-f]+)?[↑↓]?([a-z])?$")
+SYMBOL  = re.compile(r"[A-Za-z_][\w]*")
+
+def _int(tok):
+    tok = tok.strip().lstrip("#")
+    if tok.lower().startswith("0x"):
+        return int(tok, 16)
+    if tok[-1:] in "hH" and re.fullmatch(r"[0-9][0-9A-Fa-f]*[hH]", tok):
+        return int(tok[:-1], 16)
+    return int(tok, 10)
+
+def insn_length(mnem: str, ops: list) -> int:
+    """8051 length = opcode + one byte per direct/bit/imm8/rel operand (DPTR,#imm16 and long jumps take two)."""
+    n = 1
+    for op in ops:
+        o = op.lower()
+        if o in IMPLICIT:
+            continue
+        if mnem in ("ljmp", "lcall") or (o.startswith("#") and mnem == "mov" and ops[0].lower() == "dptr"):
+            n += 2
+        else:
+            n += 1
+    return n
+
+def split_operands(s: str) -> list:
+    s = s.split(";", 1)[0].strip()
+    return [p.strip() for p in s.split(",")] if s else []
+
+class Index:
+    """Columnar model of one listing. Instruction i is described by addr[i], line[i], mnem[i], ops[i], func[i]."""
+    def __init__(self):
+        self.src = ""
+        self.stamp = (0, 0)
+        self.map_src, self.map_stamp = "", None      # .map the anchors came from, (size, mtime) when built
+        self.strings = []                 # interned mnemonic / operand text
+        self.addr = array("I"); self.line = array("I"); self.mnem = array("H")
+        self.ops = array("I"); self.func = array("i")
+        self.order = array("I"); self.sorted_addr = array("I")   # insn idx by address, for range()
+        self.functions = []               # (name, start_addr, end_addr, first_insn, last_insn)
+        self.labels = {}                  # name -> (addr, line)
+        self.equs = {}                    # RAM_xx / SFR name -> value
+        self.xrefs = {}                   # target -> [(kind, src_name, src_label, offset, type_char)]
+        self.refs = {}                    # symbol used as operand -> array of insn idx
+        self.xdata_w = {}                 # xdata address -> array of insn idx (movx @DPTR,A)
+        self.xdata_r = {}
+        self.anchor_fixes = 0             # times a known label address disagreed with the running count
+
+    # ---- building ----
+    @classmethod
+    def build(cls, path: Path, known: dict = None) -> "Index":
+        ix = cls()
+        st = path.stat()
+        ix.src, ix.stamp = str(path), (st.st_size, int(st.st_mtime))
+        known = dict(VECTORS, **(known or {}))
+        sid = {}
+        def intern(s):
+            i = sid.get(s)
+            if i is None:
+                i = sid[s] = len(ix.strings); ix.strings.append(s)
+            return i
+
+        pc, dptr, cur_func, func_start = 0, None, -1, None
+        pending_xref = None
+        with path.open(encoding="utf-8", errors="ignore") as f:
+            for lno, raw in enumerate(f, 1):
+                ln = raw.rstrip("\n")
+                s = ln.lstrip()
+                if not s:
+                    pending_xref = None
+                    continue
+                m = XREF.search(ln)
+                if m:
+                    tgt = LABEL.match(ln)
+                    target = tgt.group(1) if tgt else pending_xref
+                    if target:
+                        ix._add_xrefs(target, m.group(1), m.group(2))
+                        pending_xref = target
+                elif pending_xref and s.startswith(";") and ln.startswith(" ") and not FUNC_END.match(ln):
+                    ix._add_xrefs(pending_xref, "CODE", s[1:])   # wrapped XREF continuation
+                    continue
+                else:
+                    pending_xref = None
+                if s.startswith(";"):
+                    mo = ORIGIN.match(ln)
+                    if mo:
+                        pc, dptr = _int(mo.group(1)), None
+                    me = FUNC_END.match(ln)
+                    if me and cur_func >= 0:
+                        name, start, _, first, _ = ix.functions[cur_func]
+                        ix.functions[cur_func] = (name, start, pc, first, len(ix.addr) - 1)
+                        cur_func = -1
+                    elif "public " in s:
+                        func_start = s.split("public", 1)[1].strip()
+                    elif "S U B R O U T I N E" in s:
+                        func_start = True
+                    continue
+                me = EQU.match(ln)
+                if me:
+                    try:
+                        ix.equs[me.group(1)] = _int(me.group(2))
+                    except ValueError:
+                        pass
+                    continue
+                ml = LABEL.match(ln)
+                if ml:
+                    name = ml.group(1)
+                    ma = ANCHOR.match(name)
+                    want = known.get(name, int(ma.group(1), 16) if ma else None)
+                    if want is not None and want != pc:
+                        ix.anchor_fixes += 1
+                        pc = want
+                    ix.labels[name] = (pc, lno)
+                    dptr = None                                     # control-flow merge point
+                    if func_start is not None:
+                        ix.functions.append((name, pc, pc, len(ix.addr), len(ix.addr) - 1))
+                        cur_func, func_start = len(ix.functions) - 1, None
+                    s = ln[ml.end():].strip()
+                    if not s or s.startswith(";"):
+                        continue
+                parts = s.split(None, 1)
+                mnem = parts[0].lower()
+                if mnem in (".end",):
+                    continue
+                if mnem in (".byte", "db"):
+                    pc += max(1, len(split_operands(parts[1] if len(parts) > 1 else "")))
+                    continue
+                ops = split_operands(parts[1] if len(parts) > 1 else "")
+                i = len(ix.addr)
+                ix.addr.append(pc); ix.line.append(lno); ix.mnem.append(intern(mnem))
+                ix.ops.append(intern(", ".join(ops))); ix.func.append(cur_func)
+                for op in ops:
+                    for sym in SYMBOL.findall(op.split(".", 1)[0].lstrip("#/@")):
+                        if sym.lower() not in IMPLICIT and not re.fullmatch(r"0x[0-9A-Fa-f]+|[0-9][0-9A-Fa-f]*[hH]?", sym):
+                            ix.refs.setdefault(sym, array("I")).append(i)
+                # DPTR tracking for XDATA reads/writes
+                if mnem == "mov" and ops and ops[0].upper() == "DPTR" and len(ops) == 2:
+                    try:
+                        dptr = _int(ops[1])
+                    except ValueError:
+                        dptr = None
+                elif mnem == "inc" and ops == ["DPTR"] and dptr is not None:
+                    dptr = (dptr + 1) & 0xFFFF
+                elif mnem == "movx" and dptr is not None and len(ops) == 2:
+                    if ops[0].upper() == "@DPTR":
+                        ix.xdata_w.setdefault(dptr, array("I")).append(i)
+                    elif ops[1].upper() == "@DPTR":
+                        ix.xdata_r.setdefault(dptr, array("I")).append(i)
+                elif mnem in CALLS or mnem in JUMPS:
+                    dptr = None if mnem in CALLS else dptr
+                pc += insn_length(mnem, ops)
+        ix.order = array("I", sorted(range(len(ix.addr)), key=ix.addr.__getitem__))
+        ix.sorted_addr = array("I", (ix.addr[i] for i in ix.order))
+        return ix
+
+    def _add_xrefs(self, target, kind, text):
+        for tok in text.split():
+            if tok == "...":
+                continue
+            m = XREF_TOK.match(tok)
+            if m:
+                off = int(m.group(3), 16) if m.group(3) else 0
+                self.xrefs.setdefault(target, []).append((kind, m.group(1), m.group(2), off, m.group(4) or ""))
+
+    # ---- persistence ----
+    def save(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            pickle.dump((INDEX_VERSION, self.__dict__), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "Index":
+        with path.open("rb") as f:
+            ver, state = pickle.load(f)
+        if ver != INDEX_VERSION:
+            raise ValueError("index version mismatch")
+        ix = cls(); ix.__dict__.update(state)
+        return ix
+
+    # ---- queries ----
+    def text(self, i) -> str:
+        ops = self.strings[self.ops[i]]
+        return f"{self.addr[i]:05X}  L{self.line[i]:<6d} {self.strings[self.mnem[i]]:<6s} {ops}"
+
+    def func_of(self, i) -> str:
+        f = self.func[i]
+        return self.functions[f][0] if f >= 0 else "-"
+
+    def resolve(self, name_or_addr: str):
+        if name_or_addr in self.labels:
+            return self.labels[name_or_addr][0]
+        return _int(name_or_addr)
+
+    def xref(self, name):
+        return self.xrefs.get(name, []), list(self.refs.get(name, ()))
+
+    def callers(self, name):
+        out = {x[1] for x in self.xrefs.get(name, []) if x[4] == "p"}
+        for i in self.refs.get(name, ()):
+            if self.strings[self.mnem[i]] in CALLS and self.func[i] >= 0:
+                out.add(self.func_of(i))
+        return sorted(out)
+
+    def callees(self, name):
+        fi = next((k for k, f in enumerate(self.functions) if f[0] == name), None)
+        if fi is None:
+            return []
+        _, _, _, first, last = self.functions[fi]
+        out = set()
+        for i in range(first, last + 1):
+            if self.strings[self.mnem[i]] in CALLS:
+                out.add(self.strings[self.ops[i]])
+        return sorted(out)
+
+    def range(self, lo, hi):
+        keys = self.sorted_addr
+        j = bisect_left(keys, lo)
+        while j < len(keys) and keys[j] < hi:
+            yield self.order[j]; j += 1
+
+    def grep(self, mnem=None, ops=None):
+        mset = None if mnem is None else {k for k, s in enumerate(self.strings) if re.fullmatch(mnem, s, re.I)}
+        orx = None if ops is None else re.compile(ops, re.I)
+        oset = None if orx is None else {k for k, s in enumerate(self.strings) if orx.search(s)}
+        for i in range(len(self.addr)):
+            if (mset is None or self.mnem[i] in mset) and (oset is None or self.ops[i] in oset):
+                yield i
+
+def index_path(listing: Path) -> Path:
+    return listing.with_name(listing.name + ".idx")
+
+def load_map_publics(map_path: Path) -> dict:
+    """Name -> address from the CODE "Publics by Value" section of an IDA .map file."""
+    return {name: addr for addr, name in SymbolTable.load(map_path).symbols(CODE)}
+
+def _stamp(path: Path):
+    st = path.stat()
+    return st.st_size, int(st.st_mtime)
+
+def open_index(listing: Path, map_path: Path = None, rebuild: bool = False) -> Index:
+    """
+    Cached index of `listing`, rebuilt when the listing or the .map changed. Without
+    --map the map the index was built with (if any, and still there) is checked.
+    """
+    ip = index_path(listing)
+    ix = None
+    if ip.exists():
+        try:
+            ix = Index.load(ip)
+        except (ValueError, pickle.UnpicklingError, EOFError):
+            pass
+    if map_path is None and ix and ix.map_src and Path(ix.map_src).exists():
+        map_path = Path(ix.map_src)
+    map_src = str(map_path.resolve()) if map_path else ""
+    map_stamp = _stamp(map_path) if map_path else None
+    if (not rebuild and ix and ix.stamp == _stamp(listing)
+            and (ix.map_src, ix.map_stamp) == (map_src, map_stamp)):
+        return ix
+    ix = Index.build(listing, load_map_publics(map_path) if map_path else None)
+    ix.map_src, ix.map_stamp = map_src, map_stamp
+    ix.save(ip)
+    return ix
+
+# ---------- CLI ----------
+
+def main():
+    ap = argparse.ArgumentParser(description="Indexed queries over IDA 8051 listings")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    def add(name, help_):
+        p = sub.add_parser(name, help=help_)
+        p.add_argument("listing", type=Path)
+        p.add_argument("--map", type=Path, default=None, help="IDA .map for extra address anchors")
+        return p
+    add("build", "(re)build the index").set_defaults(rebuild=True)
+    add("xref", "XREF comments and operand uses of a name").add_argument("name")
+    add("callers", "functions calling NAME").add_argument("name")
+    add("callees", "calls made by function NAME").add_argument("name")
+    x = add("xdata", "instructions reading/writing an XDATA address (via DPTR)")
+    x.add_argument("address"); x.add_argument("--writes", action="store_true"); x.add_argument("--reads", action="store_true")
+    r = add("range", "instructions in [START, END)")
+    r.add_argument("start"); r.add_argument("end")
+    g = add("grep", "instructions by mnemonic / operand regex")
+    g.add_argument("--mnem", default=None); g.add_argument("--ops", default=None)
+    add("func", "function bounds and size").add_argument("name")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    ix = open_index(args.listing, args.map, getattr(args, "rebuild", False))
+    t_load = time.perf_counter() - t0
+
+    if args.cmd == "build":
+        print(f"indexed {len(ix.addr)} insns, {len(ix.functions)} functions, {len(ix.labels)} labels, "
+              f"{sum(map(len, ix.xrefs.values()))} xrefs in {t_load * 1000:.0f} ms "
+              f"(re-anchored {ix.anchor_fixes}x) → {index_path(args.listing)}")
+        return
+    if args.cmd == "xref":
+        comments, uses = ix.xref(args.name)
+        for kind, src, lab, off, t in comments:
+            where = f"{src}:{lab}" if lab else f"{src}{off:+X}" if off else src
+            print(f"{kind} XREF  {where:<28s} {t}")
+        for i in uses:
+            print(f"use   {ix.text(i)}    [{ix.func_of(i)}]")
+    elif args.cmd == "callers":
+        print("\n".join(ix.callers(args.name)))
+    elif args.cmd == "callees":
+        print("\n".join(ix.callees(args.name)))
+    elif args.cmd == "xdata":
+        a = _int(args.address)
+        both = not (args.writes or args.reads)
+        for tag, table in (("W", ix.xdata_w), ("R", ix.xdata_r)):
+            if both or (tag == "W") == args.writes:
+                for i in table.get(a, ()):
+                    print(f"{tag}  {ix.text(i)}    [{ix.func_of(i)}]")
+    elif args.cmd == "range":
+        for i in ix.range(ix.resolve(args.start), ix.resolve(args.end)):
+            print(f"{ix.text(i)}    [{ix.func_of(i)}]")
+    elif args.cmd == "grep":
+        for i in ix.grep(args.mnem, args.ops):
+            print(f"{ix.text(i)}    [{ix.func_of(i)}]")
+    elif args.cmd == "func":
+        for name, start, end, first, last in ix.functions:
+            if name == args.name:
+                print(f"{name}: 0x{start:05X}-0x{end:05X} ({end - start} bytes, {last - first + 1} insns)")
+    print(f"[index load {t_load * 1000:.1f} ms]", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+snxfw_diff.py — vectorized diff of Sonix firmware images
+
+Images are memory-mapped as uint8 arrays, compared in one NumPy pass, and the
+differing offsets coalesced into ranges: two differences at most --gap equal
+bytes apart end up in the same range. Ranges are then widened to erase-sector
+boundaries (--sector, 4 KiB on the SN9C292's SPI flash) so the result can be
+fed straight into a selective reflash of just those sectors.
+
+Image offsets are code addresses (IDA loads the .bin at 0), so --map names
+each range after the nearest public symbol (snxfw_map.py).
+
+Patch description (--json)
+  {"format": "snxfw-diff/1",
+   "base":   {"path", "size", "sha256"},  "target": {...},
+   "gap": 0, "sector": 4096, "bytes_changed": N,
+   "ranges":  [{"start", "end", "len", "symbol"?, "data"?}],   # end exclusive, data = target bytes (hex)
+   "sectors": [{"start", "end"}]}                               # erase/program units covering all ranges
+
+Usage
+  python snxfw_diff.py diff "../camera info/firmware_backup_raw.bin" "../firmware samples/firmware_backup_raw_osd_off.bin" --map ../gpt5/firmware_backup.bin.map
+  python snxfw_diff.py diff base.bin patched.bin --gap 16 --json patch.json --data
+  python snxfw_diff.py matrix ../firmware\\ samples/*.bin ../gpt5/firmwares\\ nukes/*.bin
+"""
+import argparse, hashlib, json, sys, time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+SECTOR = 0x1000
+
+def load(path) -> np.ndarray:
+    """Read-only uint8 view of an image file (memory-mapped, nothing copied)."""
+    if Path(path).stat().st_size == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+def diff_ranges(a: np.ndarray, b: np.ndarray, gap: int = 0):
+    """[(start, end)] of differing bytes, end exclusive; runs <= gap equal bytes apart are merged.
+
+    A size mismatch counts as a difference over the tail of the longer image.
+    """
+    n = min(len(a), len(b))
+    idx = np.flatnonzero(a[:n] != b[:n])
+    out = []
+    if len(idx):
+        brk = np.flatnonzero(np.diff(idx) > gap + 1)
+        starts = idx[np.concatenate(([0], brk + 1))]
+        ends = idx[np.concatenate((brk, [len(idx) - 1]))] + 1
+        out = list(zip(starts.tolist(), ends.tolist()))
+    if len(a) != len(b):
+        tail = (n, max(len(a), len(b)))
+        if out and tail[0] - out[-1][1] <= gap:
+            out[-1] = (out[-1][0], tail[1])
+        else:
+            out.append(tail)
+    return out
+
+def align(ranges, sector: int = SECTOR):
+    """Widen ranges to whole sectors and merge the ones that now touch."""
+    out = []
+    for s, e in ranges:
+        s, e = s - s % sector, -(-e // sector) * sector
+        if out and s <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], e))
+        else:
+            out.append((s, e))
+    return out
+
+def changed_bytes(a: np.ndarray, b: np.ndarray) -> int:
+    n = min(len(a), len(b))
+    return int(np.count_nonzero(a[:n] != b[:n])) + abs(len(a) - len(b))
+
+def _sha256(arr: np.ndarray) -> str:
+    return hashlib.sha256(memoryview(arr)).hexdigest()
+
+def describe(base, target, gap: int = 0, sector: int = SECTOR, symbols=None, data: bool = False) -> dict:
+    """Machine-readable patch description for base → target (paths or arrays)."""
+    a = load(base) if not isinstance(base, np.ndarray) else base
+    b = load(target) if not isinstance(target, np.ndarray) else target
+    ranges = diff_ranges(a, b, gap)
+    rs = []
+    for s, e in ranges:
+        r = {"start": s, "end": e, "len": e - s}
+        if symbols is not None:
+            r["symbol"] = symbols.describe(s)
+        if data:
+            r["data"] = bytes(b[s:e]).hex()
+        rs.append(r)
+    return {
+        "format": "snxfw-diff/1",
+        "base":   {"path": str(base) if not isinstance(base, np.ndarray) else None, "size": len(a), "sha256": _sha256(a)},
+        "target": {"path": str(target) if not isinstance(target, np.ndarray) else None, "size": len(b), "sha256": _sha256(b)},
+        "gap": gap, "sector": sector,
+        "bytes_changed": changed_bytes(a, b),
+        "ranges": rs,
+        "sectors": [{"start": s, "end": e} for s, e in align(ranges, sector)],
+    }
+
+# ---------- CLI ----------
+
+def _load_symbols(map_path):
+    if not map_path:
+        return None
+    from snxfw_map import SymbolTable
+    return SymbolTable.load(map_path)
+
+def cmd_diff(args):
+    t0 = time.perf_counter()
+    d = describe(args.base, args.target, args.gap, args.sector, _load_symbols(args.map), args.data)
+    dt = time.perf_counter() - t0
+    if args.json and args.json != "-":
+        Path(args.json).write_text(json.dumps(d, indent=1) + "\n")
+    if args.json != "-":
+        print(f"{d['base']['path']} ({d['base']['size']} B) → {d['target']['path']} ({d['target']['size']} B)")
+        for r in d["ranges"]:
+            sym = f"  {r['symbol']}" if r.get("symbol") else ""
+            print(f"  0x{r['start']:05X}-0x{r['end'] - 1:05X}  {r['len']:6d} B{sym}")
+        secs = d["sectors"]
+        print(f"{d['bytes_changed']} bytes changed in {len(d['ranges'])} ranges (gap {args.gap}); "
+              f"{len(secs)} sector run(s), {sum(s['end'] - s['start'] for s in secs)} B to reflash"
+              f"  [{dt * 1000:.1f} ms]")
+    else:
+        sys.stdout.write(json.dumps(d, indent=1) + "\n")
+
+def cmd_matrix(args):
+    t0 = time.perf_counter()
+    imgs = [load(p) for p in args.images]
+    names = [Path(p).name for p in args.images]
+    w = max(len(n) for n in names)
+    rows = []
+    for i, j in combinations(range(len(imgs)), 2):
+        r = diff_ranges(imgs[i], imgs[j], args.gap)
+        rows.append((i, j, changed_bytes(imgs[i], imgs[j]), len(r), len(align(r, args.sector))))
+    dt = time.perf_counter() - t0
+    if args.json:
+        out = {"images": [str(p) for p in args.images], "gap": args.gap, "sector": args.sector,
+               "pairs": [{"a": i, "b": j, "bytes": n, "ranges": nr, "sectors": ns} for i, j, n, nr, ns in rows]}
+        Path(args.json).write_text(json.dumps(out, indent=1) + "\n")
+    for i, j, n, nr, ns in rows:
+        print(f"{names[i]:<{w}}  {names[j]:<{w}}  {n:7d} B  {nr:4d} ranges  {ns:3d} sector runs")
+    print(f"[{len(rows)} pairs of {len(imgs)} images in {dt * 1000:.1f} ms]", file=sys.stderr)
+
+def main():
+    ap = argparse.ArgumentParser(description="Vectorized firmware image diff with sector-aligned patch output")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("diff", help="diff two images")
+    d.add_argument("base", type=Path); d.add_argument("target", type=Path)
+    d.add_argument("--json", default=None, help="write the patch description here ('-' = stdout only)")
+    d.add_argument("--data", action="store_true", help="include target bytes of each range in the JSON")
+    d.add_argument("--map", type=Path, default=None, help="IDA .map to name ranges")
+    d.set_defaults(func=cmd_diff)
+    m = sub.add_parser("matrix", help="pairwise summary over many images")
+    m.add_argument("images", nargs="+", type=Path)
+    m.add_argument("--json", default=None)
+    m.set_defaults(func=cmd_matrix)
+    for p in (d, m):
+        p.add_argument("--gap", type=int, default=0, help="merge differences up to this many equal bytes apart")
+        p.add_argument("--sector", type=lambda x: int(x, 0), default=SECTOR, help="erase sector size (default 0x1000)")
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
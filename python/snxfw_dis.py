@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+snxfw_dis.py — table-driven 8051 disassembler for Sonix flash dumps
+
+Turns a raw .bin (e.g. from `snxuvc_dump.py sf-read`) straight into a
+listing, no IDA round trip. Opcodes are decoded through 256-entry tables
+built once at import; code is found by recursive descent from the C517
+interrupt vectors IDA names in firmware_backup.bin.map (RESET, IE0, TF0, ...)
+plus any --entry addresses, following jumps and calls. Everything not reached
+is emitted as .byte data.
+
+The listing is written IDA-style and then passed through the cleaner's
+translator (py.py, a.k.a. clean_8051_ida.py), so --dialect gives exactly the
+same ASEM-51 / SDCC as8051 / Keil A51 output as cleaning an IDA export.
+--dialect ida skips translation (input for snxfw_asmindex.py).
+
+Usage
+  python snxfw_dis.py ../firmware\\ samples/firmware_backup.bin -o firmware_dis.asm
+  python snxfw_dis.py dump.bin --dialect a51 --entry 0xC84 --entry 0xD83 -o dump_a51.asm
+  python snxfw_dis.py dump.bin --offset 0x10000 -o bank1.asm      # second 64 KiB bank
+  python snxfw_dis.py dump.bin --map ../gpt5/firmware_backup.bin.map   # label with the map's names
+"""
+import argparse, importlib.util, sys, time
+from pathlib import Path
+
+from snxfw_map import CODE, SymbolTable
+
+def load_cleaner():
+    """
+    The listing cleaner py.py, imported as `clean_8051_ida`: the name `py` belongs to
+    the pytest/pylib shim in site-packages, which wins once pytest has been imported.
+    """
+    mod = sys.modules.get("clean_8051_ida")
+    if mod is None:
+        spec = importlib.util.spec_from_file_location("clean_8051_ida", Path(__file__).resolve().parent.parent / "py.py")
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = mod
+        spec.loader.exec_module(mod)
+    return mod
+
+_cleaner = load_cleaner()
+DIALECTS, make_translator = _cleaner.DIALECTS, _cleaner.make_translator
+
+# C517 interrupt vectors (names as IDA assigns them)
+VECTORS = {0x00: "RESET", 0x03: "IE0", 0x0B: "TF0", 0x13: "IE1", 0x1B: "TF1", 0x23: "RI0_TI0",
+           0x2B: "TF2_EXF2", 0x43: "IADC", 0x4B: "IEX2", 0x53: "IEX3", 0x5B: "IEX4", 0x63: "IEX5",
+           0x6B: "IEX6", 0x83: "RI1_TI1", 0x9B: "CTF"}
+
+# C517 SFR names (IDA's FSR segment for this target)
+SFR = {0x80: "P0", 0x81: "SP", 0x82: "DPL", 0x83: "DPH", 0x86: "WDTREL", 0x87: "PCON", 0x88: "TCON",
+       0x89: "TMOD", 0x8A: "TL0", 0x8B: "TL1", 0x8C: "TH0", 0x8D: "TH1", 0x90: "P1", 0x92: "DPSEL",
+       0x98: "S0CON", 0x99: "S0BUF", 0x9A: "IEN2", 0x9B: "S1CON", 0x9C: "S1BUF", 0x9D: "S1REL",
+       0xA0: "P2", 0xA8: "IEN0", 0xA9: "IP0", 0xAA: "S0RELL", 0xB0: "P3", 0xB8: "IEN1", 0xB9: "IP1",
+       0xBA: "S0RELH", 0xBB: "S1RELH", 0xC0: "IRCON", 0xC1: "CCEN", 0xC2: "CCL1", 0xC3: "CCH1",
+       0xC4: "CCL2", 0xC5: "CCH2", 0xC6: "CCL3", 0xC7: "CCH3", 0xC8: "T2CON", 0xC9: "CC4EN",
+       0xCA: "CRCL", 0xCB: "CRCH", 0xCC: "TL2", 0xCD: "TH2", 0xCE: "CCL4", 0xCF: "CCH4", 0xD0: "PSW",
+       0xD2: "CML0", 0xD3: "CMH0", 0xD4: "CML1", 0xD5: "CMH1", 0xD6: "CML2", 0xD7: "CMH2",
+       0xD8: "ADCON0", 0xD9: "ADDAT", 0xDA: "DAPR", 0xDB: "P7", 0xDC: "ADCON1", 0xDD: "P8",
+       0xDE: "CTRELL", 0xDF: "CTRELH", 0xE0: "ACC", 0xE1: "CTCON", 0xE2: "CML3", 0xE3: "CMH3",
+       0xE4: "CML4", 0xE5: "CMH4", 0xE6: "CML5", 0xE7: "CMH5", 0xE8: "P4", 0xE9: "MD0", 0xEA: "MD1",
+       0xEB: "MD2", 0xEC: "MD3", 0xED: "MD4", 0xEE: "MD5", 0xEF: "ARCON", 0xF0: "B", 0xF2: "CML6",
+       0xF3: "CMH6", 0xF4: "CML7", 0xF5: "CMH7", 0xF6: "CMEN", 0xF7: "CMSEL", 0xF8: "P5", 0xFA: "P6"}
+
+# ---------- opcode tables ----------
+# Operand kinds: literal register text, or one of
+#   dir  direct byte      #   imm8        #16 imm16     bit  bit address   /bit  complemented bit
+#   rel  PC-relative      a11 AJMP/ACALL  a16 LJMP/LCALL
+_ROWS = {  # low nibble 0..5 per high nibble; 6..F follow the @R0,@R1,R0..R7 pattern below
+    0x0: [("nop",), ("ajmp", "a11"), ("ljmp", "a16"), ("rr", "A"), ("inc", "A"), ("inc", "dir")],
+    0x1: [("jbc", "bit", "rel"), ("acall", "a11"), ("lcall", "a16"), ("rrc", "A"), ("dec", "A"), ("dec", "dir")],
+    0x2: [("jb", "bit", "rel"), ("ajmp", "a11"), ("ret",), ("rl", "A"), ("add", "A", "#"), ("add", "A", "dir")],
+    0x3: [("jnb", "bit", "rel"), ("acall", "a11"), ("reti",), ("rlc", "A"), ("addc", "A", "#"), ("addc", "A", "dir")],
+    0x4: [("jc", "rel"), ("ajmp", "a11"), ("orl", "dir", "A"), ("orl", "dir", "#"), ("orl", "A", "#"), ("orl", "A", "dir")],
+    0x5: [("jnc", "rel"), ("acall", "a11"), ("anl", "dir", "A"), ("anl", "dir", "#"), ("anl", "A", "#"), ("anl", "A", "dir")],
+    0x6: [("jz", "rel"), ("ajmp", "a11"), ("xrl", "dir", "A"), ("xrl", "dir", "#"), ("xrl", "A", "#"), ("xrl", "A", "dir")],
+    0x7: [("jnz", "rel"), ("acall", "a11"), ("orl", "C", "bit"), ("jmp", "@A+DPTR"), ("mov", "A", "#"), ("mov", "dir", "#")],
+    0x8: [("sjmp", "rel"), ("ajmp", "a11"), ("anl", "C", "bit"), ("movc", "A", "@A+PC"), ("div", "AB"), ("mov", "dir", "dir")],
+    0x9: [("mov", "DPTR", "#16"), ("acall", "a11"), ("mov", "bit", "C"), ("movc", "A", "@A+DPTR"), ("subb", "A", "#"), ("subb", "A", "dir")],
+    0xA: [("orl", "C", "/bit"), ("ajmp", "a11"), ("mov", "C", "bit"), ("inc", "DPTR"), ("mul", "AB"), None],
+    0xB: [("anl", "C", "/bit"), ("acall", "a11"), ("cpl", "bit"), ("cpl", "C"), ("cjne", "A", "#", "rel"), ("cjne", "A", "dir", "rel")],
+    0xC: [("push", "dir"), ("ajmp", "a11"), ("clr", "bit"), ("clr", "C"), ("swap", "A"), ("xch", "A", "dir")],
+    0xD: [("pop", "dir"), ("acall", "a11"), ("setb", "bit"), ("setb", "C"), ("da", "A"), ("djnz", "dir", "rel")],
+    0xE: [("movx", "A", "@DPTR"), ("ajmp", "a11"), ("movx", "A", "@R0"), ("movx", "A", "@R1"), ("clr", "A"), ("mov", "A", "dir")],
+    0xF: [("movx", "@DPTR", "A"), ("acall", "a11"), ("movx", "@R0", "A"), ("movx", "@R1", "A"), ("cpl", "A"), ("mov", "dir", "A")],
+}
+_REG_COLS = {  # high nibble -> (mnemonic, operand template with R for the register)
+    0x0: ("inc", "R"), 0x1: ("dec", "R"), 0x2: ("add", "A", "R"), 0x3: ("addc", "A", "R"),
+    0x4: ("orl", "A", "R"), 0x5: ("anl", "A", "R"), 0x6: ("xrl", "A", "R"), 0x7: ("mov", "R", "#"),
+    0x8: ("mov", "dir", "R"), 0x9: ("subb", "A", "R"), 0xA: ("mov", "R", "dir"), 0xB: ("cjne", "R", "#", "rel"),
+    0xC: ("xch", "A", "R"), 0xD: None, 0xE: ("mov", "A", "R"), 0xF: ("mov", "R", "A"),
+}
+_SIZE = {"dir": 1, "#": 1, "#16": 2, "bit": 1, "/bit": 1, "rel": 1, "a11": 1, "a16": 2}
+
+# flow classes
+RET, JUMP, CJUMP, CALL, IJUMP = "ret", "jump", "cjump", "call", "ijump"
+_FLOW = {"ret": RET, "reti": RET, "ljmp": JUMP, "ajmp": JUMP, "sjmp": JUMP, "jmp": IJUMP,
+         "lcall": CALL, "acall": CALL, "jc": CJUMP, "jnc": CJUMP, "jz": CJUMP, "jnz": CJUMP,
+         "jb": CJUMP, "jnb": CJUMP, "jbc": CJUMP, "cjne": CJUMP, "djnz": CJUMP}
+
+def _build_tables():
+    mnem, ops, length, flow = [None] * 256, [None] * 256, [1] * 256, [None] * 256
+    for op in range(256):
+        hi, lo = op >> 4, op & 0xF
+        if lo < 6:
+            ent = _ROWS[hi][lo]
+        elif hi == 0xD:                               # D6/D7 xchd, D8-DF djnz Rn
+            ent = ("xchd", "A", f"@R{lo - 6}") if lo < 8 else ("djnz", f"R{lo - 8}", "rel")
+        else:
+            tpl = _REG_COLS[hi]
+            reg = f"@R{lo - 6}" if lo < 8 else f"R{lo - 8}"
+            ent = (tpl[0],) + tuple(reg if t == "R" else t for t in tpl[1:])
+        if ent is None:                               # 0xA5 is undefined
+            mnem[op], ops[op] = ".byte", ()
+            continue
+        # operand list with the byte offset each operand is read from
+        pos, out = 1, []
+        for kind in ent[1:]:
+            out.append((kind, pos))
+            pos += _SIZE.get(kind, 0)
+        if op == 0x85:                                # mov dir,dir is encoded src,dst
+            out = [("dir", 2), ("dir", 1)]
+        mnem[op], ops[op], length[op], flow[op] = ent[0], tuple(out), pos, _FLOW.get(ent[0])
+    return mnem, ops, length, flow
+
+MNEM, OPS, LENGTH, FLOW = _build_tables()
+
+# ---------- operand formatting ----------
+
+def _num(v):
+    return str(v) if v < 10 else f"0x{v:X}"
+
+def _direct(v):
+    return SFR.get(v, f"RESERVED{v:04X}") if v >= 0x80 else f"RAM_{v:X}"
+
+def _bit(v):
+    if v < 0x80:
+        return f"RAM_{0x20 + (v >> 3):X}.{v & 7}"
+    base = v & 0xF8
+    return f"{SFR.get(base, f'RESERVED{base:04X}')}.{v & 7}"
+
+class Disassembler:
+    def __init__(self, image: bytes, base: int = 0):
+        self.img = image
+        self.base = base                         # address of image[0]
+        self.insn = {}                           # addr -> (mnem, operand kinds/values, length)
+        self.targets = {}                        # addr -> "call"/"jump"
+        self.names = {}
+
+    def decode(self, pc):
+        """(mnem, [(kind, value)], length, flow, [targets]) for the instruction at pc."""
+        img, off = self.img, pc - self.base
+        op = img[off]
+        n = LENGTH[op]
+        if off + n > len(img):
+            return None
+        vals, tg = [], []
+        for kind, p in OPS[op]:
+            b = img[off + p]
+            if kind == "#16" or kind == "a16":
+                v = (b << 8) | img[off + p + 1]
+            elif kind == "rel":
+                v = (pc + n + (b - 256 if b & 0x80 else b)) & 0xFFFF
+            elif kind == "a11":
+                v = ((pc + 2) & 0xF800) | ((op >> 5) << 8) | b
+            else:
+                v = b
+            if kind in ("rel", "a11", "a16"):
+                v |= self.base & ~0xFFFF             # stay in the current 64 KiB bank
+                tg.append(v)
+            vals.append((kind, v))
+        return MNEM[op], vals, n, FLOW[op], tg
+
+    def explore(self, entries):
+        """Recursive descent (iterative worklist) from `entries`."""
+        lo, hi = self.base, self.base + len(self.img)
+        work = [e for e in entries if lo <= e < hi]
+        covered = bytearray(len(self.img))       # 1 = byte belongs to a decoded instruction
+        while work:
+            pc = work.pop()
+            while lo <= pc < hi and pc not in self.insn and not covered[pc - lo]:
+                d = self.decode(pc)
+                if d is None or d[0] == ".byte":
+                    break
+                mnem, vals, n, flow, tg = d
+                if any(covered[pc - lo:pc - lo + n]):
+                    break                        # would overlap an already-decoded instruction
+                self.insn[pc] = (mnem, vals, n)
+                covered[pc - lo:pc - lo + n] = b"\x01" * n
+                for t in tg:
+                    if self.targets.get(t) != CALL:
+                        self.targets[t] = CALL if flow == CALL else JUMP
+                    work.append(t)
+                if flow in (RET, JUMP, IJUMP):
+                    break
+                pc += n
+
+    def label(self, addr):
+        return self.names.get(addr) or VECTORS.get(addr - self.base) or f"code_{addr:X}"
+
+    def operand(self, kind, v):
+        if kind in ("rel", "a11", "a16"):
+            return self.label(v)
+        if kind == "dir":
+            return _direct(v)
+        if kind == "#":
+            return "#" + _num(v)
+        if kind == "#16":
+            return f"#0x{v:X}"
+        if kind == "bit":
+            return _bit(v)
+        if kind == "/bit":
+            return "/" + _bit(v)
+        return kind
+
+    def lines(self):
+        """IDA-style listing lines (with '\\n')."""
+        yield f"; Disassembled by snxfw_dis.py: {len(self.insn)} instructions, {len(self.targets)} labels\n"
+        yield "\n"
+        yield "; Segment type: Pure code\n"
+        yield "                ;.segment code\n"
+        if self.base:
+            yield f"; .equ $,  0x{self.base:X}\n"
+        pc, end = self.base, self.base + len(self.img)
+        in_code = False
+        while pc < end:
+            ins = self.insn.get(pc)
+            if pc in self.targets or (ins and pc - self.base in VECTORS):
+                name = self.label(pc)
+                if self.targets.get(pc) == CALL or pc - self.base in VECTORS:
+                    yield "\n; =============== S U B R O U T I N E =======================================\n\n"
+                    yield f"                ; public {name}\n"
+                yield f"{name}:\n"
+            if ins is None:
+                if in_code:
+                    yield "; ---------------------------------------------------------------------------\n"
+                    in_code = False
+                yield f"                .byte {_num(self.img[pc - self.base]):>4s}\n"
+                pc += 1
+                continue
+            in_code = True
+            mnem, vals, n = ins
+            ops = ", ".join(self.operand(k, v) for k, v in vals)
+            yield f"                {mnem:<7s} {ops}\n" if ops else f"                {mnem}\n"
+            pc += n
+        yield "; end of 'code'\n"
+
+def main():
+    ap = argparse.ArgumentParser(description="Table-driven 8051 disassembler for Sonix flash dumps")
+    ap.add_argument("image", type=Path)
+    ap.add_argument("-o", "--out", type=Path, default=None, help="output listing (default: stdout)")
+    ap.add_argument("--dialect", choices=["ida"] + sorted(DIALECTS), default="asem51")
+    ap.add_argument("--offset", type=lambda x: int(x, 0), default=0, help="image offset to start at (bank base)")
+    ap.add_argument("--length", type=lambda x: int(x, 0), default=0x10000, help="bytes to disassemble (default 64 KiB)")
+    ap.add_argument("--entry", type=lambda x: int(x, 0), action="append", default=[], help="extra entry point (repeatable)")
+    ap.add_argument("--no-vectors", action="store_true", help="don't seed descent from the interrupt vectors")
+    ap.add_argument("--map", type=Path, default=None, help="IDA/linker .map: name labels after its publics")
+    args = ap.parse_args()
+
+    data = args.image.read_bytes()[args.offset:args.offset + args.length]
+    t0 = time.perf_counter()
+    d = Disassembler(data, base=args.offset)
+    if args.map:
+        end = args.offset + len(data)
+        d.names = {a: n for a, n in SymbolTable.load(args.map).symbols(CODE) if args.offset <= a < end}
+    entries = list(args.entry) + ([] if args.no_vectors else [args.offset + v for v in VECTORS])
+    d.explore(entries)
+    translate = (lambda ln: ln) if args.dialect == "ida" else make_translator(args.dialect)
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for ln in d.lines():
+            ln = translate(ln)
+            if ln is not None:
+                out.write(ln)
+    finally:
+        if args.out:
+            out.close()
+    dt = time.perf_counter() - t0
+    print(f"[dis] {len(data)} bytes, {len(d.insn)} insns, {len(d.targets)} labels in {dt * 1000:.0f} ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+"""
+snxfw_emu.py — 8051 instruction-set emulator for offline firmware experiments
+
+Runs code from a Sonix flash image (firmware_backup.bin, a patched variant,
+a fresh sf-read dump) without a camera: call a routine such as an XU or OSD
+handler with chosen registers/XDATA, watch which XDATA and SFR addresses it
+touches, stop at breakpoints, and count instructions per function.
+
+Design
+- Memory is flat bytearrays: CODE (one 64 KiB window of the image, --offset
+  picks the bank), XDATA (64 KiB), IRAM (256 B, indirect space), SFR (indexed
+  by the full 0x80-0xFF address). ACC, B, PSW, SP, DPTR live in SFR so direct
+  addressing sees them; the parity flag is computed when PSW is read.
+- Decoding is a 256-entry dispatch table of closures built once per CPU.
+  Each handler gets the PC and returns the next one, so the run loop keeps
+  PC in a local and does one table lookup and one call per instruction.
+- Hooks: dicts keyed by address for SFR and XDATA reads/writes
+  (fn(cpu, addr) -> value / fn(cpu, addr, value)); only hooked addresses pay.
+- Interrupts, timers and on-chip peripherals are not modelled; give them
+  values through hooks.
+
+Usage
+  python snxfw_emu.py run "../camera info/firmware_backup_raw.bin" --call 0xC84 --set R7=1 --trace-xdata
+  python snxfw_emu.py run dump.bin --call 0xD83 --xdata 0x0B75=0x01 --break 0xDA0 --max 2000000
+  python snxfw_emu.py run dump.bin --max 5000000 --profile --map ../gpt5/firmware_backup.bin.map   # from RESET
+  python snxfw_emu.py bench dump.bin
+"""
+import argparse, time
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+ACC, B, PSW, SP, DPL, DPH, P2 = 0xE0, 0xF0, 0xD0, 0x81, 0x82, 0x83, 0xA0
+CY, AC, OV = 0x80, 0x40, 0x04
+RETURN_SENTINEL = 0xFFFF                            # return address pushed by call()
+
+class Halt(Exception):
+    pass
+
+class CPU:
+    def __init__(self, image: bytes, offset: int = 0):
+        code = bytes(image[offset:offset + 0x10000])
+        self.code = code + b"\xFF" * (0x10000 - len(code))
+        self.xdata = bytearray(0x10000)
+        self.iram = bytearray(0x100)
+        self.sfr = bytearray(0x100)
+        self.sfr_read_hooks, self.sfr_write_hooks = {}, {}
+        self.xdata_read_hooks, self.xdata_write_hooks = {}, {}
+        self.breakpoints = set()
+        self.calls = set()                           # LCALL/ACALL targets seen (function starts)
+        self.counts = None                           # per-PC instruction counts when profiling
+        self.steps = 0
+        self.reset()
+        self.ops = _build_ops(self)
+
+    def reset(self):
+        self.pc = 0
+        self.iram[:] = bytes(0x100)
+        self.sfr[:] = bytes(0x100)
+        self.sfr[SP] = 0x07
+        for port in (0x80, 0x90, 0xA0, 0xB0):
+            self.sfr[port] = 0xFF
+
+    # --- register helpers ---
+    def reg(self, n: int) -> int:
+        return self.iram[(self.sfr[PSW] & 0x18) | n]
+
+    def set_reg(self, n: int, v: int):
+        self.iram[(self.sfr[PSW] & 0x18) | n] = v & 0xFF
+
+    @property
+    def dptr(self) -> int:
+        return (self.sfr[DPH] << 8) | self.sfr[DPL]
+
+    @dptr.setter
+    def dptr(self, v: int):
+        self.sfr[DPH], self.sfr[DPL] = (v >> 8) & 0xFF, v & 0xFF
+
+    def psw(self) -> int:
+        return (self.sfr[PSW] & 0xFE) | (bin(self.sfr[ACC]).count("1") & 1)
+
+    def hook_xdata(self, lo: int, hi: int, read=None, write=None):
+        """Install read/write hooks for XDATA [lo, hi]."""
+        for a in range(lo, hi + 1):
+            if read:  self.xdata_read_hooks[a] = read
+            if write: self.xdata_write_hooks[a] = write
+
+    def hook_sfr(self, addr: int, read=None, write=None):
+        if read:  self.sfr_read_hooks[addr] = read
+        if write: self.sfr_write_hooks[addr] = write
+
+    # --- execution ---
+    def run(self, max_steps: int = 1_000_000, stop_at: int = None) -> str:
+        """Execute until a breakpoint, `stop_at`, or max_steps. Returns the reason."""
+        code, ops, bps, counts = self.code, self.ops, self.breakpoints, self.counts
+        pc, n, reason = self.pc, 0, "steps"
+        try:
+            if not bps and stop_at is None and counts is None:
+                while n < max_steps:                 # fast path
+                    pc = ops[code[pc]](pc)
+                    n += 1
+            else:
+                stops = set(bps)
+                if stop_at is not None:
+                    stops.add(stop_at)
+                first = True
+                while n < max_steps:
+                    if pc in stops and not first:
+                        reason = "return" if pc == stop_at else "break"
+                        break
+                    first = False
+                    if counts is not None:
+                        counts[pc] += 1
+                    pc = ops[code[pc]](pc)
+                    n += 1
+                else:
+                    if pc in stops:
+                        reason = "return" if pc == stop_at else "break"
+        except Halt as e:
+            reason = str(e)
+        except IndexError:
+            reason = f"ran off the end of CODE at {pc:04X}"
+        finally:
+            self.pc = pc
+            self.steps += n
+        return reason
+
+    def call(self, addr: int, max_steps: int = 1_000_000) -> str:
+        """Run the routine at `addr` as if LCALLed; stops when it returns."""
+        sp = self.sfr[SP]
+        self.iram[(sp + 1) & 0xFF] = RETURN_SENTINEL & 0xFF
+        self.iram[(sp + 2) & 0xFF] = RETURN_SENTINEL >> 8
+        self.sfr[SP] = (sp + 2) & 0xFF
+        self.pc = addr
+        return self.run(max_steps, stop_at=RETURN_SENTINEL)
+
+    def state(self) -> str:
+        regs = " ".join(f"R{i}={self.reg(i):02X}" for i in range(8))
+        return (f"PC={self.pc:04X} A={self.sfr[ACC]:02X} B={self.sfr[B]:02X} PSW={self.psw():02X} "
+                f"SP={self.sfr[SP]:02X} DPTR={self.dptr:04X} {regs}")
+
+def _build_ops(cpu: CPU):
+    code, iram, sfr, xram = cpu.code, cpu.iram, cpu.sfr, cpu.xdata
+    rdh, wrh = cpu.sfr_read_hooks, cpu.sfr_write_hooks
+    xrh, xwh = cpu.xdata_read_hooks, cpu.xdata_write_hooks
+    ops = [None] * 256
+
+    # --- memory spaces ---
+    def rd(a):
+        if a < 0x80:
+            return iram[a]
+        if rdh and a in rdh:
+            return rdh[a](cpu, a) & 0xFF
+        return cpu.psw() if a == PSW else sfr[a]
+
+    def wr(a, v):
+        if a < 0x80:
+            iram[a] = v
+        else:
+            sfr[a] = v
+            if wrh and a in wrh:
+                wrh[a](cpu, a, v)
+
+    def xrd(a):
+        if xrh and a in xrh:
+            return xrh[a](cpu, a) & 0xFF
+        return xram[a]
+
+    def xwr(a, v):
+        xram[a] = v
+        if xwh and a in xwh:
+            xwh[a](cpu, a, v)
+
+    def bit_addr(b):
+        return (0x20 + (b >> 3), 1 << (b & 7)) if b < 0x80 else (b & 0xF8, 1 << (b & 7))
+
+    def rbit(b):
+        a, m = bit_addr(b)
+        return 1 if rd(a) & m else 0
+
+    def wbit(b, v):
+        a, m = bit_addr(b)
+        cur = iram[a] if a < 0x80 else sfr[a]
+        wr(a, (cur | m) if v else (cur & ~m & 0xFF))
+
+    def push(v):
+        sp = (sfr[SP] + 1) & 0xFF
+        sfr[SP] = sp; iram[sp] = v
+
+    def pop():
+        sp = sfr[SP]
+        sfr[SP] = (sp - 1) & 0xFF
+        return iram[sp]
+
+    def rel(pc, o):
+        return (pc + (o - 256 if o & 0x80 else o)) & 0xFFFF
+
+    def setc(c):
+        sfr[PSW] = (sfr[PSW] | CY) if c else (sfr[PSW] & 0x7F)
+
+    def add(v, c):
+        a = sfr[ACC]
+        r = a + v + c
+        psw = sfr[PSW] & 0x3B
+        if r > 0xFF: psw |= CY
+        if (a & 0xF) + (v & 0xF) + c > 0xF: psw |= AC
+        if (a ^ r) & (v ^ r) & 0x80: psw |= OV
+        sfr[ACC] = r & 0xFF; sfr[PSW] = psw
+
+    def subb(v):
+        a, c = sfr[ACC], 1 if sfr[PSW] & CY else 0
+        r = a - v - c
+        psw = sfr[PSW] & 0x3B
+        if r < 0: psw |= CY
+        if (a & 0xF) - (v & 0xF) - c < 0: psw |= AC
+        if (a ^ v) & (a ^ r) & 0x80: psw |= OV
+        sfr[ACC] = r & 0xFF; sfr[PSW] = psw
+
+    # --- operand accessors for the @R0,@R1,R0..R7 columns (low nibble 6..F) ---
+    def src(lo):
+        if lo < 8:
+            i = lo - 6
+            return lambda: iram[iram[(sfr[PSW] & 0x18) | i]]
+        n = lo - 8
+        return lambda: iram[(sfr[PSW] & 0x18) | n]
+
+    def dst(lo):
+        """IRAM index the operand refers to."""
+        if lo < 8:
+            i = lo - 6
+            return lambda: iram[(sfr[PSW] & 0x18) | i]
+        n = lo - 8
+        return lambda: (sfr[PSW] & 0x18) | n
+
+    def undefined(pc):
+        raise Halt(f"undefined opcode {code[pc]:02X} at {pc:04X}")
+
+    # --- 0x00-0x0F ---
+    def nop(pc): return pc + 1
+    ops[0x00] = nop
+    def ljmp(pc): return (code[pc + 1] << 8) | code[(pc + 2) & 0xFFFF]
+    ops[0x02] = ljmp
+    def rr_a(pc):
+        a = sfr[ACC]; sfr[ACC] = (a >> 1) | ((a & 1) << 7); return pc + 1
+    ops[0x03] = rr_a
+    def inc_a(pc): sfr[ACC] = (sfr[ACC] + 1) & 0xFF; return pc + 1
+    ops[0x04] = inc_a
+    def inc_dir(pc):
+        a = code[pc + 1]; wr(a, (rd(a) + 1) & 0xFF); return pc + 2
+    ops[0x05] = inc_dir
+    def lcall(pc):
+        ret = pc + 3
+        push(ret & 0xFF); push(ret >> 8)
+        t = (code[pc + 1] << 8) | code[pc + 2]
+        cpu.calls.add(t)
+        return t
+    ops[0x12] = lcall
+    def rrc_a(pc):
+        a = sfr[ACC]; c = sfr[PSW] & CY
+        setc(a & 1); sfr[ACC] = (a >> 1) | (0x80 if c else 0); return pc + 1
+    ops[0x13] = rrc_a
+    def dec_a(pc): sfr[ACC] = (sfr[ACC] - 1) & 0xFF; return pc + 1
+    ops[0x14] = dec_a
+    def dec_dir(pc):
+        a = code[pc + 1]; wr(a, (rd(a) - 1) & 0xFF); return pc + 2
+    ops[0x15] = dec_dir
+    def ret(pc):
+        hi = pop(); return (hi << 8) | pop()
+    ops[0x22] = ret
+    ops[0x32] = ret                                  # reti (no interrupt model)
+    def rl_a(pc):
+        a = sfr[ACC]; sfr[ACC] = ((a << 1) | (a >> 7)) & 0xFF; return pc + 1
+    ops[0x23] = rl_a
+    def rlc_a(pc):
+        a = sfr[ACC]; c = 1 if sfr[PSW] & CY else 0
+        setc(a & 0x80); sfr[ACC] = ((a << 1) | c) & 0xFF; return pc + 1
+    ops[0x33] = rlc_a
+
+    # ajmp/acall: opcode bits 7..5 are address bits 10..8
+    for op in range(0x01, 0x100, 0x20):
+        page = (op >> 5) << 8
+        def ajmp(pc, page=page): return ((pc + 2) & 0xF800) | page | code[pc + 1]
+        ops[op] = ajmp
+    for op in range(0x11, 0x100, 0x20):
+        page = (op >> 5) << 8
+        def acall(pc, page=page):
+            r = pc + 2
+            push(r & 0xFF); push(r >> 8)
+            t = (r & 0xF800) | page | code[pc + 1]
+            cpu.calls.add(t)
+            return t
+        ops[op] = acall
+
+    # --- conditional jumps on bits / accumulator ---
+    def jbc(pc):
+        b = code[pc + 1]
+        if rbit(b):
+            wbit(b, 0); return rel(pc + 3, code[pc + 2])
+        return pc + 3
+    ops[0x10] = jbc
+    def jb(pc): return rel(pc + 3, code[pc + 2]) if rbit(code[pc + 1]) else pc + 3
+    ops[0x20] = jb
+    def jnb(pc): return pc + 3 if rbit(code[pc + 1]) else rel(pc + 3, code[pc + 2])
+    ops[0x30] = jnb
+    def jc(pc): return rel(pc + 2, code[pc + 1]) if sfr[PSW] & CY else pc + 2
+    ops[0x40] = jc
+    def jnc(pc): return pc + 2 if sfr[PSW] & CY else rel(pc + 2, code[pc + 1])
+    ops[0x50] = jnc
+    def jz(pc): return pc + 2 if sfr[ACC] else rel(pc + 2, code[pc + 1])
+    ops[0x60] = jz
+    def jnz(pc): return rel(pc + 2, code[pc + 1]) if sfr[ACC] else pc + 2
+    ops[0x70] = jnz
+    def sjmp(pc): return rel(pc + 2, code[pc + 1])
+    ops[0x80] = sjmp
+    def jmp_a_dptr(pc): return (sfr[ACC] + ((sfr[DPH] << 8) | sfr[DPL])) & 0xFFFF
+    ops[0x73] = jmp_a_dptr
+
+    # --- arithmetic / logic with A ---
+    def alu(name):
+        if name == "add":   return lambda v: add(v, 0)
+        if name == "addc":  return lambda v: add(v, 1 if sfr[PSW] & CY else 0)
+        if name == "subb":  return subb
+        if name == "orl":
+            def f(v): sfr[ACC] |= v
+        elif name == "anl":
+            def f(v): sfr[ACC] &= v
+        elif name == "xrl":
+            def f(v): sfr[ACC] ^= v
+        else:
+            def f(v): sfr[ACC] = v
+        return f
+    for hi, name in ((0x2, "add"), (0x3, "addc"), (0x4, "orl"), (0x5, "anl"), (0x6, "xrl"), (0x9, "subb"), (0xE, "mov")):
+        f = alu(name)
+        if name != "mov":
+            def a_imm(pc, f=f): f(code[pc + 1]); return pc + 2
+            def a_dir(pc, f=f): f(rd(code[pc + 1])); return pc + 2
+            ops[(hi << 4) | 4], ops[(hi << 4) | 5] = a_imm, a_dir
+        for lo in range(6, 16):
+            def a_reg(pc, f=f, g=src(lo)): f(g()); return pc + 1
+            ops[(hi << 4) | lo] = a_reg
+    def mov_a_imm(pc): sfr[ACC] = code[pc + 1]; return pc + 2
+    ops[0x74] = mov_a_imm
+    def mov_a_dir(pc): sfr[ACC] = rd(code[pc + 1]); return pc + 2
+    ops[0xE5] = mov_a_dir
+
+    # orl/anl/xrl direct,A and direct,#imm
+    for hi, fn in ((0x4, lambda x, y: x | y), (0x5, lambda x, y: x & y), (0x6, lambda x, y: x ^ y)):
+        def d_a(pc, fn=fn):
+            a = code[pc + 1]; wr(a, fn(rd(a), sfr[ACC])); return pc + 2
+        def d_imm(pc, fn=fn):
+            a = code[pc + 1]; wr(a, fn(rd(a), code[pc + 2])); return pc + 3
+        ops[(hi << 4) | 2], ops[(hi << 4) | 3] = d_a, d_imm
+
+    # inc/dec @Ri, Rn
+    for lo in range(6, 16):
+        def inc_r(pc, d=dst(lo)):
+            i = d(); iram[i] = (iram[i] + 1) & 0xFF; return pc + 1
+        def dec_r(pc, d=dst(lo)):
+            i = d(); iram[i] = (iram[i] - 1) & 0xFF; return pc + 1
+        ops[0x00 | lo], ops[0x10 | lo] = inc_r, dec_r
+
+    # --- carry / bit ops ---
+    def orl_c_bit(pc):
+        if rbit(code[pc + 1]): setc(1)
+        return pc + 2
+    ops[0x72] = orl_c_bit
+    def anl_c_bit(pc):
+        if not rbit(code[pc + 1]): setc(0)
+        return pc + 2
+    ops[0x82] = anl_c_bit
+    def orl_c_nbit(pc):
+        if not rbit(code[pc + 1]): setc(1)
+        return pc + 2
+    ops[0xA0] = orl_c_nbit
+    def anl_c_nbit(pc):
+        if rbit(code[pc + 1]): setc(0)
+        return pc + 2
+    ops[0xB0] = anl_c_nbit
+    def mov_bit_c(pc): wbit(code[pc + 1], sfr[PSW] & CY); return pc + 2
+    ops[0x92] = mov_bit_c
+    def mov_c_bit(pc): setc(rbit(code[pc + 1])); return pc + 2
+    ops[0xA2] = mov_c_bit
+    def cpl_bit(pc):
+        b = code[pc + 1]; wbit(b, not rbit(b)); return pc + 2
+    ops[0xB2] = cpl_bit
+    def cpl_c(pc): sfr[PSW] ^= CY; return pc + 1
+    ops[0xB3] = cpl_c
+    def clr_bit(pc): wbit(code[pc + 1], 0); return pc + 2
+    ops[0xC2] = clr_bit
+    def clr_c(pc): sfr[PSW] &= 0x7F; return pc + 1
+    ops[0xC3] = clr_c
+    def setb_bit(pc): wbit(code[pc + 1], 1); return pc + 2
+    ops[0xD2] = setb_bit
+    def setb_c(pc): sfr[PSW] |= CY; return pc + 1
+    ops[0xD3] = setb_c
+
+    # --- moves ---
+    def mov_dir_imm(pc): wr(code[pc + 1], code[pc + 2]); return pc + 3
+    ops[0x75] = mov_dir_imm
+    def mov_dir_dir(pc): wr(code[pc + 2], rd(code[pc + 1])); return pc + 3
+    ops[0x85] = mov_dir_dir
+    def mov_dptr(pc): sfr[DPH], sfr[DPL] = code[pc + 1], code[pc + 2]; return pc + 3
+    ops[0x90] = mov_dptr
+    def mov_dir_a(pc): wr(code[pc + 1], sfr[ACC]); return pc + 2
+    ops[0xF5] = mov_dir_a
+    for lo in range(6, 16):
+        def mov_r_imm(pc, d=dst(lo)): iram[d()] = code[pc + 1]; return pc + 2
+        def mov_dir_r(pc, g=src(lo)): wr(code[pc + 1], g()); return pc + 2
+        def mov_r_dir(pc, d=dst(lo)): iram[d()] = rd(code[pc + 1]); return pc + 2
+        def mov_r_a(pc, d=dst(lo)): iram[d()] = sfr[ACC]; return pc + 1
+        def xch_r(pc, d=dst(lo)):
+            i = d(); iram[i], sfr[ACC] = sfr[ACC], iram[i]; return pc + 1
+        ops[0x70 | lo], ops[0x80 | lo], ops[0xA0 | lo] = mov_r_imm, mov_dir_r, mov_r_dir
+        ops[0xF0 | lo], ops[0xC0 | lo] = mov_r_a, xch_r
+        def cjne_r(pc, g=src(lo)):
+            v, k = g(), code[pc + 1]
+            setc(v < k)
+            return rel(pc + 3, code[pc + 2]) if v != k else pc + 3
+        ops[0xB0 | lo] = cjne_r
+    for i in range(2):
+        def xchd(pc, i=i):
+            p = iram[(sfr[PSW] & 0x18) | i]
+            a, m = sfr[ACC], iram[p]
+            sfr[ACC], iram[p] = (a & 0xF0) | (m & 0x0F), (m & 0xF0) | (a & 0x0F)
+            return pc + 1
+        ops[0xD6 + i] = xchd
+        def movx_a_ri(pc, i=i):
+            sfr[ACC] = xrd((sfr[P2] << 8) | iram[(sfr[PSW] & 0x18) | i]); return pc + 1
+        def movx_ri_a(pc, i=i):
+            xwr((sfr[P2] << 8) | iram[(sfr[PSW] & 0x18) | i], sfr[ACC]); return pc + 1
+        ops[0xE2 + i], ops[0xF2 + i] = movx_a_ri, movx_ri_a
+    for n in range(8):
+        def djnz_r(pc, n=n):
+            i = (sfr[PSW] & 0x18) | n
+            v = (iram[i] - 1) & 0xFF
+            iram[i] = v
+            return rel(pc + 2, code[pc + 1]) if v else pc + 2
+        ops[0xD8 + n] = djnz_r
+    def djnz_dir(pc):
+        a = code[pc + 1]; v = (rd(a) - 1) & 0xFF; wr(a, v)
+        return rel(pc + 3, code[pc + 2]) if v else pc + 3
+    ops[0xD5] = djnz_dir
+
+    # --- code / external memory ---
+    def movc_pc(pc): sfr[ACC] = code[(pc + 1 + sfr[ACC]) & 0xFFFF]; return pc + 1
+    ops[0x83] = movc_pc
+    def movc_dptr(pc): sfr[ACC] = code[(((sfr[DPH] << 8) | sfr[DPL]) + sfr[ACC]) & 0xFFFF]; return pc + 1
+    ops[0x93] = movc_dptr
+    def inc_dptr(pc):
+        d = (((sfr[DPH] << 8) | sfr[DPL]) + 1) & 0xFFFF
+        sfr[DPH], sfr[DPL] = d >> 8, d & 0xFF; return pc + 1
+    ops[0xA3] = inc_dptr
+    def movx_a_dptr(pc): sfr[ACC] = xrd((sfr[DPH] << 8) | sfr[DPL]); return pc + 1
+    ops[0xE0] = movx_a_dptr
+    def movx_dptr_a(pc): xwr((sfr[DPH] << 8) | sfr[DPL], sfr[ACC]); return pc + 1
+    ops[0xF0] = movx_dptr_a
+
+    # --- multiply / divide / misc accumulator ---
+    def div_ab(pc):
+        a, b = sfr[ACC], sfr[B]
+        psw = sfr[PSW] & 0x7B
+        if b == 0:
+            psw |= OV
+        else:
+            sfr[ACC], sfr[B] = a // b, a % b
+        sfr[PSW] = psw; return pc + 1
+    ops[0x84] = div_ab
+    def mul_ab(pc):
+        r = sfr[ACC] * sfr[B]
+        sfr[ACC], sfr[B] = r & 0xFF, r >> 8
+        sfr[PSW] = (sfr[PSW] & 0x7B) | (OV if r > 0xFF else 0); return pc + 1
+    ops[0xA4] = mul_ab
+    def cjne_a_imm(pc):
+        a, k = sfr[ACC], code[pc + 1]
+        setc(a < k)
+        return rel(pc + 3, code[pc + 2]) if a != k else pc + 3
+    ops[0xB4] = cjne_a_imm
+    def cjne_a_dir(pc):
+        a, k = sfr[ACC], rd(code[pc + 1])
+        setc(a < k)
+        return rel(pc + 3, code[pc + 2]) if a != k else pc + 3
+    ops[0xB5] = cjne_a_dir
+    def push_dir(pc): push(rd(code[pc + 1])); return pc + 2
+    ops[0xC0] = push_dir
+    def pop_dir(pc): wr(code[pc + 1], pop()); return pc + 2
+    ops[0xD0] = pop_dir
+    def swap_a(pc): a = sfr[ACC]; sfr[ACC] = ((a << 4) | (a >> 4)) & 0xFF; return pc + 1
+    ops[0xC4] = swap_a
+    def xch_dir(pc):
+        d = code[pc + 1]; v = rd(d); wr(d, sfr[ACC]); sfr[ACC] = v; return pc + 2
+    ops[0xC5] = xch_dir
+    def da_a(pc):
+        a, psw = sfr[ACC], sfr[PSW]
+        if (a & 0x0F) > 9 or psw & AC:
+            a += 0x06
+        if (a & 0x1F0) > 0x90 or psw & CY:
+            a += 0x60
+        if a > 0xFF:
+            psw |= CY
+        sfr[ACC], sfr[PSW] = a & 0xFF, psw; return pc + 1
+    ops[0xD4] = da_a
+    def clr_a(pc): sfr[ACC] = 0; return pc + 1
+    ops[0xE4] = clr_a
+    def cpl_a(pc): sfr[ACC] ^= 0xFF; return pc + 1
+    ops[0xF4] = cpl_a
+
+    ops[0xA5] = undefined
+    missing = [f"{i:02X}" for i, f in enumerate(ops) if f is None]
+    assert not missing, missing
+    return ops
+
+# ---------- profiling ----------
+
+def function_starts(cpu: CPU, symbols=None, offset: int = 0):
+    """Sorted function entry points: map publics if given, else LCALL/ACALL targets seen plus 0."""
+    if symbols is not None:
+        starts = {a - offset for a, _ in symbols.symbols() if offset <= a < offset + 0x10000}
+    else:
+        starts = set(cpu.calls)
+    starts.add(0)
+    return sorted(starts)
+
+def profile_report(cpu: CPU, symbols=None, offset: int = 0, top: int = 25):
+    starts = function_starts(cpu, symbols, offset)
+    per = {}
+    for pc in range(0x10000):
+        c = cpu.counts[pc]
+        if c:
+            f = starts[bisect_right(starts, pc) - 1]
+            per[f] = per.get(f, 0) + c
+    total = sum(per.values()) or 1
+    rows = sorted(per.items(), key=lambda kv: -kv[1])[:top]
+    for f, c in rows:
+        name = symbols.describe(f + offset) if symbols else f"code_{f:X}"
+        print(f"  {c:10d}  {100 * c / total:5.1f}%  {f:04X}  {name}")
+
+# ---------- CLI ----------
+
+def _assign(s):
+    k, _, v = s.partition("=")
+    if not v:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got '{s}'")
+    return k.upper(), int(v, 0)
+
+def _xassign(s):
+    k, _, v = s.partition("=")
+    if not v:
+        raise argparse.ArgumentTypeError(f"expected ADDR=VALUE, got '{s}'")
+    return int(k, 0), int(v, 0)
+
+def _apply_sets(cpu, sets):
+    for k, v in sets:
+        if k in ("A", "ACC"):
+            cpu.sfr[ACC] = v & 0xFF
+        elif k == "B":
+            cpu.sfr[B] = v & 0xFF
+        elif k == "DPTR":
+            cpu.dptr = v
+        elif k == "SP":
+            cpu.sfr[SP] = v & 0xFF
+        elif k == "PSW":
+            cpu.sfr[PSW] = v & 0xFF
+        elif len(k) == 2 and k[0] == "R" and k[1] in "01234567":
+            cpu.set_reg(int(k[1]), v)
+        else:
+            raise SystemExit(f"unknown register {k}")
+
+def cmd_run(args):
+    cpu = CPU(args.image.read_bytes(), args.offset)
+    for a, v in args.xdata:
+        cpu.xdata[a] = v & 0xFF
+    _apply_sets(cpu, args.set)
+    cpu.breakpoints.update(args.brk)
+    symbols = None
+    if args.map:
+        from snxfw_map import SymbolTable
+        symbols = SymbolTable.load(args.map)
+    if args.trace_xdata:
+        def tr(cpu_, a, v=None):
+            print(f"  xdata {'W' if v is not None else 'R'} {a:04X}" + (f" = {v:02X}" if v is not None else f" -> {cpu_.xdata[a]:02X}"))
+            return cpu_.xdata[a]
+        cpu.hook_xdata(0, 0xFFFF, read=tr, write=tr)
+    if args.profile:
+        cpu.counts = array("Q", bytes(8 * 0x10000))
+    t0 = time.perf_counter()
+    reason = cpu.call(args.call, args.max) if args.call is not None else cpu.run(args.max)
+    dt = time.perf_counter() - t0
+    print(f"[emu] {reason} after {cpu.steps} instructions in {dt:.2f} s ({cpu.steps / max(dt, 1e-9) / 1e6:.2f} MIPS)")
+    print(f"      {cpu.state()}")
+    if args.profile:
+        profile_report(cpu, symbols, args.offset)
+
+def cmd_bench(args):
+    cpu = CPU(args.image.read_bytes(), args.offset)
+    t0 = time.perf_counter()
+    cpu.run(args.steps)
+    dt = time.perf_counter() - t0
+    print(f"[emu] {cpu.steps} instructions from RESET in {dt:.2f} s: {cpu.steps / dt / 1e6:.2f} MIPS (PC now {cpu.pc:04X})")
+
+def main():
+    ap = argparse.ArgumentParser(description="8051 emulator for Sonix firmware images")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="run from RESET or call one routine")
+    r.add_argument("image", type=Path)
+    r.add_argument("--call", type=lambda x: int(x, 0), default=None, help="routine address to call (stops on return)")
+    r.add_argument("--set", type=_assign, nargs="+", default=[], help="registers before the call, e.g. R7=1 A=0x10 DPTR=0x0B75")
+    r.add_argument("--xdata", type=_xassign, nargs="+", default=[], help="XDATA bytes, e.g. 0x0B75=1")
+    r.add_argument("--break", dest="brk", type=lambda x: int(x, 0), action="append", default=[], help="breakpoint (repeatable)")
+    r.add_argument("--max", type=lambda x: int(float(x)), default=1_000_000, help="instruction limit")
+    r.add_argument("--trace-xdata", action="store_true", help="print every XDATA access")
+    r.add_argument("--profile", action="store_true", help="instruction counts per function")
+    r.add_argument("--map", type=Path, default=None, help="IDA .map for function names/boundaries")
+    r.set_defaults(func=cmd_run)
+    b = sub.add_parser("bench", help="raw interpreter speed from RESET")
+    b.add_argument("image", type=Path)
+    b.add_argument("--steps", type=lambda x: int(float(x)), default=2_000_000)
+    b.set_defaults(func=cmd_bench)
+    for p in (r, b):
+        p.add_argument("--offset", type=lambda x: int(x, 0), default=0, help="image offset of the 64 KiB code window")
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
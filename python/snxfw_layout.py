@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+snxfw_layout.py — SN9C292 flash layout: named regions, header/params decode, size probe
+
+Region table (from the C1 PRO dumps; offsets are flash addresses):
+  header  0x00000 +0x200    "SN9C292\\0" magic, pointer table, build tag at 0x154
+  code    0x00000 +0x10000  8051 CODE bank 0 (what IDA loads)
+  params  0x10000 +0x200    USB VID/PID/bcdDevice and string descriptors
+                            (product 0x40, manufacturer 0x80, serial 0xC0, interface 0x140)
+  tables  0x10200 +0x2E00   ISP/OSD tables (the OSD-disable patches land in 0x10B5C-0x11A2F)
+  init    0x13000 +0x1000   ASIC register init table
+  image   0x00000 +0x20000  the whole 128 KiB firmware image
+
+The flash size is not stored in the image and no JEDEC ID command is exposed
+by the XU set (sonix_xu_ctrls.c only has the FLASH_CTRL read), so it is
+detected by address wrap-around: SPI flash reads past the end of the chip
+alias back to 0, so the first power of two whose first bytes equal the
+header is the chip size. A JEDEC ID read with an external programmer can be
+passed in instead (capacity byte = log2 of the size).
+
+Usage (offline, on a dump)
+  python snxfw_layout.py "../camera info/firmware_backup_raw.bin"
+  python snxfw_layout.py dump.bin --region params --hex
+On the camera: python snxuvc_dump.py sf-info / sf-read --region params --out params.bin
+"""
+import argparse
+from pathlib import Path
+
+MAGIC = b"SN9C292\0"
+REGIONS = {
+    "header": (0x00000, 0x200,   "magic, pointer table, build tag"),
+    "code":   (0x00000, 0x10000, "8051 CODE bank 0"),
+    "params": (0x10000, 0x200,   "USB IDs and string descriptors"),
+    "tables": (0x10200, 0x2E00,  "ISP/OSD tables"),
+    "init":   (0x13000, 0x1000,  "ASIC register init table"),
+    "image":  (0x00000, 0x20000, "whole firmware image"),
+}
+IMAGE_SIZE = 0x20000
+BUILD_TAG = (0x154, 16)
+STRING_SLOTS = {"product": 0x40, "manufacturer": 0x80, "serial": 0xC0, "interface": 0x140}
+JEDEC_VENDORS = {0xEF: "Winbond", 0xC2: "Macronix", 0xC8: "GigaDevice", 0x1C: "EON", 0x20: "Micron/ST",
+                 0x9D: "ISSI", 0xBF: "SST", 0x01: "Spansion", 0x85: "Puya", 0x5E: "Zbit", 0x68: "Boya"}
+
+def region(name: str):
+    try:
+        start, length, _ = REGIONS[name]
+    except KeyError:
+        raise SystemExit(f"unknown region '{name}' (have: {', '.join(REGIONS)})")
+    return start, length
+
+def parse_header(hdr: bytes) -> dict:
+    """Chip magic and build tag from the first 0x200 bytes."""
+    out = {"valid": hdr[:8] == MAGIC, "chip": hdr[:8].rstrip(b"\0").decode("ascii", "replace")}
+    s, n = BUILD_TAG
+    if len(hdr) >= s + n:
+        tag = hdr[s:s + n]
+        out["build"] = "".join(chr(c) if 32 <= c < 127 else "." for c in tag)
+    return out
+
+def usb_string(desc: bytes) -> str:
+    """Decode a USB string descriptor (bLength, 0x03, UTF-16LE); '' if the slot is empty."""
+    if len(desc) < 2 or desc[1] != 0x03 or desc[0] < 2:
+        return ""
+    return desc[2:desc[0]].decode("utf-16le", "replace")
+
+def parse_params(blk: bytes) -> dict:
+    """USB identity from the params region (0x10000)."""
+    out = {"vid": int.from_bytes(blk[6:8], "big"), "pid": int.from_bytes(blk[8:10], "big"),
+           "bcd": int.from_bytes(blk[10:12], "big")}
+    for name, off in STRING_SLOTS.items():
+        out[name] = usb_string(blk[off:off + 0x40])
+    return out
+
+class ReadPastEnd(IOError):
+    """The bridge refused a flash read (short read / stall): the address is beyond the chip."""
+
+def detect_size(read, probe: int = 32, lo: int = IMAGE_SIZE, hi: int = 16 << 20):
+    """
+    Flash size by wrap-around, using read(addr, n) -> bytes. None if nothing aliases up to `hi`.
+    read() raises ReadPastEnd when an address is refused; any other error propagates, so a
+    transient USB failure cannot pass for the end of the chip.
+    """
+    ref = read(0, probe)
+    size = lo
+    while size <= hi:
+        try:
+            if read(size, probe) == ref:
+                return size
+        except ReadPastEnd:
+            return size
+        size <<= 1
+    return None
+
+def decode_jedec(jedec: bytes) -> dict:
+    mfr, typ, cap = jedec[0], jedec[1], jedec[2]
+    return {"vendor": JEDEC_VENDORS.get(mfr, f"0x{mfr:02X}"), "type": typ,
+            "size": (1 << cap) if 0x10 <= cap <= 0x20 else None}
+
+def describe(read, size: int = None) -> dict:
+    """Everything sf-info prints: header, params, size and the region table clipped to the chip."""
+    info = parse_header(read(*REGIONS["header"][:2]))
+    info.update(parse_params(read(*REGIONS["params"][:2])))
+    info["size"] = size if size is not None else detect_size(read)
+    return info
+
+def print_info(info: dict):
+    size = info.get("size")
+    print(f"chip     {info['chip']}{'' if info['valid'] else '  (bad magic)'}   build {info.get('build', '?')}")
+    print(f"usb      {info['vid']:04x}:{info['pid']:04x} bcd {info['bcd']:04x}")
+    for name in STRING_SLOTS:
+        print(f"{name:<12s} {info[name]!r}")
+    print(f"flash    {f'{size // 1024} KiB' if size else 'unknown (no wrap-around found)'}")
+    print("regions")
+    for name, (start, length, desc) in REGIONS.items():
+        if size and start >= size:
+            continue
+        print(f"  {name:<8s} 0x{start:06X} +0x{length:05X}  {desc}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Decode the SN9C292 flash layout of a dump")
+    ap.add_argument("image", type=Path)
+    ap.add_argument("--region", default=None, help="print one region instead of the summary")
+    ap.add_argument("--hex", action="store_true", help="hex dump of --region")
+    args = ap.parse_args()
+    data = args.image.read_bytes()
+    read = lambda a, n: data[a % len(data):a % len(data) + n]   # a file "wraps" at its own size
+    if args.region:
+        start, length = region(args.region)
+        blk = data[start:start + length]
+        if args.hex:
+            for i in range(0, len(blk), 16):
+                print(f"{start + i:06X}  {blk[i:i + 16].hex(' ')}")
+        else:
+            print(f"{args.region}: 0x{start:06X} +0x{length:X}, {len(blk)} bytes in dump")
+        return
+    print_info(describe(read))
+
+if __name__ == "__main__":
+    main()
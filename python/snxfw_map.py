@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+snxfw_map.py — symbol index over IDA / linker .map files
+
+Loads the segment list and "Publics by Value" of a .map (e.g.
+gpt5/firmware_backup.bin.map) into sorted, array-backed tables per segment:
+address → symbol+offset is a bisect (O(log n)), name → address a dict hit.
+Used by the disassembler, diff and patch reports to print names instead of
+raw addresses.
+
+Segments are addressed by number as in the map (0 = code, 2 = RAM, 3 = FSR
+for IDA's 8051 exports). Code addresses above 0xFFFF are the second bank.
+
+Usage
+  python snxfw_map.py lookup  ../gpt5/firmware_backup.bin.map 0xD90 0xB06B
+  python snxfw_map.py name    ../gpt5/firmware_backup.bin.map code_C84 RAM_24
+  python snxfw_map.py annotate ../gpt5/firmware_backup.bin.map report.txt   # '0x1234' → '0x1234 <code_1200+34>'
+  python snxfw_map.py segments ../gpt5/firmware_backup.bin.map
+"""
+import argparse, re, sys, time
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+SEG_LINE = re.compile(r"^\s*([0-9A-Fa-f]{4}):([0-9A-Fa-f]{8})\s+([0-9A-Fa-f]+)H\s+(\S+)\s*(\S*)")
+PUB_LINE = re.compile(r"^\s*([0-9A-Fa-f]{4}):([0-9A-Fa-f]{8})\s+(?:Abs\s+)?(\S+)\s*$")
+HEX_ADDR = re.compile(r"\b0x([0-9A-Fa-f]{3,8})\b")
+
+CODE = 0
+
+class SymbolTable:
+    def __init__(self):
+        self.segments = []           # (seg, start, length, name, class)
+        self._addr = {}              # seg -> array('I') of sorted addresses
+        self._name = {}              # seg -> [names] parallel to _addr
+        self.by_name = {}            # name -> (seg, addr)
+
+    @classmethod
+    def load(cls, path) -> "SymbolTable":
+        st = cls()
+        pubs, in_pubs = {}, False
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            for ln in f:
+                if "Publics by Value" in ln:
+                    in_pubs = True
+                    continue
+                if not in_pubs:
+                    m = SEG_LINE.match(ln)
+                    if m:
+                        st.segments.append((int(m.group(1), 16), int(m.group(2), 16), int(m.group(3), 16),
+                                            m.group(4), m.group(5)))
+                    continue
+                m = PUB_LINE.match(ln)
+                if m:
+                    pubs.setdefault(int(m.group(1), 16), []).append((int(m.group(2), 16), m.group(3)))
+        for seg, items in pubs.items():
+            st.add(seg, items)
+        return st
+
+    def add(self, seg: int, items):
+        """Merge (addr, name) pairs into segment `seg`."""
+        merged = sorted(list(zip(self._addr.get(seg, ()), self._name.get(seg, ()))) + list(items))
+        self._addr[seg] = array("I", (a for a, _ in merged))
+        self._name[seg] = [n for _, n in merged]
+        for a, n in merged:
+            self.by_name.setdefault(n, (seg, a))
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def lookup(self, addr: int, seg: int = CODE, max_offset: int = 0x10000):
+        """(name, offset) of the closest symbol at or below `addr`, or None."""
+        addrs = self._addr.get(seg)
+        if not addrs:
+            return None
+        i = bisect_right(addrs, addr) - 1
+        if i < 0 or addr - addrs[i] > max_offset:
+            return None
+        return self._name[seg][i], addr - addrs[i]
+
+    def lookup_many(self, addrs, seg: int = CODE, max_offset: int = 0x10000):
+        table, names = self._addr.get(seg, array("I")), self._name.get(seg, [])
+        out = []
+        for a in addrs:
+            i = bisect_right(table, a) - 1
+            out.append((names[i], a - table[i]) if i >= 0 and a - table[i] <= max_offset else None)
+        return out
+
+    def symbols(self, seg: int = CODE):
+        """(addr, name) pairs of one segment in address order."""
+        return zip(self._addr.get(seg, ()), self._name.get(seg, ()))
+
+    def address(self, name: str):
+        r = self.by_name.get(name)
+        return r[1] if r else None
+
+    def describe(self, addr: int, seg: int = CODE) -> str:
+        """'name+off' / 'name' / '' for report columns."""
+        r = self.lookup(addr, seg)
+        if r is None:
+            return ""
+        return r[0] if r[1] == 0 else f"{r[0]}+{r[1]:X}"
+
+    def annotate(self, text: str, seg: int = CODE) -> str:
+        """Append <symbol+off> after every 0x... address in `text`."""
+        def rep(m):
+            d = self.describe(int(m.group(1), 16), seg)
+            return f"{m.group(0)} <{d}>" if d else m.group(0)
+        return HEX_ADDR.sub(rep, text)
+
+def _int(s):
+    return int(s, 0)
+
+def main():
+    ap = argparse.ArgumentParser(description="Symbol lookups over IDA/linker .map files")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    lk = sub.add_parser("lookup", help="address → symbol+offset")
+    lk.add_argument("map", type=Path); lk.add_argument("addr", nargs="+", type=_int)
+    lk.add_argument("--seg", type=int, default=CODE)
+    nm = sub.add_parser("name", help="symbol → address")
+    nm.add_argument("map", type=Path); nm.add_argument("name", nargs="+")
+    an = sub.add_parser("annotate", help="annotate 0x addresses in a text report (stdin if no file)")
+    an.add_argument("map", type=Path); an.add_argument("file", nargs="?", type=Path)
+    an.add_argument("--seg", type=int, default=CODE)
+    sg = sub.add_parser("segments", help="list segments and symbol counts")
+    sg.add_argument("map", type=Path)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    st = SymbolTable.load(args.map)
+    t_load = time.perf_counter() - t0
+    if args.cmd == "lookup":
+        t0 = time.perf_counter()
+        res = st.lookup_many(args.addr, args.seg)
+        dt = time.perf_counter() - t0
+        for a, r in zip(args.addr, res):
+            print(f"0x{a:05X}  {r[0]}+0x{r[1]:X}" if r else f"0x{a:05X}  ?")
+        print(f"[{len(st)} symbols loaded in {t_load * 1000:.1f} ms, {len(res)} lookups in {dt * 1e6:.0f} µs]", file=sys.stderr)
+    elif args.cmd == "name":
+        for n in args.name:
+            r = st.by_name.get(n)
+            print(f"{n}  {r[0]:04X}:0x{r[1]:05X}" if r else f"{n}  ?")
+    elif args.cmd == "annotate":
+        text = args.file.read_text(encoding="utf-8", errors="ignore") if args.file else sys.stdin.read()
+        sys.stdout.write(st.annotate(text, args.seg))
+    elif args.cmd == "segments":
+        for seg, start, length, name, cls in st.segments:
+            print(f"{seg:04X}:{start:08X} len 0x{length:X}  {name:<8s} {cls:<6s} {len(st._addr.get(seg, ()))} symbols")
+
+if __name__ == "__main__":
+    main()
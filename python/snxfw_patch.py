@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+snxfw_patch.py — compact binary firmware patches with incremental CRC fix-up
+
+A .snxp file holds only the changed ranges (old and new bytes) of a firmware
+image, CRC32 + SHA-256 of the image before and after, and optional checksum
+"fix-ups": fields that must be recomputed after patching (CRC32 or additive
+sum over a span, stored little/big endian at a given offset). A fix-up whose
+field lies in another's span is stored, and so updated, before it; fix-ups
+that cover each other's fields are rejected at build time.
+
+Applying never rehashes the image. Every range's old bytes are checked in place
+first (that is the base verification, so a mismatch writes nothing), then the
+new bytes are written and every fix-up is updated from its current value with crc32_combine math (gpt5/
+crc32_combine_64_0.pdf): CRC is linear over GF(2), so
+
+    crc(new) = crc(old) ^ XOR_r shift(crc(d_r) ^ crc(0^len_r), span_end - end_r)
+
+with d_r = old_r ^ new_r and shift() = multiply by x^(8n) mod P via zlib's
+matrix squaring (O(log n)). Additive sums just add the byte differences.
+Cost per image is O(patch size); --full additionally checks the whole-image
+hashes.
+
+Layout (little endian)
+  header  : "SNXPATCH" u16 version u16 nranges u16 nfixups u16 0
+            u32 base_size u32 target_size u32 pre_crc32 u32 post_crc32
+            32 B pre_sha256  32 B post_sha256
+  range[] : u32 offset u32 len, old[len], new[len]
+  fixup[] : u8 kind (1 crc32, 2 sum8, 3 sum16, 4 sum32) u8 size u8 big_endian u8 0
+            u32 start u32 end u32 at                       (span [start, end), field at `at`)
+  trailer : u32 crc32 of everything before it
+
+Usage
+  python snxfw_patch.py build "../camera info/firmware_backup_raw.bin" "../gpt5/firmwares nukes/firmware_patched_disable_all_osd.bin" -o osd_off.snxp
+  python snxfw_patch.py build base.bin patched.bin -o p.snxp --fixup crc32:0x0:0x1FFFC@0x1FFFC --fixup sum16:0x10000:0x1FFFE@0x1FFFE:be
+  python snxfw_patch.py info osd_off.snxp
+  python snxfw_patch.py apply osd_off.snxp dumps/*.bin --out-dir patched/     # or --in-place
+  python snxfw_patch.py revert osd_off.snxp patched/cam17.bin --in-place
+"""
+import argparse, hashlib, io, os, shutil, struct, sys, time, zlib
+from pathlib import Path
+
+MAGIC = b"SNXPATCH"
+VERSION = 1
+HDR = struct.Struct("<8sHHHHIIII32s32s")
+RANGE = struct.Struct("<II")
+FIXUP = struct.Struct("<BBBxIII")
+
+FIX_CRC32, FIX_SUM8, FIX_SUM16, FIX_SUM32 = 1, 2, 3, 4
+FIX_NAMES = {"crc32": FIX_CRC32, "sum8": FIX_SUM8, "sum16": FIX_SUM16, "sum32": FIX_SUM32}
+FIX_SIZE = {FIX_CRC32: 4, FIX_SUM8: 1, FIX_SUM16: 2, FIX_SUM32: 4}
+
+# ---------- CRC32 algebra (zlib crc32_combine) ----------
+
+def _gf2_times(mat, vec):
+    s, i = 0, 0
+    while vec:
+        if vec & 1:
+            s ^= mat[i]
+        vec >>= 1; i += 1
+    return s
+
+def _gf2_square(mat):
+    return [_gf2_times(mat, m) for m in mat]
+
+# operator for one zero byte, then its squares: _ZEROS[k] appends 2^k zero bytes
+_odd = [0xEDB88320] + [1 << i for i in range(31)]
+_op = _gf2_square(_gf2_square(_gf2_square(_odd)))       # 8 zero bits
+_ZEROS = []
+for _ in range(32):
+    _ZEROS.append(_op)
+    _op = _gf2_square(_op)
+del _odd, _op
+
+def crc32_shift(crc: int, n: int) -> int:
+    """Advance a raw CRC register over n zero bytes in O(log n)."""
+    k = 0
+    while n:
+        if n & 1:
+            crc = _gf2_times(_ZEROS[k], crc)
+        n >>= 1; k += 1
+    return crc
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """crc32(A + B) from crc32(A), crc32(B) and len(B)."""
+    return crc32_shift(crc1, len2) ^ crc2
+
+def crc32_update(crc: int, span_end: int, deltas) -> int:
+    """New CRC32 of [start, span_end) after replacing (offset, old, new) chunks inside it."""
+    for off, old, new in deltas:
+        d = bytes(a ^ b for a, b in zip(old, new))
+        raw = zlib.crc32(d) ^ zlib.crc32(bytes(len(d)))   # conditioning cancels: linear part only
+        crc ^= crc32_shift(raw, span_end - off - len(d))
+    return crc
+
+# ---------- patch ----------
+
+def _field(img: bytes, fx) -> int:
+    kind, size, be, start, end, at = fx
+    return int.from_bytes(img[at:at + size], "big" if be else "little")
+
+def _checksum(img: bytes, fx) -> int:
+    """Full recomputation of a fix-up over its span (build-time sanity check only)."""
+    kind, size, be, start, end, at = fx
+    if kind == FIX_CRC32:
+        return zlib.crc32(img[start:end])
+    return sum(img[start:end]) % (1 << (8 * size))
+
+def _order(fixups):
+    """Fix-ups whose field lies inside another's span go first (a CRC over a sum field sees the new sum)."""
+    todo, out = list(fixups), []
+    while todo:
+        ready = [a for a in todo if not any(b is not a and a[3] <= b[5] and b[5] + b[1] <= a[4] for b in todo)]
+        if not ready:
+            raise ValueError("fix-ups cover each other's fields; no order updates them all: "
+                             + ", ".join(f"0x{a[3]:X}:0x{a[4]:X}@0x{a[5]:X}" for a in todo))
+        out += ready
+        todo = [a for a in todo if a not in ready]
+    return out
+
+def _split(ranges, cuts):
+    """Cut (start, end) ranges at fix-up span / field boundaries so none straddles one."""
+    for s, e in ranges:
+        for c in cuts:
+            if s < c < e:
+                yield s, c
+                s = c
+        yield s, e
+
+class Patch:
+    def __init__(self):
+        self.ranges = []          # (offset, old bytes, new bytes)
+        self.fixups = []          # (kind, size, big_endian, start, end, at)
+        self.base_size = self.target_size = 0
+        self.pre_crc = self.post_crc = 0
+        self.pre_sha = self.post_sha = b"\0" * 32
+
+    @property
+    def size(self) -> int:
+        return sum(len(n) for _, _, n in self.ranges)
+
+    # --- build ---
+    @classmethod
+    def build(cls, base: bytes, target: bytes, gap: int = 0, fixups=()) -> "Patch":
+        import numpy as np
+        from snxfw_diff import diff_ranges
+        if len(base) != len(target):
+            raise ValueError(f"image sizes differ ({len(base)} vs {len(target)}); patches are in-place only")
+        p = cls()
+        p.fixups = _order(fixups)
+        for fx in p.fixups:
+            if _field(base, fx) != _checksum(base, fx):
+                print(f"[patch] warning: fix-up field at 0x{fx[5]:X} does not hold the checksum of the base image",
+                      file=sys.stderr)
+        skip = bytearray(len(base))                     # fix-up fields are recomputed, not diffed
+        for kind, size, be, start, end, at in p.fixups:
+            skip[at:at + size] = b"\1" * size
+        a, b = np.frombuffer(base, np.uint8), np.frombuffer(target, np.uint8)
+        mask = np.frombuffer(bytes(skip), np.uint8).astype(bool)
+        b = np.where(mask, a, b)
+        cuts = sorted({c for _, size, _, start, end, at in p.fixups for c in (start, end, at, at + size)})
+        p.ranges = [(s, bytes(a[s:e]), bytes(b[s:e])) for s, e in _split(diff_ranges(a, b, gap), cuts)]
+        p.ranges = [r for r in p.ranges if r[1] != r[2]]          # pieces that only bridged a fix-up field
+        p.base_size = p.target_size = len(base)
+        p.pre_crc, p.pre_sha = zlib.crc32(base), hashlib.sha256(base).digest()
+        f = io.BytesIO(base)
+        p._apply(f)
+        post = f.getvalue()
+        for fx in p.fixups:
+            if _field(post, fx) != _checksum(post, fx):
+                raise ValueError(f"fix-up field at 0x{fx[5]:X} does not hold the checksum of the patched image")
+        p.post_crc, p.post_sha = zlib.crc32(post), hashlib.sha256(post).digest()
+        # the whole-image CRC must follow from the pre CRC by the same math used for fix-ups
+        assert crc32_update(p.pre_crc, len(base), p._all_deltas(io.BytesIO(base), io.BytesIO(post))) == p.post_crc
+        return p
+
+    def _all_deltas(self, pre, post):
+        out = [(o, old, new) for o, old, new in self.ranges]
+        for kind, size, be, start, end, at in self.fixups:
+            pre.seek(at); post.seek(at)
+            out.append((at, pre.read(size), post.read(size)))
+        return sorted(out)
+
+    # --- apply ---
+    def _check_spans(self):
+        """A change must lie wholly inside or outside every fix-up span; a straddling one cannot be folded in."""
+        spans = [(o, len(n)) for o, _, n in self.ranges]
+        for kind, size, be, start, end, at in self.fixups:
+            for o, n in spans:
+                if o < end and o + n > start and not (start <= o and o + n <= end):
+                    raise ValueError(f"change at 0x{o:X}+{n} crosses fix-up span [0x{start:X}, 0x{end:X})")
+            spans.append((at, size))
+
+    def _apply(self, f, reverse: bool = False):
+        """Check every range's old bytes first, then write; a mismatch leaves `f` untouched."""
+        self._check_spans()
+        deltas = []
+        for off, old, new in self.ranges:
+            want, put = (new, old) if reverse else (old, new)
+            f.seek(off)
+            cur = f.read(len(want))
+            if cur != want:
+                raise ValueError(f"base mismatch at 0x{off:X}: {cur.hex()} != {want.hex()}")
+            deltas.append((off, want, put))
+        for off, _, put in deltas:
+            f.seek(off); f.write(put)
+        for kind, size, be, start, end, at in self.fixups:
+            f.seek(at)
+            field = f.read(size)
+            val = int.from_bytes(field, "big" if be else "little")
+            inside = [(o - start, a, b) for o, a, b in deltas if start <= o and o + len(a) <= end]
+            if kind == FIX_CRC32:
+                val = crc32_update(val, end - start, inside)
+            else:
+                val = (val + sum(sum(b) - sum(a) for _, a, b in inside)) % (1 << (8 * size))
+            new = val.to_bytes(size, "big" if be else "little")
+            f.seek(at); f.write(new)
+            deltas.append((at, field, new))
+        return deltas
+
+    def apply_file(self, path, out=None, reverse: bool = False, full: bool = False):
+        """Patch `path` in place, or a copy at `out`. Only the patched spans are read and written."""
+        if out is not None and Path(out) != Path(path):
+            tmp = Path(out).with_name(Path(out).name + ".tmp")      # `out` appears only once fully patched
+            shutil.copyfile(path, tmp)
+            try:
+                self.apply_file(tmp, None, reverse, full)
+                os.replace(tmp, out)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            return
+        size = Path(path).stat().st_size
+        if size != self.base_size:
+            raise ValueError(f"{path}: size {size} != {self.base_size}")
+        if full:
+            self._check_full(path, self.post_sha if reverse else self.pre_sha)
+        with open(path, "r+b") as f:
+            self._apply(f, reverse)
+        if full:
+            self._check_full(path, self.pre_sha if reverse else self.post_sha)
+
+    @staticmethod
+    def _check_full(path, sha):
+        if hashlib.sha256(Path(path).read_bytes()).digest() != sha:
+            raise ValueError(f"{path}: SHA-256 does not match the patch")
+
+    # --- container ---
+    def dumps(self) -> bytes:
+        out = bytearray(HDR.pack(MAGIC, VERSION, len(self.ranges), len(self.fixups), 0,
+                                 self.base_size, self.target_size, self.pre_crc, self.post_crc,
+                                 self.pre_sha, self.post_sha))
+        for off, old, new in self.ranges:
+            out += RANGE.pack(off, len(new)) + old + new
+        for kind, size, be, start, end, at in self.fixups:
+            out += FIXUP.pack(kind, size, be, start, end, at)
+        out += struct.pack("<I", zlib.crc32(out))
+        return bytes(out)
+
+    @classmethod
+    def loads(cls, data: bytes) -> "Patch":
+        if data[:8] != MAGIC:
+            raise ValueError("not a .snxp patch")
+        if struct.unpack_from("<I", data, len(data) - 4)[0] != zlib.crc32(data[:-4]):
+            raise ValueError("patch file is corrupt (trailer CRC)")
+        p = cls()
+        (_, ver, nr, nf, _, p.base_size, p.target_size, p.pre_crc, p.post_crc,
+         p.pre_sha, p.post_sha) = HDR.unpack_from(data, 0)
+        if ver != VERSION:
+            raise ValueError(f"unsupported patch version {ver}")
+        pos = HDR.size
+        for _ in range(nr):
+            off, n = RANGE.unpack_from(data, pos); pos += RANGE.size
+            p.ranges.append((off, data[pos:pos + n], data[pos + n:pos + 2 * n])); pos += 2 * n
+        for _ in range(nf):
+            kind, size, be, start, end, at = FIXUP.unpack_from(data, pos); pos += FIXUP.size
+            p.fixups.append((kind, size, be, start, end, at))
+        return p
+
+    def save(self, path):
+        Path(path).write_bytes(self.dumps())
+
+    @classmethod
+    def load(cls, path) -> "Patch":
+        return cls.loads(Path(path).read_bytes())
+
+# ---------- CLI ----------
+
+def parse_fixup(s: str):
+    """kind:start:end@at[:be]  e.g. crc32:0:0x1FFFC@0x1FFFC, sum16:0x10000:0x1FFFE@0x1FFFE:be"""
+    try:
+        spec, rest = s.split("@")
+        kind, start, end = spec.split(":")
+        at, *opt = rest.split(":")
+        k = FIX_NAMES[kind.lower()]
+        return (k, FIX_SIZE[k], 1 if opt and opt[0].lower() == "be" else 0, int(start, 0), int(end, 0), int(at, 0))
+    except (ValueError, KeyError):
+        raise argparse.ArgumentTypeError(f"bad fix-up '{s}' (want kind:start:end@at[:be], kind in {'/'.join(FIX_NAMES)})")
+
+def cmd_build(args):
+    base, target = args.base.read_bytes(), args.target.read_bytes()
+    p = Patch.build(base, target, args.gap, args.fixup)
+    p.save(args.out)
+    print(f"[patch] {len(p.ranges)} ranges, {p.size} B changed, {len(p.fixups)} fix-ups → {args.out} "
+          f"({args.out.stat().st_size} B vs {len(target)} B image)")
+    print(f"        pre crc32 {p.pre_crc:08X}  post crc32 {p.post_crc:08X}")
+
+def cmd_info(args):
+    p = Patch.load(args.patch)
+    inv = {v: k for k, v in FIX_NAMES.items()}
+    print(f"image {p.base_size} B  pre crc32 {p.pre_crc:08X} sha256 {p.pre_sha.hex()[:16]}…"
+          f"  post crc32 {p.post_crc:08X} sha256 {p.post_sha.hex()[:16]}…")
+    for off, old, new in p.ranges:
+        print(f"  0x{off:05X}  {len(new):4d} B  {old.hex()[:32]} → {new.hex()[:32]}")
+    for kind, size, be, start, end, at in p.fixups:
+        print(f"  fix-up {inv[kind]} over 0x{start:X}-0x{end:X} at 0x{at:X} ({'BE' if be else 'LE'})")
+
+def _run(args, reverse):
+    p = Patch.load(args.patch)
+    if not args.in_place and not args.out_dir:
+        raise SystemExit("need --in-place or --out-dir")
+    if args.out_dir:
+        args.out_dir.mkdir(parents=True, exist_ok=True)
+    t0, ok = time.perf_counter(), 0
+    for img in args.images:
+        out = None if args.in_place else args.out_dir / img.name
+        try:
+            p.apply_file(img, out, reverse=reverse, full=args.full)
+            ok += 1
+        except ValueError as e:
+            print(f"[skip] {img}: {e}")
+    dt = time.perf_counter() - t0
+    print(f"[patch] {'reverted' if reverse else 'applied'} {ok}/{len(args.images)} images in {dt * 1000:.1f} ms")
+    if ok != len(args.images):
+        raise SystemExit(1)
+
+def main():
+    ap = argparse.ArgumentParser(description="Compact firmware patches with incremental CRC/checksum fix-up")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="diff two images into a .snxp patch")
+    b.add_argument("base", type=Path); b.add_argument("target", type=Path)
+    b.add_argument("-o", "--out", type=Path, required=True)
+    b.add_argument("--gap", type=int, default=0, help="merge ranges up to this many equal bytes apart")
+    b.add_argument("--fixup", type=parse_fixup, action="append", default=[],
+                   help="checksum field to maintain: kind:start:end@at[:be] (repeatable, applied in order)")
+    b.set_defaults(func=cmd_build)
+    i = sub.add_parser("info"); i.add_argument("patch", type=Path); i.set_defaults(func=cmd_info)
+    for name, rev in (("apply", False), ("revert", True)):
+        a = sub.add_parser(name, help=f"{name} a patch to one or more dumps")
+        a.add_argument("patch", type=Path); a.add_argument("images", nargs="+", type=Path)
+        a.add_argument("--in-place", action="store_true")
+        a.add_argument("--out-dir", type=Path, default=None)
+        a.add_argument("--full", action="store_true", help="also verify whole-image SHA-256 before/after")
+        a.set_defaults(func=lambda args, rev=rev: _run(args, rev))
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+snxfw_sample.py — stratified sampled verification plans against a golden image
+
+A full read-back over the XU flash channel costs seconds per camera, so the
+line verifies a sample instead. The image is cut into read chunks; some are
+always read (header, params, sectors that differ between firmware variants,
+checksum fields given with --must), the rest are split into n equal strata
+and one random chunk is read from each. Stratifying spreads the sample over
+the whole flash, so a contiguous defect of k chunks is caught with
+probability ~ k*n/N instead of leaving clusters unchecked.
+
+Detection probability is exact for the model "one contiguous defect of
+--defect bytes at a uniformly random position among the sampled chunks":
+  P = 1 - mean_p prod_i (1 - overlap(defect@p, stratum_i) / |stratum_i|)
+The sample size is the smallest n that reaches --confidence. The probability
+for a single bad chunk (a flipped byte) is reported too — it is much lower.
+
+Used by `snxuvc_dump.py verify --golden FILE --confidence X`; failures there
+escalate to a full read-back.
+
+Usage
+  python snxfw_sample.py plan "../camera info/firmware_backup_raw.bin" --confidence 0.99
+  python snxfw_sample.py plan golden.bin --confidence 0.999 --defect 0x1000 --variants ../firmware\\ samples/*.bin
+"""
+import argparse, random, time
+from pathlib import Path
+
+import numpy as np
+
+CHUNK = 512
+DEFECT = 0x1000                                   # one erase sector that failed to program
+
+def parse_span(s: str):
+    """'ADDR:LEN' -> (start, end)."""
+    a, _, n = s.partition(":")
+    if not n:
+        raise SystemExit(f"bad span '{s}' (want ADDR:LEN)")
+    a = int(a, 0)
+    return a, a + int(n, 0)
+
+def chunks_of(ranges, chunk: int = CHUNK, size: int = None):
+    """Chunk indices touched by [(start, end)] ranges."""
+    out = set()
+    for s, e in ranges:
+        if size is not None:
+            e = min(e, size)
+        out.update(range(s // chunk, -(-e // chunk)))
+    return out
+
+def variant_ranges(golden, variants, sector: int = 0x1000):
+    """Sectors that differ between the golden image and any of the variant images."""
+    from snxfw_diff import align, diff_ranges, load
+    g = np.frombuffer(golden, np.uint8) if isinstance(golden, (bytes, bytearray)) else golden
+    out = []
+    for v in variants:
+        out += align(diff_ranges(g, load(v)[:len(g)]), sector)
+    return out
+
+def detect_probability(pop: int, n: int, k: int) -> float:
+    """P(one of n stratified samples hits a contiguous k-chunk defect) over a population of pop chunks."""
+    if pop <= 0:
+        return 1.0
+    k = min(max(k, 1), pop)
+    if n >= pop:
+        return 1.0
+    bounds = [i * pop // n for i in range(n + 1)]
+    miss = np.ones(pop - k + 1)
+    for lo, hi in zip(bounds, bounds[1:]):
+        ps = np.arange(max(0, lo - k + 1), min(hi, pop - k + 1))
+        ov = np.minimum(hi, ps + k) - np.maximum(lo, ps)
+        miss[ps] *= 1.0 - ov / (hi - lo)
+    return float(1.0 - miss.mean())
+
+def sample_size(pop: int, k: int, confidence: float) -> int:
+    """Smallest stratum count reaching `confidence` for a k-chunk defect."""
+    lo, hi = 0, pop
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if mid and detect_probability(pop, mid, k) >= confidence:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+def plan(size: int, confidence: float, mandatory=(), chunk: int = CHUNK, defect: int = DEFECT, seed: int = None):
+    """(sorted chunk indices to read, info dict) for an image of `size` bytes."""
+    total = -(-size // chunk)
+    must = sorted(chunks_of(mandatory, chunk, size))
+    must_set = set(must)
+    pop = [c for c in range(total) if c not in must_set]
+    k = max(1, defect // chunk)
+    n = sample_size(len(pop), k, confidence)
+    rng = random.Random(seed)
+    bounds = [i * len(pop) // n for i in range(n + 1)] if n else [0]
+    picked = [pop[rng.randrange(lo, hi)] for lo, hi in zip(bounds, bounds[1:])]
+    info = {"chunks": total, "mandatory": len(must), "population": len(pop), "strata": n,
+            "p_defect": detect_probability(len(pop), n, k), "p_single": detect_probability(len(pop), n, 1),
+            "defect": defect, "chunk": chunk}
+    return sorted(must_set.union(picked)), info
+
+def spans(idx, chunk: int = CHUNK, size: int = None):
+    """Coalesce sorted chunk indices into (addr, length) reads."""
+    out = []
+    for c in idx:
+        a = c * chunk
+        n = chunk if size is None else min(chunk, size - a)
+        if out and out[-1][0] + out[-1][1] == a:
+            out[-1] = (out[-1][0], out[-1][1] + n)
+        else:
+            out.append((a, n))
+    return out
+
+def compare(golden: bytes, addr: int, data: bytes, ignore=()):
+    """[(start, end)] mismatches of data read at addr vs golden, outside the ignore ranges."""
+    g = np.frombuffer(golden, np.uint8)[addr:addr + len(data)]
+    d = np.frombuffer(data, np.uint8)
+    bad = g != d
+    for s, e in ignore:
+        bad[max(0, s - addr):max(0, e - addr)] = False
+    idx = np.flatnonzero(bad)
+    if not len(idx):
+        return []
+    brk = np.flatnonzero(np.diff(idx) > 1)
+    starts = idx[np.concatenate(([0], brk + 1))]
+    ends = idx[np.concatenate((brk, [len(idx) - 1]))] + 1
+    return [(addr + int(s), addr + int(e)) for s, e in zip(starts, ends)]
+
+def print_plan(info: dict, nread: int, size: int):
+    c = info["chunk"]
+    print(f"[sample] {info['mandatory']} mandatory + {info['strata']} stratified of {info['population']} chunks "
+          f"({c} B) → {nread} B of {size} B ({100 * nread / max(1, size):.1f}%)")
+    print(f"[sample] P(detect {info['defect']} B defect) = {info['p_defect']:.4f}, "
+          f"P(detect single bad chunk) = {info['p_single']:.4f}")
+
+# ---------- CLI ----------
+
+def cmd_plan(args):
+    golden = args.golden.read_bytes()
+    t0 = time.perf_counter()
+    mandatory = [tuple(r) for r in args.must] + variant_ranges(golden, args.variants)
+    if not args.no_layout:
+        from snxfw_layout import region
+        for name in ("header", "params"):
+            s, n = region(name); mandatory.append((s, s + n))
+    idx, info = plan(len(golden), args.confidence, mandatory, args.chunk, args.defect, args.seed)
+    dt = time.perf_counter() - t0
+    print_plan(info, sum(n for _, n in spans(idx, args.chunk, len(golden))), len(golden))
+    print(f"[sample] planned in {dt * 1000:.0f} ms")
+    if args.table:
+        k = max(1, args.defect // args.chunk)
+        for conf in (0.9, 0.95, 0.99, 0.999):
+            n = sample_size(info["population"], k, conf)
+            print(f"  confidence {conf:<6}  strata {n:5d}  ({100 * (info['mandatory'] + n) / info['chunks']:.1f}% read)")
+
+def main():
+    ap = argparse.ArgumentParser(description="Stratified sampling plans for golden-image verification")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("plan", help="sample size, read fraction and detection probability")
+    p.add_argument("golden", type=Path)
+    p.add_argument("--confidence", type=float, default=0.99)
+    p.add_argument("--defect", type=lambda x: int(x, 0), default=DEFECT, help="defect size the confidence applies to")
+    p.add_argument("--chunk", type=int, default=CHUNK)
+    p.add_argument("--variants", nargs="*", type=Path, default=[], help="other firmware images; differing sectors are always read")
+    p.add_argument("--must", action="append", type=parse_span, default=[], help="ADDR:LEN always read (checksum fields ...)")
+    p.add_argument("--no-layout", action="store_true", help="do not force the header/params regions")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--table", action="store_true", help="strata needed for a few confidence levels")
+    p.set_defaults(func=cmd_plan)
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+snxfw_sig.py — multi-signature byte-pattern search over firmware images
+
+Signatures are hex byte patterns with wildcards and masks:
+  E0        exact byte
+  ??        any byte
+  A? / ?3   nibble wildcard
+  11&1F     byte & mask == value (e.g. ACALL/AJMP opcodes with the page bits free)
+
+All signatures are searched at once: the longest exact run of each one is an
+anchor, the anchors go into one Aho-Corasick automaton (a full 256-way DFA,
+one table lookup per image byte), and the candidate positions of each
+signature are confirmed with a single vectorized NumPy mask check. A whole
+corpus is scanned in one pass per image. Offsets are code addresses, so
+--map names every hit (snxfw_map.py).
+
+`make` turns a known location in one firmware into a signature for the next
+version: it walks the instructions there and wildcards the parts that move
+between builds (LJMP/LCALL targets, AJMP/ACALL page bits; with --loose also
+16-bit immediates and relative jumps).
+
+Signature files: one `name: pattern` per line, '#' comments.
+
+Usage
+  python snxfw_sig.py make "../camera info/firmware_backup_raw.bin" 0x10B50 --len 24 --name osd_enable >> osd.sig
+  python snxfw_sig.py scan -f osd.sig ../firmware\\ samples ../gpt5/firmwares\\ nukes --map ../gpt5/firmware_backup.bin.map
+  python snxfw_sig.py scan -s "xu_dispatch: 90 ?? ?? E0 B4 01 ?? 12" dump.bin
+"""
+import argparse, re, sys, time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+# ---------- patterns ----------
+
+TOKEN = re.compile(r"^(?:([0-9A-Fa-f?]{2})|([0-9A-Fa-f]{2})&([0-9A-Fa-f]{2}))$")
+
+def parse_pattern(text: str):
+    """'E0 ?? 1?' -> (values bytes, masks bytes)."""
+    vals, masks = bytearray(), bytearray()
+    for tok in text.split():
+        m = TOKEN.match(tok)
+        if not m:
+            raise ValueError(f"bad signature token '{tok}'")
+        if m.group(1):
+            hi, lo = m.group(1)
+            mask = (0x00 if hi == "?" else 0xF0) | (0x00 if lo == "?" else 0x0F)
+            val = int(m.group(1).replace("?", "0"), 16) & mask
+        else:
+            mask = int(m.group(3), 16)
+            val = int(m.group(2), 16) & mask
+        vals.append(val); masks.append(mask)
+    if not any(masks):
+        raise ValueError(f"signature '{text}' has no fixed bits")
+    return bytes(vals), bytes(masks)
+
+def format_pattern(vals: bytes, masks: bytes) -> str:
+    out = []
+    for v, m in zip(vals, masks):
+        if m == 0xFF:
+            out.append(f"{v:02X}")
+        elif m == 0x00:
+            out.append("??")
+        elif m == 0xF0:
+            out.append(f"{v >> 4:X}?")
+        elif m == 0x0F:
+            out.append(f"?{v & 0xF:X}")
+        else:
+            out.append(f"{v:02X}&{m:02X}")
+    return " ".join(out)
+
+class Signature:
+    def __init__(self, name: str, pattern: str):
+        self.name, self.pattern = name, pattern
+        self.vals, self.masks = parse_pattern(pattern)
+        # anchor = longest run of exact bytes; none means every offset is a candidate
+        best, start = (0, 0), None
+        for i, m in enumerate(self.masks + b"\0"):
+            if m == 0xFF and start is None:
+                start = i
+            elif m != 0xFF and start is not None:
+                if i - start > best[1] - best[0]:
+                    best = (start, i)
+                start = None
+        self.anchor_off = best[0]
+        self.anchor = self.vals[best[0]:best[1]]
+        self._v = np.frombuffer(self.vals, np.uint8)
+        self._m = np.frombuffer(self.masks, np.uint8)
+
+    def __len__(self):
+        return len(self.vals)
+
+    def confirm(self, img: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        """Subset of candidate start offsets where the full masked pattern matches."""
+        starts = starts[(starts >= 0) & (starts + len(self) <= len(img))]
+        if not len(starts):
+            return starts
+        win = img[starts[:, None] + np.arange(len(self))]
+        return starts[((win & self._m) == self._v).all(axis=1)]
+
+def load_signatures(files=(), inline=()):
+    sigs = []
+    for f in files:
+        for n, ln in enumerate(Path(f).read_text(encoding="utf-8").splitlines(), 1):
+            ln = ln.split("#", 1)[0].strip()
+            if ln:
+                name, _, pat = ln.partition(":")
+                if not pat:
+                    raise SystemExit(f"{f}:{n}: expected 'name: pattern'")
+                sigs.append(Signature(name.strip(), pat.strip()))
+    for s in inline:
+        name, _, pat = s.partition(":")
+        sigs.append(Signature(name.strip(), pat.strip()) if pat else Signature(f"sig{len(sigs)}", name))
+    return sigs
+
+# ---------- Aho-Corasick ----------
+
+class AhoCorasick:
+    """Byte-level Aho-Corasick compiled to a dense DFA: delta[state][byte] -> state."""
+    def __init__(self, words):
+        goto, out = [{}], [[]]
+        for wi, w in enumerate(words):
+            s = 0
+            for b in w:
+                if b not in goto[s]:
+                    goto.append({}); out.append([])
+                    goto[s][b] = len(goto) - 1
+                s = goto[s][b]
+            out[s].append(wi)
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = [goto[0].get(b, 0) for b in range(256)]
+        q = deque(goto[0].values())
+        while q:
+            s = q.popleft()
+            f = fail[s]
+            out[s] = out[s] + out[f]
+            row = list(delta[f])
+            for b, t in goto[s].items():
+                row[b] = t
+                fail[t] = delta[f][b]
+                q.append(t)
+            delta[s] = row
+        self.delta = delta
+        self.out = [tuple(o) for o in out]
+        self.lens = [len(w) for w in words]
+
+    def scan(self, data: bytes):
+        """{word index: [end offsets]} for every occurrence."""
+        hits, delta, out, s = {}, self.delta, self.out, 0
+        for i, b in enumerate(data):
+            s = delta[s][b]
+            if out[s]:
+                for wi in out[s]:
+                    hits.setdefault(wi, []).append(i + 1)
+        return hits
+
+# ---------- search ----------
+
+class Searcher:
+    def __init__(self, sigs):
+        self.sigs = sigs
+        self.words, self.word_of = [], []
+        index = {}
+        for s in sigs:
+            if s.anchor:
+                index.setdefault(s.anchor, len(index))
+                self.word_of.append(index[s.anchor])
+            else:
+                self.word_of.append(None)
+        self.words = list(index)
+        self.ac = AhoCorasick(self.words)
+
+    def search(self, data: bytes):
+        """[(offset, signature)] sorted by offset."""
+        img = np.frombuffer(data, np.uint8)
+        ends = {wi: np.asarray(v, dtype=np.int64) for wi, v in self.ac.scan(data).items()}
+        hits = []
+        for s, wi in zip(self.sigs, self.word_of):
+            if wi is None:
+                cand = np.arange(len(img) - len(s) + 1, dtype=np.int64)
+            elif wi in ends:
+                cand = ends[wi] - len(self.words[wi]) - s.anchor_off
+            else:
+                continue
+            hits.extend((int(o), s) for o in s.confirm(img, cand))
+        hits.sort(key=lambda h: h[0])
+        return hits
+
+def make_signature(image: bytes, addr: int, length: int, loose: bool = False) -> str:
+    """Pattern for `length`+ bytes of code at `addr`, with build-specific operands wildcarded."""
+    from snxfw_dis import LENGTH, OPS
+    vals, masks = bytearray(), bytearray()
+    pc = addr
+    while pc - addr < length and pc < len(image):
+        op = image[pc]
+        n = min(LENGTH[op], len(image) - pc)
+        v, m = bytearray(image[pc:pc + n]), bytearray(b"\xFF" * n)
+        for kind, p in OPS[op]:
+            if p >= n:
+                continue
+            if kind == "a16" or (loose and kind == "#16"):
+                m[p:p + 2] = b"\0\0"
+            elif kind == "a11":
+                m[0] = 0x1F; m[p] = 0
+            elif loose and kind == "rel":
+                m[p] = 0
+        vals += bytes(a & b for a, b in zip(v, m)); masks += m
+        pc += n
+    return format_pattern(bytes(vals), bytes(masks))
+
+# ---------- CLI ----------
+
+def _images(paths, pattern):
+    for p in paths:
+        if p.is_dir():
+            yield from sorted(p.rglob(pattern))
+        else:
+            yield p
+
+def cmd_scan(args):
+    sigs = load_signatures(args.file, args.sig)
+    if not sigs:
+        raise SystemExit("no signatures (use -f FILE or -s PATTERN)")
+    symbols = None
+    if args.map:
+        from snxfw_map import SymbolTable
+        symbols = SymbolTable.load(args.map)
+    t0 = time.perf_counter()
+    srch = Searcher(sigs)
+    n_img = n_bytes = n_hits = 0
+    found = set()
+    for img in _images(args.paths, args.glob):
+        data = img.read_bytes()
+        n_img += 1; n_bytes += len(data)
+        for off, s in srch.search(data):
+            n_hits += 1; found.add(s.name)
+            sym = symbols.describe(off) if symbols else ""
+            print(f"{img}\t0x{off:05X}\t{s.name}" + (f"\t{sym}" if sym else ""))
+    dt = time.perf_counter() - t0
+    missing = [s.name for s in sigs if s.name not in found]
+    print(f"[sig] {len(sigs)} signatures, {n_img} images, {n_bytes} B, {n_hits} hits in {dt * 1000:.0f} ms"
+          + (f"; no hit: {', '.join(missing)}" if missing else ""), file=sys.stderr)
+
+def cmd_make(args):
+    data = args.image.read_bytes()
+    pat = make_signature(data, args.addr, args.len, args.loose)
+    print(f"{args.name or f'sig_{args.addr:X}'}: {pat}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Multi-signature search across firmware images")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("scan", help="search images/directories for signatures")
+    s.add_argument("paths", nargs="+", type=Path)
+    s.add_argument("-f", "--file", action="append", default=[], help="signature file (name: pattern per line)")
+    s.add_argument("-s", "--sig", action="append", default=[], help="inline 'name: pattern' (repeatable)")
+    s.add_argument("--glob", default="*.bin", help="file pattern inside directories")
+    s.add_argument("--map", type=Path, default=None, help="IDA .map to name hits")
+    s.set_defaults(func=cmd_scan)
+    m = sub.add_parser("make", help="signature from code at a known address")
+    m.add_argument("image", type=Path)
+    m.add_argument("addr", type=lambda x: int(x, 0))
+    m.add_argument("--len", type=int, default=16, help="minimum bytes to cover (whole instructions)")
+    m.add_argument("--name", default=None)
+    m.add_argument("--loose", action="store_true", help="also wildcard 16-bit immediates and relative jumps")
+    m.set_defaults(func=cmd_make)
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+snxfw_sparse.py — sparse, compressed container for SPI flash dumps (.snxd)
+
+Most of a Sonix flash is 0xFF erased space or constant padding. The writer
+takes the dump as a byte stream (e.g. straight from `snxuvc_dump.py sf-read
+--sparse`), cuts it into fixed blocks, stores runs of constant blocks as a
+single descriptor (fill byte + block count) and compresses every other block
+on its own. A block index at the end of the file lets any address range be
+read by decompressing only the blocks it touches; `export` rebuilds the flat
+.bin.
+
+Layout (little endian)
+  header : "SNXSPRS1" u16 version u16 codec (0 raw, 1 zlib, 2 lzma) u32 block_size u32 base_addr
+  blocks : compressed data blocks, back to back
+  index  : entry[] = u32 first_block u32 nblocks u8 kind (0 fill, 1 data) u8 fill u16 0
+                     u64 file_off u32 stored_len u32 crc32 (of the uncompressed block)
+  footer : u64 index_off u32 entries u32 0 u64 total_len u32 crc32 (whole image) "SNXSEND!"
+
+Usage
+  python snxuvc_dump.py sf-read --addr 0 --length 0x20000 --out cam.snxd --sparse
+  python snxfw_sparse.py pack "../camera info/firmware_backup_raw.bin" -o cam.snxd
+  python snxfw_sparse.py info cam.snxd
+  python snxfw_sparse.py read cam.snxd 0x10B50 32
+  python snxfw_sparse.py export cam.snxd -o cam.bin
+"""
+import argparse, lzma, struct, time, zlib
+from bisect import bisect_right
+from pathlib import Path
+
+MAGIC, END = b"SNXSPRS1", b"SNXSEND!"
+VERSION = 1
+HDR = struct.Struct("<8sHHII")
+ENTRY = struct.Struct("<IIBBxxQII")
+FOOTER = struct.Struct("<QIIQI8s")
+BLOCK = 0x1000
+
+RAW, ZLIB, LZMA = 0, 1, 2
+CODECS = {"raw": RAW, "zlib": ZLIB, "lzma": LZMA}
+FILL, DATA = 0, 1
+
+def _compress(codec, data):
+    if codec == ZLIB:
+        return zlib.compress(data, 9)
+    if codec == LZMA:
+        return lzma.compress(data, preset=6)
+    return data
+
+def _decompress(codec, data):
+    if codec == ZLIB:
+        return zlib.decompress(data)
+    if codec == LZMA:
+        return lzma.decompress(data)
+    return data
+
+class SparseWriter:
+    """File-like sink: write() any amount, close() writes the index and footer."""
+    def __init__(self, path, base_addr: int = 0, block: int = BLOCK, codec: str = "zlib"):
+        self.f = open(path, "wb")
+        self.block, self.base, self.codec = block, base_addr, CODECS[codec]
+        self.f.write(HDR.pack(MAGIC, VERSION, self.codec, block, base_addr))
+        self.buf = bytearray()
+        self.entries = []                 # [first_block, nblocks, kind, fill, off, stored_len, crc]
+        self.nblocks = self.total = 0
+        self.crc = 0
+
+    def write(self, data):
+        self.buf += data
+        self.total += len(data)
+        self.crc = zlib.crc32(data, self.crc)
+        while len(self.buf) >= self.block:
+            self._emit(bytes(self.buf[:self.block]))
+            del self.buf[:self.block]
+        return len(data)
+
+    def _emit(self, blk):
+        if blk.count(blk[0]) == len(blk):
+            last = self.entries[-1] if self.entries else None
+            if last and last[2] == FILL and last[3] == blk[0] and len(blk) == self.block:
+                last[1] += 1
+            else:
+                self.entries.append([self.nblocks, 1, FILL, blk[0], 0, 0, 0])
+        else:
+            z = _compress(self.codec, blk)
+            off = self.f.tell()
+            self.f.write(z)
+            self.entries.append([self.nblocks, 1, DATA, 0, off, len(z), zlib.crc32(blk)])
+        self.nblocks += 1
+
+    def close(self):
+        if self.f.closed:
+            return
+        if self.buf:
+            self._emit(bytes(self.buf))       # short tail block
+            self.buf.clear()
+        idx = self.f.tell()
+        for e in self.entries:
+            self.f.write(ENTRY.pack(*e))
+        self.f.write(FOOTER.pack(idx, len(self.entries), 0, self.total, self.crc, END))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:                                     # no footer: readers see a truncated container, not a short image
+            self.f.close()
+
+class SparseReader:
+    def __init__(self, path):
+        self.f = open(path, "rb")
+        magic, ver, self.codec, self.block, self.base = HDR.unpack(self.f.read(HDR.size))
+        if magic != MAGIC or ver != VERSION:
+            self.f.close()
+            raise IOError(f"{path}: not a .snxd container (magic={magic!r} ver={ver})")
+        end = None
+        if self.f.seek(0, 2) >= HDR.size + FOOTER.size:
+            self.f.seek(-FOOTER.size, 2)
+            idx, n, _, self.total, self.crc, end = FOOTER.unpack(self.f.read(FOOTER.size))
+        if end != END:
+            self.f.close()
+            raise IOError(f"{path}: truncated container (no footer)")
+        self.f.seek(idx)
+        raw = self.f.read(n * ENTRY.size)
+        self.entries = [ENTRY.unpack_from(raw, i * ENTRY.size) for i in range(n)]
+        self.firsts = [e[0] for e in self.entries]
+        self._cache = {}
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _block(self, b: int) -> bytes:
+        """Uncompressed block number b."""
+        e = self.entries[bisect_right(self.firsts, b) - 1]
+        first, nb, kind, fill, off, slen, crc = e
+        size = min(self.block, self.total - b * self.block)
+        if kind == FILL:
+            return bytes([fill]) * size
+        blk = self._cache.get(b)
+        if blk is None:
+            self.f.seek(off)
+            blk = _decompress(self.codec, self.f.read(slen))
+            if zlib.crc32(blk) != crc:
+                raise IOError(f"block {b} (0x{self.base + b * self.block:06X}) fails its CRC")
+            if len(self._cache) > 64:
+                self._cache.clear()
+            self._cache[b] = blk
+        return blk
+
+    def read(self, addr: int, length: int) -> bytes:
+        """Bytes of the flash at [addr, addr+length) (flash addresses, base_addr included)."""
+        lo, hi = addr - self.base, min(addr - self.base + length, self.total)
+        if lo < 0 or lo >= self.total:
+            raise ValueError(f"0x{addr:X} outside the dump (0x{self.base:X}..0x{self.base + self.total:X})")
+        out = bytearray()
+        for b in range(lo // self.block, (hi - 1) // self.block + 1):
+            blk = self._block(b)
+            s = max(lo - b * self.block, 0)
+            out += blk[s:hi - b * self.block]
+        return bytes(out)
+
+    def chunks(self):
+        """Whole image, block by block (fill runs are produced without touching the file)."""
+        for b in range((self.total + self.block - 1) // self.block):
+            yield self._block(b)
+
+    def export(self, out) -> int:
+        crc = 0
+        with open(out, "wb") as f:
+            for blk in self.chunks():
+                f.write(blk)
+                crc = zlib.crc32(blk, crc)
+        if crc != self.crc:
+            raise IOError("exported image does not match the container CRC")
+        return self.total
+
+def is_sparse(path) -> bool:
+    with open(path, "rb") as f:
+        return f.read(8) == MAGIC
+
+# ---------- CLI ----------
+
+def cmd_pack(args):
+    t0 = time.perf_counter()
+    with open(args.image, "rb") as src, SparseWriter(args.out, args.base, args.block, args.codec) as w:
+        for blk in iter(lambda: src.read(65536), b""):
+            w.write(blk)
+    dt = time.perf_counter() - t0
+    n_in, n_out = args.image.stat().st_size, args.out.stat().st_size
+    print(f"[sparse] {n_in} B → {n_out} B ({100 * n_out / max(1, n_in):.1f}%) in {dt * 1000:.0f} ms → {args.out}")
+
+def cmd_info(args):
+    with SparseReader(args.file) as r:
+        fills = sum(e[1] for e in r.entries if e[2] == FILL)
+        data = [e for e in r.entries if e[2] == DATA]
+        codec = {v: k for k, v in CODECS.items()}[r.codec]
+        print(f"base 0x{r.base:06X}  {r.total} B  block {r.block}  codec {codec}  crc32 {r.crc:08X}")
+        print(f"{fills} fill blocks in {len(r.entries) - len(data)} runs, {len(data)} data blocks "
+              f"({sum(e[5] for e in data)} B stored)")
+        if args.verbose:
+            for first, nb, kind, fill, off, slen, crc in r.entries:
+                a = r.base + first * r.block
+                desc = f"fill 0x{fill:02X} x{nb}" if kind == FILL else f"data {slen} B @ {off}"
+                print(f"  0x{a:06X}  {desc}")
+
+def cmd_read(args):
+    with SparseReader(args.file) as r:
+        data = r.read(args.addr, args.length)
+    if args.out:
+        args.out.write_bytes(data)
+        return
+    for i in range(0, len(data), 16):
+        print(f"{args.addr + i:06X}  {data[i:i + 16].hex(' ')}")
+
+def cmd_export(args):
+    with SparseReader(args.file) as r:
+        n = r.export(args.out)
+    print(f"[sparse] {n} B → {args.out}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Sparse compressed container for SPI flash dumps")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="flat .bin → .snxd")
+    p.add_argument("image", type=Path); p.add_argument("-o", "--out", type=Path, required=True)
+    p.add_argument("--base", type=lambda x: int(x, 0), default=0, help="flash address of the first byte")
+    p.add_argument("--block", type=lambda x: int(x, 0), default=BLOCK)
+    p.add_argument("--codec", choices=sorted(CODECS), default="zlib")
+    p.set_defaults(func=cmd_pack)
+    i = sub.add_parser("info"); i.add_argument("file", type=Path); i.add_argument("-v", "--verbose", action="store_true")
+    i.set_defaults(func=cmd_info)
+    r = sub.add_parser("read", help="random-access read of an address range")
+    r.add_argument("file", type=Path)
+    r.add_argument("addr", type=lambda x: int(x, 0)); r.add_argument("length", type=lambda x: int(x, 0))
+    r.add_argument("-o", "--out", type=Path, default=None)
+    r.set_defaults(func=cmd_read)
+    e = sub.add_parser("export", help=".snxd → flat .bin")
+    e.add_argument("file", type=Path); e.add_argument("-o", "--out", type=Path, required=True)
+    e.set_defaults(func=cmd_export)
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
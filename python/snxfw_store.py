@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+snxfw_store.py — content-addressed, deduplicating store for fleet firmware dumps
+
+Every dump is cut into chunks (fixed 4 KiB = one erase sector, or
+content-defined with a gear rolling hash so an inserted byte does not shift
+every later chunk). Each distinct chunk is appended once to chunks.pack and
+addressed by its BLAKE2b-128 digest; a dump is just the list of its chunk
+ids (a "recipe"). Identical dumps share one recipe, so a line of cameras
+that differ only in the serial/parameter sectors costs one full image plus
+one sector per unit.
+
+Dumps are indexed in store.db (sqlite) by device identity, serial and time.
+Reconstruction slices a read-only mmap of the pack — no per-chunk files.
+An ingest holds the database write lock (BEGIN IMMEDIATE) from the recipe
+lookup through the pack append to the commit, so concurrent ingests into
+one store serialize instead of both appending at the same pack offset.
+
+Layout of a store directory
+  store.db     : chunks(id, digest, off, len), recipes(id, sha256, size, chunker, ids),
+                 dumps(id, device, serial, time, recipe, source)
+  chunks.pack  : chunk bytes, append-only
+
+Usage
+  python snxfw_store.py ingest dumps/*.bin --store fleet --device C1PRO --serial-from-name
+  python snxfw_store.py ingest cam.bin --store fleet --device 0c45:6366 --serial SN0042 --chunker cdc
+  python snxfw_store.py list --store fleet --device C1PRO --since 2025-08-01
+  python snxfw_store.py get --store fleet --serial SN0042 -o cam.bin          # latest dump of that unit
+  python snxfw_store.py get --store fleet --id 17 -o cam17.bin
+  python snxfw_store.py stats --store fleet
+"""
+import argparse, hashlib, mmap, sqlite3, time
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+FIXED = 0x1000
+
+# content-defined chunking: gear hash, cut when the top bits are zero
+CDC_MIN, CDC_AVG, CDC_MAX = 1024, 4096, 16384
+_GEAR = [int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=4).digest(), "little") for i in range(256)]
+_CDC_MASK = (CDC_AVG - 1) << (32 - (CDC_AVG.bit_length() - 1))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, digest BLOB UNIQUE, off INTEGER, len INTEGER);
+CREATE TABLE IF NOT EXISTS recipes (id INTEGER PRIMARY KEY, sha256 TEXT UNIQUE, size INTEGER, chunker TEXT, ids BLOB);
+CREATE TABLE IF NOT EXISTS dumps (id INTEGER PRIMARY KEY, device TEXT, serial TEXT, time REAL, recipe INTEGER, source TEXT);
+CREATE INDEX IF NOT EXISTS dumps_device ON dumps(device, time);
+CREATE INDEX IF NOT EXISTS dumps_serial ON dumps(serial, time);
+"""
+
+def chunks_fixed(data: bytes, size: int = FIXED):
+    return [(o, min(o + size, len(data))) for o in range(0, len(data), size)]
+
+def chunks_cdc(data: bytes):
+    out, start, n = [], 0, len(data)
+    while start < n:
+        end = min(start + CDC_MAX, n)
+        h, i = 0, min(start + CDC_MIN, n)
+        while i < end:
+            h = ((h << 1) + _GEAR[data[i]]) & 0xFFFFFFFF
+            i += 1
+            if not h & _CDC_MASK:
+                break
+        out.append((start, i))
+        start = i
+    return out
+
+CHUNKERS = {"fixed": chunks_fixed, "cdc": chunks_cdc}
+
+class Store:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.root / "store.db", timeout=60)
+        self.db.executescript(SCHEMA)
+        self.pack_path = self.root / "chunks.pack"
+        self.pack_path.touch()
+        self._map = None
+        self._known = None
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self.db.close()
+
+    def _digests(self) -> dict:
+        """digest -> chunk id, topped up with chunks other processes added since the last call."""
+        if self._known is None:
+            self._known, self._known_max = {}, 0
+        for i, d in self.db.execute("SELECT id, digest FROM chunks WHERE id > ?", (self._known_max,)):
+            self._known[bytes(d)] = i
+            self._known_max = max(self._known_max, i)
+        return self._known
+
+    # --- ingest ---
+    def add(self, data: bytes, device: str = "", serial: str = "", when: float = None,
+            chunker: str = "fixed", source: str = "") -> tuple:
+        """Store one dump; returns (dump id, new chunks, new bytes)."""
+        sha = hashlib.sha256(data).hexdigest()
+        self.db.execute("BEGIN IMMEDIATE")                 # store-wide write lock until commit
+        try:
+            return self._add(data, sha, device, serial, when, chunker, source)
+        except BaseException:
+            self.db.rollback()
+            self._known = None                              # drop the rolled-back chunk ids
+            raise
+
+    def _add(self, data, sha, device, serial, when, chunker, source) -> tuple:
+        row = self.db.execute("SELECT id FROM recipes WHERE sha256 = ?", (sha,)).fetchone()
+        new_chunks = new_bytes = 0
+        if row:
+            rid = row[0]                                   # seen this exact image before
+        else:
+            known = self._digests()
+            ids = array("I")
+            with open(self.pack_path, "ab") as pack:
+                off = pack.seek(0, 2)                      # under the lock, so nobody else appends
+                for s, e in CHUNKERS[chunker](data):
+                    piece = data[s:e]
+                    d = hashlib.blake2b(piece, digest_size=16).digest()
+                    cid = known.get(d)
+                    if cid is None:
+                        pack.write(piece)
+                        cid = self.db.execute("INSERT INTO chunks (digest, off, len) VALUES (?, ?, ?)",
+                                              (d, off, len(piece))).lastrowid
+                        known[d] = cid
+                        self._known_max = max(self._known_max, cid)
+                        off += len(piece)
+                        new_chunks += 1; new_bytes += len(piece)
+                    ids.append(cid)
+            rid = self.db.execute("INSERT INTO recipes (sha256, size, chunker, ids) VALUES (?, ?, ?, ?)",
+                                  (sha, len(data), chunker, ids.tobytes())).lastrowid
+            if new_bytes and self._map is not None:
+                self._map.close(); self._map = None        # pack grew; remap on next read
+        did = self.db.execute("INSERT INTO dumps (device, serial, time, recipe, source) VALUES (?, ?, ?, ?, ?)",
+                              (device, serial, time.time() if when is None else when, rid, source)).lastrowid
+        self.db.commit()
+        return did, new_chunks, new_bytes
+
+    # --- query ---
+    def find(self, device: str = None, serial: str = None, since: float = None, until: float = None):
+        q, args = "SELECT d.id, d.device, d.serial, d.time, r.size, r.sha256, d.source FROM dumps d JOIN recipes r ON r.id = d.recipe WHERE 1", []
+        for col, op, v in (("d.device", "=", device), ("d.serial", "=", serial), ("d.time", ">=", since), ("d.time", "<", until)):
+            if v is not None:
+                q += f" AND {col} {op} ?"; args.append(v)
+        return self.db.execute(q + " ORDER BY d.time", args).fetchall()
+
+    def latest(self, device: str = None, serial: str = None):
+        rows = self.find(device, serial)
+        return rows[-1][0] if rows else None
+
+    # --- reconstruct ---
+    def _pack(self, need: int = 0):
+        """Read-only map of the pack, remapped when it is shorter than `need` (another process appended)."""
+        if self._map is not None and len(self._map) < need:
+            self._map.close(); self._map = None
+        if self._map is None:
+            if self.pack_path.stat().st_size == 0:
+                return b""                                 # mmap cannot map an empty file
+            with open(self.pack_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def get(self, dump_id: int) -> bytes:
+        row = self.db.execute("SELECT r.ids, r.size, r.sha256 FROM dumps d JOIN recipes r ON r.id = d.recipe "
+                              "WHERE d.id = ?", (dump_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"no dump {dump_id}")
+        ids = array("I"); ids.frombytes(row[0])
+        uniq = sorted(set(ids))
+        locs = {cid: (off, n) for cid, off, n in
+                self.db.execute(f"SELECT id, off, len FROM chunks WHERE id IN ({','.join('?' * len(uniq))})", uniq)}
+        pack = self._pack(max((off + n for off, n in locs.values()), default=0))
+        parts = []
+        for cid in ids:
+            off, n = locs[cid]
+            parts.append(pack[off:off + n])
+        data = b"".join(parts)
+        if len(data) != row[1] or hashlib.sha256(data).hexdigest() != row[2]:
+            raise IOError(f"dump {dump_id}: reconstructed image does not match its hash")
+        return data
+
+    def stats(self) -> dict:
+        n_dumps, = self.db.execute("SELECT COUNT(*) FROM dumps").fetchone()
+        n_rec, logical = self.db.execute("SELECT COUNT(*), COALESCE(SUM(r.size), 0) FROM recipes r").fetchone()
+        raw, = self.db.execute("SELECT COALESCE(SUM(r.size), 0) FROM dumps d JOIN recipes r ON r.id = d.recipe").fetchone()
+        n_chunks, = self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return {"dumps": n_dumps, "variants": n_rec, "chunks": n_chunks, "raw_bytes": raw,
+                "variant_bytes": logical, "pack_bytes": self.pack_path.stat().st_size,
+                "db_bytes": (self.root / "store.db").stat().st_size}
+
+# ---------- CLI ----------
+
+def _when(s):
+    return datetime.fromisoformat(s).timestamp()
+
+def cmd_ingest(args):
+    st = Store(args.store)
+    t0, tot_new, tot = time.perf_counter(), 0, 0
+    try:
+        for p in args.files:
+            data = p.read_bytes()
+            serial = p.stem if args.serial_from_name else args.serial
+            when = p.stat().st_mtime if args.file_time else None
+            did, nc, nb = st.add(data, args.device, serial, when, args.chunker, str(p))
+            tot += len(data); tot_new += nb
+            print(f"[store] #{did} {p.name}: {nc} new chunks, {nb} new bytes")
+    finally:
+        st.close()
+    dt = time.perf_counter() - t0
+    print(f"[store] {len(args.files)} dumps, {tot} B in, {tot_new} B stored in {dt * 1000:.0f} ms")
+
+def cmd_list(args):
+    st = Store(args.store)
+    try:
+        for did, dev, ser, t, size, sha, src in st.find(args.device, args.serial,
+                                                         _when(args.since) if args.since else None,
+                                                         _when(args.until) if args.until else None):
+            print(f"#{did:<5d} {datetime.fromtimestamp(t):%Y-%m-%d %H:%M:%S}  {dev:<12s} {ser:<16s} {size:7d} B  {sha[:12]}  {src}")
+    finally:
+        st.close()
+
+def cmd_get(args):
+    st = Store(args.store)
+    try:
+        did = args.id if args.id is not None else st.latest(args.device, args.serial)
+        if did is None:
+            raise SystemExit("no matching dump")
+        data = st.get(did)
+    finally:
+        st.close()
+    args.out.write_bytes(data)
+    print(f"[store] #{did} → {args.out} ({len(data)} B)")
+
+def cmd_stats(args):
+    st = Store(args.store)
+    try:
+        s = st.stats()
+    finally:
+        st.close()
+    used = s["pack_bytes"] + s["db_bytes"]
+    print(f"{s['dumps']} dumps, {s['variants']} distinct images, {s['chunks']} unique chunks")
+    print(f"raw {s['raw_bytes']} B → stored {used} B (pack {s['pack_bytes']} + db {s['db_bytes']}), "
+          f"ratio {s['raw_bytes'] / max(1, used):.1f}x")
+
+def main():
+    ap = argparse.ArgumentParser(description="Deduplicating store for firmware dumps")
+    ap.add_argument("--store", type=Path, default=Path("fwstore"), help="store directory")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("ingest", help="add dumps")
+    i.add_argument("files", nargs="+", type=Path)
+    i.add_argument("--device", default="", help="device identity (model, VID:PID, station ...)")
+    i.add_argument("--serial", default="")
+    i.add_argument("--serial-from-name", action="store_true", help="use each file's stem as the serial")
+    i.add_argument("--file-time", action="store_true", help="timestamp dumps with the file mtime instead of now")
+    i.add_argument("--chunker", choices=sorted(CHUNKERS), default="fixed")
+    i.set_defaults(func=cmd_ingest)
+    l = sub.add_parser("list", help="list dumps")
+    l.add_argument("--device"); l.add_argument("--serial")
+    l.add_argument("--since", help="ISO date/time"); l.add_argument("--until", help="ISO date/time")
+    l.set_defaults(func=cmd_list)
+    g = sub.add_parser("get", help="reconstruct a dump")
+    g.add_argument("--id", type=int); g.add_argument("--device"); g.add_argument("--serial")
+    g.add_argument("-o", "--out", type=Path, required=True)
+    g.set_defaults(func=cmd_get)
+    s = sub.add_parser("stats"); s.set_defaults(func=cmd_stats)
+    # accept --store after the subcommand too
+    for p in (i, l, g, s):
+        p.add_argument("--store", type=Path, default=argparse.SUPPRESS)
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+snxuvc — one entry point for the Sonix SN9C292 tools in this directory
+
+`python -m snxuvc CMD ...` dispatches to the existing scripts (snxuvc_dump.py,
+snxuvc_xu.py, the GUIs, py.py ...). Only the module behind CMD is imported,
+so a one-shot command pays for pyusb / OpenCV / Tk only when it needs them;
+the command table itself is plain data (see __main__.py).
+"""
@@ -0,0 +1,95 @@
+"""
+snxuvc — unified command line for the Sonix tools, with lazily loaded subcommands
+
+Each subcommand maps to the module that implements it; that module is imported
+only when the command runs, and its own argparse CLI handles the arguments.
+The dispatcher itself imports nothing beyond sys/os (no argparse, no re), so
+`snxuvc --help` and table lookups cost no more than the interpreter start.
+`python snxuvc_bench.py run --only startup` times it.
+
+USB commands (scan, xu-get, xu-set, sf-read, sf-info, verify) come from
+snxuvc_dump.py and accept --vid/--pid/--vc-if/--dev anywhere on the line.
+snxuvc_dump.py.py, snxuvc_dump2.py and snxuvc_probe2.py are older copies and
+are not wired in.
+
+Usage
+  python -m snxuvc --help
+  python -m snxuvc scan
+  python -m snxuvc xu-get --xu 3 --cs 0x24 --len 8 --dev cam-a
+  python -m snxuvc sf-read --region params --out params.bin
+  python -m snxuvc xu --device /dev/video0 call h264_get_gop
+  python -m snxuvc gui --timing            # sonix_uvc_gui_v3.py; `gui --xu-gui` for uvc_xu_gui.py
+  python -m snxuvc clean-asm raw_ida.asm cleaned.asm
+"""
+import os, sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))      # python/
+ROOT = os.path.dirname(HERE)                                            # repo root (py.py)
+
+# name: (module, kind, help); kind "dump" hoists snxuvc_dump's global options in front of the command,
+# kind "script" runs a file at the repo root as __main__ (py.py cannot be imported as `py`: pytest's shim owns it)
+COMMANDS = {
+    "scan":      ("snxuvc_dump", "dump", "list USB devices of --vid and their interfaces"),
+    "xu-get":    ("snxuvc_dump", "dump", "raw XU GET_CUR over libusb"),
+    "xu-set":    ("snxuvc_dump", "dump", "raw XU SET_CUR over libusb"),
+    "sf-read":   ("snxuvc_dump", "dump", "read SPI flash (regions, --sparse, --verify)"),
+    "sf-info":   ("snxuvc_dump", "dump", "flash size, header, USB identity and region table"),
+    "verify":    ("snxuvc_dump", "dump", "sampled read-back against a golden image"),
+    "probe":     ("snxuvc_probe", "main", "find the XU / selector pair that reads SPI flash"),
+    "xu":        ("snxuvc_xu", "main", "Sonix XU command set (list, chip, call NAME ARGS)"),
+    "asic":      ("snxuvc_asic", "main", "ASIC register read/write/dump/compare/watch"),
+    "i2c":       ("snxuvc_i2c", "main", "sensor I2C registers, tables and snapshots"),
+    "inventory": ("snxuvc_inventory", "main", "cached identity of attached cameras"),
+    "station":   ("snxuvc_station", "main", "headless identify/verify/reflash station"),
+    "timing":    ("snxuvc_timing", "main", "per-frame capture timing (V4L2, UVC PTS/SCR)"),
+    "bus":       ("snxuvc_framebus", "main", "shared-memory frame bus"),
+    "bench":     ("snxuvc_bench", "main", "offline benchmarks with baselines"),
+    "sweep":     ("snxuvc_sweep", "main", "encoder parameter sweep: set, capture, measure, table"),
+    "gui":       ("sonix_uvc_gui_v3", "main", "control GUI (--xu-gui: uvc_xu_gui.py)"),
+    "clean-asm": ("py.py", "script", "clean an IDA 8051 listing for ASEM-51 / as8051 / A51 (py.py)"),
+}
+DUMP_GLOBALS = ("--vid", "--pid", "--vc-if", "--dev")
+
+def usage() -> str:
+    lines = ["usage: snxuvc COMMAND [ARGS...]   (snxuvc COMMAND -h for its options)", "", "commands:"]
+    lines += [f"  {name:<10s} {h}" for name, (_, _, h) in COMMANDS.items()]
+    return "\n".join(lines)
+
+def _hoist(cmd: str, rest: list) -> list:
+    """snxuvc_dump wants --vid/--pid/--vc-if/--dev before the subcommand; accept them anywhere."""
+    pre, post, it = [], [], iter(rest)
+    for a in it:
+        if a.split("=", 1)[0] in DUMP_GLOBALS:
+            pre.append(a)
+            if "=" not in a:
+                pre.append(next(it, ""))
+        else:
+            post.append(a)
+    return pre + [cmd] + post
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(usage())
+        return 0 if argv else 2
+    cmd, rest = argv[0], argv[1:]
+    if cmd not in COMMANDS:
+        raise SystemExit(f"snxuvc: unknown command '{cmd}'\n\n{usage()}")
+    mod, kind, _ = COMMANDS[cmd]
+    if cmd == "gui" and "--xu-gui" in rest:
+        mod = "uvc_xu_gui"; rest.remove("--xu-gui")
+    if kind == "dump":
+        sys.argv = ["snxuvc"] + _hoist(cmd, rest)             # argparse prints "snxuvc <cmd>" itself
+    else:
+        sys.argv = [f"snxuvc {cmd}"] + rest
+    if kind == "script":
+        import runpy
+        runpy.run_path(os.path.join(ROOT, mod), run_name="__main__")
+        return 0
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    __import__(mod)
+    return sys.modules[mod].main()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+snxuvc_asic.py — bulk ASIC register access over the SYS XU (dump, write, compare, watch)
+
+XU_Asic_Read / XU_Asic_Write in sonix_xu_ctrls.c move one byte per
+conversation on SYS unit 3, selector 1 (ASIC_RW, 4-byte payload):
+  read  : SET [addr_lo, addr_hi, 0, 0xFF]  then GET 4 bytes, value in byte 2
+  write : SET [addr_lo, addr_hi, value, 0]
+There is no burst form, so a range costs 2 transfers per byte read and 1 per
+byte written. This module keeps one session open, takes the XU lock once per
+range and sends prebuilt payloads back to back, which is as tight as the
+protocol allows (V4L2 ioctl: a few thousand registers/s; libusb on EP0 is
+bounded by the 1 ms control-transfer frame).
+
+Register maps
+  The SN9C292B datasheet in the tree has no register tables, so the built-in
+  map only names the registers the XU code itself touches (chip id, DRAM
+  size, the I2C master block). More names come from --map files, one per line:
+      name: ADDR [LEN]   # comment
+  Ranges on the command line are ADDR:LEN, ADDR-END (inclusive) or a map name.
+
+Compare
+  against a previous `dump` file (raw bytes starting at the range address), or
+  against the ASIC init table of a firmware image (--init FW): 4-byte records
+  [value, addr_hi, addr_lo, mask] at 0x13000, zero-terminated — the values the
+  boot code programs, so live drift from the firmware defaults shows up.
+
+Usage
+  python snxuvc_asic.py --device /dev/video0 read 0x1000:0x40
+  python snxuvc_asic.py --device /dev/video0 read chip_id dram_size
+  python snxuvc_asic.py --device /dev/video0 write 0x10D9 1
+  python snxuvc_asic.py --device /dev/video0 write 0x1100 0x08 --mask 0x0C
+  python snxuvc_asic.py --usb dump 0x1100-0x12FF -o isp.bin
+  python snxuvc_asic.py --usb compare 0x1100-0x12FF isp.bin
+  python snxuvc_asic.py --usb compare --init "../camera info/firmware_backup_raw.bin"
+  python snxuvc_asic.py --device /dev/video0 watch 0x1100:0x100 --interval 0.01 --duration 30
+  python snxuvc_asic.py map --map isp.map
+"""
+import argparse, re, time
+from datetime import datetime
+from pathlib import Path
+
+from snxuvc_xu import SYS_ASIC_RW, XU_SYS, SonixXU
+
+INIT_TABLE = 0x13000
+INIT_MAX = 0x1000
+
+# name: (addr, length, comment) — registers used by sonix_xu_ctrls.c
+SN9C292 = {
+    "chip_id":     (0x101F, 1, "0x92 = SN9C292"),
+    "dram_size":   (0x1607, 1, "0x00 SN9C292A/64M, 0x03 SN9C291B/16M"),
+    "i2c_ctrl":    (0x10D0, 1, "0x80 | len<<4 | cmd<<1; bit2 done, bit3 fail"),
+    "i2c_slave":   (0x10D1, 1, "sensor slave id"),
+    "i2c_data":    (0x10D2, 5, "address/data bytes"),
+    "i2c_trigger": (0x10D7, 1, "write 0x10 to start"),
+    "i2c_mode":    (0x10D8, 1, "1 = ASIC I2C master"),
+    "i2c_enable":  (0x10D9, 1, "1 = enable"),
+    "i2c":         (0x10D0, 10, "whole I2C master block"),
+}
+
+def load_map(path) -> dict:
+    """Register map file -> {name: (addr, length, comment)}."""
+    out = {}
+    for n, line in enumerate(Path(path).read_text().splitlines(), 1):
+        body, _, comment = line.partition("#")
+        if not body.strip():
+            continue
+        m = re.fullmatch(r"\s*([A-Za-z_]\w*)\s*:\s*(\S+)(?:\s+(\S+))?\s*", body)
+        if not m:
+            raise SystemExit(f"{path}:{n}: want 'name: ADDR [LEN]'")
+        out[m[1]] = (int(m[2], 0), int(m[3], 0) if m[3] else 1, comment.strip())
+    return out
+
+def parse_range(s: str, regs: dict):
+    """'ADDR:LEN' | 'ADDR-END' | name -> (addr, length)."""
+    if s in regs:
+        return regs[s][:2]
+    try:
+        if ":" in s:
+            a, n = s.split(":", 1)
+            return int(a, 0), int(n, 0)
+        if "-" in s:
+            a, e = s.split("-", 1)
+            return int(a, 0), int(e, 0) - int(a, 0) + 1
+        return int(s, 0), 1
+    except ValueError:
+        raise SystemExit(f"bad range '{s}' (want ADDR:LEN, ADDR-END or a register name)")
+
+def names_at(regs: dict):
+    """addr -> name for single-byte lookups in compare/watch output."""
+    out = {}
+    for name, (a, n, _) in sorted(regs.items(), key=lambda kv: -kv[1][1]):   # short names win
+        for i in range(n):
+            out[a + i] = name if n == 1 else f"{name}[{i}]"
+    return out
+
+def init_table(image: bytes, base: int = INIT_TABLE):
+    """[(addr, value, mask)] from the firmware ASIC init table."""
+    out = []
+    for off in range(base, min(base + INIT_MAX, len(image) - 3), 4):
+        val, hi, lo, mask = image[off:off + 4]
+        if not (val | hi | lo | mask):
+            break
+        out.append(((hi << 8) | lo, val, mask))
+    return out
+
+class Asic:
+    """Range access on top of one SonixXU session."""
+    def __init__(self, xu: SonixXU):
+        self.xu = xu
+        self.reads = self.writes = 0
+
+    def read(self, addr: int, n: int = 1) -> bytes:
+        t, out = self.xu.t, bytearray(n)
+        reqs = [bytes([(a & 0xFF), (a >> 8) & 0xFF, 0, 0xFF]) for a in range(addr, addr + n)]
+        with self.xu.lock:
+            for i, req in enumerate(reqs):
+                t.set(XU_SYS, SYS_ASIC_RW, req)
+                out[i] = t.get(XU_SYS, SYS_ASIC_RW, 4)[2]
+        self.reads += n
+        return bytes(out)
+
+    def write(self, addr: int, data: bytes):
+        self.write_many((addr + i, v) for i, v in enumerate(data))
+
+    def write_many(self, pairs):
+        """Write (addr, value) pairs in one locked burst."""
+        t = self.xu.t
+        reqs = [bytes([a & 0xFF, (a >> 8) & 0xFF, v & 0xFF, 0]) for a, v in pairs]
+        with self.xu.lock:
+            for req in reqs:
+                t.set(XU_SYS, SYS_ASIC_RW, req)
+        self.writes += len(reqs)
+
+    def update(self, addr: int, value: int, mask: int = 0xFF) -> int:
+        """Read-modify-write of the mask bits; returns the new value."""
+        with self.xu.lock:
+            old = self.read(addr)[0] if mask != 0xFF else 0
+            new = (old & ~mask | value & mask) & 0xFF
+            self.write_many([(addr, new)])
+        return new
+
+    def watch(self, addr: int, n: int, interval: float = 0.0, duration: float = None, on_change=None):
+        """Poll [addr, addr+n) and call on_change(t, [(addr, old, new)]) for changed bytes. Returns (polls, seconds)."""
+        prev = self.read(addr, n)
+        t0 = time.perf_counter()
+        polls = 0
+        try:
+            while duration is None or time.perf_counter() - t0 < duration:
+                cur = self.read(addr, n)
+                polls += 1
+                if cur != prev:
+                    on_change(time.time(), [(addr + i, a, b) for i, (a, b) in enumerate(zip(prev, cur)) if a != b])
+                    prev = cur
+                if interval:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        return polls, time.perf_counter() - t0
+
+def hexdump(addr: int, data: bytes):
+    for i in range(0, len(data), 16):
+        print(f"{addr + i:04X}  {data[i:i + 16].hex(' ')}")
+
+# ---------- CLI ----------
+
+def _regs(args) -> dict:
+    regs = dict(SN9C292)
+    for m in args.map:
+        regs.update(load_map(m))
+    return regs
+
+def _rate(asic: Asic, what: str, n: int, dt: float):
+    print(f"[asic] {what} {n} regs in {dt * 1000:.0f} ms ({n / max(dt, 1e-9):.0f} regs/s)")
+
+def cmd_read(args, asic, regs):
+    for r in args.ranges:
+        a, n = parse_range(r, regs)
+        t0 = time.perf_counter()
+        data = asic.read(a, n)
+        dt = time.perf_counter() - t0
+        if r in regs:
+            print(f"{r:<12s} {a:04X}  {data.hex(' ')}")
+        else:
+            hexdump(a, data)
+        if n > 16:
+            _rate(asic, "read", n, dt)
+
+def cmd_write(args, asic, regs):
+    a, _ = parse_range(args.addr, regs)
+    vals = [int(v, 0) & 0xFF for v in args.values]
+    t0 = time.perf_counter()
+    if args.mask is not None:
+        for i, v in enumerate(vals):
+            new = asic.update(a + i, v, args.mask)
+            print(f"{a + i:04X} = {new:02X}")
+    else:
+        asic.write(a, bytes(vals))
+    if args.verify:
+        got = asic.read(a, len(vals))
+        m = 0xFF if args.mask is None else args.mask
+        bad = [a + i for i, (v, g) in enumerate(zip(vals, got)) if (v ^ g) & m]
+        if bad:
+            raise SystemExit(f"[asic] read-back differs at {', '.join(f'{x:04X}' for x in bad)}")
+    _rate(asic, "wrote", len(vals), time.perf_counter() - t0)
+
+def cmd_dump(args, asic, regs):
+    a, n = parse_range(args.range, regs)
+    t0 = time.perf_counter()
+    data = asic.read(a, n)
+    args.out.write_bytes(data)
+    _rate(asic, "read", n, time.perf_counter() - t0)
+    print(f"[asic] 0x{a:04X} +0x{n:X} → {args.out}")
+
+def _report(diffs, names, label):
+    for a, want, got, mask in diffs:
+        m = "" if mask == 0xFF else f" mask {mask:02X}"
+        print(f"  {a:04X} {names.get(a, ''):<14s} {label} {want:02X}  live {got:02X}{m}")
+
+def cmd_compare(args, asic, regs):
+    names = names_at(regs)
+    t0 = time.perf_counter()
+    if args.init:
+        table = init_table(args.init.read_bytes())
+        if not table:
+            raise SystemExit(f"[asic] no init table at 0x{INIT_TABLE:05X} in {args.init}")
+        live = {a: asic.read(a)[0] for a in sorted({a for a, _, _ in table})}
+        diffs = [(a, v, live[a], m) for a, v, m in table if (live[a] ^ v) & m]
+        n, label = len(table), "init"
+    else:
+        if not args.range or not args.file:
+            raise SystemExit("compare needs RANGE FILE, or --init FW")
+        a, n = parse_range(args.range, regs)
+        ref = args.file.read_bytes()[:n]
+        live = asic.read(a, len(ref))
+        diffs = [(a + i, r, g, 0xFF) for i, (r, g) in enumerate(zip(ref, live)) if r != g]
+        n, label = len(ref), "file"
+    _report(diffs, names, label)
+    dt = time.perf_counter() - t0
+    print(f"[asic] {len(diffs)} of {n} registers differ ({dt * 1000:.0f} ms)")
+    if diffs and args.strict:
+        raise SystemExit(1)
+
+def cmd_watch(args, asic, regs):
+    a, n = parse_range(args.range, regs)
+    names = names_at(regs)
+    def show(ts, changes):
+        stamp = datetime.fromtimestamp(ts).strftime("%H:%M:%S.%f")[:-3]
+        print(f"{stamp}  " + "  ".join(f"{x:04X}{('(' + names[x] + ')') if x in names else ''} {o:02X}→{v:02X}"
+                                        for x, o, v in changes), flush=True)
+    print(f"[asic] watching 0x{a:04X} +0x{n:X} (Ctrl+C to stop)")
+    polls, dt = asic.watch(a, n, args.interval, args.duration, show)
+    print(f"[asic] {polls} polls in {dt:.1f} s ({polls / max(dt, 1e-9):.1f} polls/s, {polls * n / max(dt, 1e-9):.0f} regs/s)")
+
+def cmd_map(args, regs):
+    for name, (a, n, comment) in sorted(regs.items(), key=lambda kv: kv[1][0]):
+        print(f"{name:<16s} 0x{a:04X} {n:3d}  {comment}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk SN9C292 ASIC register access over the SYS XU")
+    ap.add_argument("--device", default=None, help="/dev/videoN (V4L2 ioctl); omit with --usb")
+    ap.add_argument("--usb", action="store_true", help="libusb on --vid/--pid instead of V4L2")
+    ap.add_argument("--vid", type=lambda x: int(x, 0), default=0x0C45)
+    ap.add_argument("--pid", type=lambda x: int(x, 0), default=0x6366)
+    ap.add_argument("--vc-if", type=int, default=0)
+    ap.add_argument("--dev", default=None, help="libusb device by serial, port or alias (snxuvc_inventory.py)")
+    ap.add_argument("--map", action="append", type=Path, default=[], help="register map file (name: ADDR [LEN])")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("read", help="hex dump ranges or named registers")
+    p.add_argument("ranges", nargs="+")
+    p.set_defaults(func=cmd_read)
+    p = sub.add_parser("write", help="write bytes from ADDR on")
+    p.add_argument("addr"); p.add_argument("values", nargs="+")
+    p.add_argument("--mask", type=lambda x: int(x, 0), default=None, help="read-modify-write only these bits")
+    p.add_argument("--verify", action="store_true", help="read back afterwards")
+    p.set_defaults(func=cmd_write)
+    p = sub.add_parser("dump", help="range -> raw file")
+    p.add_argument("range"); p.add_argument("-o", "--out", type=Path, required=True)
+    p.set_defaults(func=cmd_dump)
+    p = sub.add_parser("compare", help="live registers vs a dump file or the firmware init table")
+    p.add_argument("range", nargs="?"); p.add_argument("file", nargs="?", type=Path)
+    p.add_argument("--init", type=Path, default=None, help="firmware image; compare against its ASIC init table")
+    p.add_argument("--strict", action="store_true", help="exit 1 on any difference")
+    p.set_defaults(func=cmd_compare)
+    p = sub.add_parser("watch", help="poll a range, print changed bytes")
+    p.add_argument("range")
+    p.add_argument("--interval", type=float, default=0.0, help="seconds between polls (0 = as fast as possible)")
+    p.add_argument("--duration", type=float, default=None)
+    p.set_defaults(func=cmd_watch)
+    sub.add_parser("map", help="list named registers").set_defaults(func=None)
+    args = ap.parse_args()
+    regs = _regs(args)
+    if args.cmd == "map":
+        cmd_map(args, regs); return
+    if not args.usb and not args.device and not args.dev:
+        raise SystemExit("pass --device /dev/videoN or --usb")
+    with SonixXU.open(None if args.usb or args.dev else args.device, args.vid, args.pid, args.vc_if, args.dev) as xu:
+        args.func(args, Asic(xu), regs)
+
+if __name__ == "__main__":
+    main()
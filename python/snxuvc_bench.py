@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+snxuvc_bench.py — offline benchmark suite with baselines and regression thresholds
+
+Runs against the simulated camera of snxuvc_sim.py (a pyusb backend, so the
+real pyusb + snxuvc_dump code paths are timed; only the wire is fake) and the
+sample files in the tree:
+  ctrl.*     per-call cost of uvc_xu_set / uvc_xu_get, ASIC reads/s through SonixXU
+  sf_read.*  sf_read_block throughput for each --chunks size x --latencies value
+  probe.*    snxuvc_probe.py completion time (walks XU 1..8 x 4 selector pairs)
+  preview.*  frames/s of the GUIs' per-frame render() on synthetic 1280x720 BGR frames,
+             with and without the timing overlay: sonix_uvc_gui_v3.render (App._loop)
+             and uvc_xu_gui.render (App._video_loop); the Tk PhotoImage hand-off needs
+             a display and is not included
+  py.*       py.py clean_lines lines/s on firmware_clean.asm (best of 3)
+  startup.*  wall time of one-shot `python -m snxuvc` commands (best of 5), next to a
+             bare `python -c pass`; scan runs on the simulator
+Cases whose dependencies are missing (pyusb, cv2, PIL) are recorded as skipped.
+
+Results are JSON: {"meta": {...}, "results": {name: {"value", "unit", "better"}}}.
+`compare` flags a result as a regression when it is worse than the baseline
+by more than its threshold (default --threshold %, per-case overrides with
+--limit NAME=PCT, fnmatch patterns allowed) and exits 1 if any regressed.
+
+Usage
+  python snxuvc_bench.py run -o bench.json
+  python snxuvc_bench.py run --only "sf_read.*" --latencies 0 0.001 -o sf.json
+  python snxuvc_bench.py run -o new.json --baseline bench.json --threshold 10 --limit "probe.*=25"
+  python snxuvc_bench.py compare bench.json new.json
+"""
+import argparse, contextlib, fnmatch, io, json, os, platform, subprocess, sys, time
+from argparse import Namespace
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+ASM = ROOT / "firmware_clean.asm"
+CHUNKS = (64, 256, 512, 1023)
+LATENCIES = (0.0, 0.000125, 0.001)           # none, USB 2.0 microframe, full-speed frame
+
+class Skip(Exception):
+    pass
+
+def _fmt(v) -> str:
+    return "-" if v is None else (f"{v:,.1f}" if abs(v) >= 100 else f"{v:.4g}")
+
+def _best(fn, repeat: int = 3) -> float:
+    t = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - t0)
+    return t
+
+def _sim(latency: float = 0.0):
+    """(snxuvc_dump module, pyusb device) on a fresh simulated camera."""
+    try:
+        import usb.core
+    except ImportError:
+        raise Skip("pyusb not installed")
+    os.environ.setdefault("SNXUVC_SIM", "1")          # any lazy backend lookup stays on the simulator
+    import snxuvc_dump, snxuvc_sim
+    dev = usb.core.find(idVendor=0x0C45, idProduct=0x6366, backend=snxuvc_sim.backend(latency=latency))
+    snxuvc_dump.detach_kernel_if_needed(dev, 0)      # as the CLI does; opens the handle
+    return snxuvc_dump, dev
+
+# ---------- cases ----------
+
+def bench_ctrl(args, out):
+    d, dev = _sim()
+    n = args.calls
+    payload = bytes([0, 0, 0, 0, 64])
+    t = _best(lambda: [d.uvc_xu_set(dev, 0, 3, 0x23, payload) for _ in range(n)])
+    out["ctrl.xu_set_us"] = (1e6 * t / n, "us/call", "lower")
+    t = _best(lambda: [d.uvc_xu_get(dev, 0, 3, 0x24, 64) for _ in range(n)])
+    out["ctrl.xu_get_us"] = (1e6 * t / n, "us/call", "lower")
+    from snxuvc_asic import Asic
+    from snxuvc_xu import SonixXU, UsbTransport
+    asic = Asic(SonixXU(UsbTransport(dev)))
+    t = _best(lambda: asic.read(0x1000, n // 2))
+    out["ctrl.asic_reads_per_s"] = ((n // 2) / t, "regs/s", "higher")
+
+def bench_sf_read(args, out):
+    for lat in args.latencies:
+        d, dev = _sim(lat)
+        for chunk in args.chunks:
+            a = Namespace(chunk=chunk, cs_set=0x23, cs_get=0x24, vc_if=0, xu=3)
+            total = args.sf_bytes if lat < 0.0005 else args.sf_bytes // 4     # keep the slow cases short
+            t = _best(lambda: d.sf_read_block(dev, a, 0, total, io.BytesIO()))
+            out[f"sf_read.chunk{chunk}.lat{lat * 1e6:.0f}us"] = (total / 1024 / t, "KiB/s", "higher")
+
+def bench_probe(args, out):
+    _sim()
+    import snxuvc_probe, snxuvc_sim
+    for lat in (0.0, 0.001):
+        def run():
+            snxuvc_probe.BACKEND = snxuvc_sim.backend(latency=lat)
+            with contextlib.redirect_stdout(io.StringIO()):
+                snxuvc_probe.main()
+        out[f"probe.lat{lat * 1e6:.0f}us_s"] = (_best(run), "s", "lower")
+
+def bench_preview(args, out):
+    """The per-frame body of both GUI preview loops (everything but the Tk PhotoImage hand-off)."""
+    try:
+        import cv2, numpy as np
+        from PIL import Image
+    except ImportError as e:
+        raise Skip(f"{e.name} not installed")
+    import sonix_uvc_gui_v3, uvc_xu_gui
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(8)]
+    lines = ["30.00 fps  cam jit 0.12 ms  host jit 0.80 ms", "drops 0 (seq)  gaps 0  lat 2.1 ms p95 3.0"]
+    n = args.frames
+    cases = {"v3_loop": lambda f: sonix_uvc_gui_v3.render(f, (640, 360)),
+             "v3_loop_timing": lambda f: sonix_uvc_gui_v3.render(f, (640, 360), lines),
+             "video_loop": lambda f: uvc_xu_gui.render(f),
+             "video_loop_timing_bus": lambda f: uvc_xu_gui.render(f, lines, copy=True)}
+    for name, fn in cases.items():
+        out[f"preview.{name}_fps"] = (n / _best(lambda: [fn(frames[i % 8]) for i in range(n)]), "fps", "higher")
+
+def bench_py(args, out):
+    if not ASM.exists():
+        raise Skip(f"{ASM.name} not in the tree")
+    from snxfw_dis import load_cleaner
+    py = load_cleaner()
+    lines = ASM.read_text(encoding="utf-8", errors="ignore").splitlines(keepends=True)
+    t = _best(lambda: list(py.clean_lines(lines)))
+    out["py.clean_lines_per_s"] = (len(lines) / t, "lines/s", "higher")
+
+STARTUP = (("help", ["--help"]), ("xu_list", ["xu", "list"]), ("clean_asm_help", ["clean-asm", "--help"]),
+           ("timing_help", ["timing", "--help"]), ("scan_sim", ["scan"]))
+
+def bench_startup(args, out):
+    import importlib.util
+    env = dict(os.environ, SNXUVC_SIM="1")
+    def t(cmd):
+        return 1000 * _best(lambda: subprocess.run(cmd, cwd=HERE, env=env, stdout=subprocess.DEVNULL,
+                                                   stderr=subprocess.DEVNULL), 5)
+    out["startup.python_ms"] = (t([sys.executable, "-c", "pass"]), "ms", "lower")
+    for name, argv in STARTUP:
+        if name == "scan_sim" and importlib.util.find_spec("usb") is None:
+            continue
+        out[f"startup.{name}_ms"] = (t([sys.executable, "-m", "snxuvc"] + argv), "ms", "lower")
+
+CASES = {"ctrl": bench_ctrl, "sf_read": bench_sf_read, "probe": bench_probe, "preview": bench_preview, "py": bench_py,
+         "startup": bench_startup}
+
+def run(args) -> dict:
+    results, skipped = {}, {}
+    for name, fn in CASES.items():
+        if args.only and not any(fnmatch.fnmatch(name, p.split(".")[0]) for p in args.only):
+            continue
+        t0 = time.perf_counter()
+        out = {}
+        try:
+            fn(args, out)
+        except Skip as e:
+            skipped[name] = str(e)
+            print(f"[bench] {name:<8s} skipped: {e}")
+            continue
+        for k, (v, unit, better) in out.items():
+            if args.only and not any(fnmatch.fnmatch(k, p) or fnmatch.fnmatch(name, p) for p in args.only):
+                continue
+            results[k] = {"value": v, "unit": unit, "better": better}
+            print(f"[bench] {k:<32s} {_fmt(v):>14s} {unit}")
+        print(f"[bench] {name} done in {time.perf_counter() - t0:.1f}s")
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    meta = {"time": datetime.now().isoformat(timespec="seconds"), "git": rev, "python": platform.python_version(),
+            "platform": platform.platform(), "machine": platform.machine(), "skipped": skipped}
+    return {"meta": meta, "results": results}
+
+# ---------- compare ----------
+
+def _limit(name: str, default: float, limits: dict) -> float:
+    for pat, pct in limits.items():
+        if fnmatch.fnmatch(name, pat):
+            return pct
+    return default
+
+def compare(base: dict, cur: dict, threshold: float, limits: dict) -> list:
+    """[(name, base, cur, change %, limit %, status)]; change is positive when cur is better."""
+    rows = []
+    for name in sorted(set(base["results"]) | set(cur["results"])):
+        b, c = base["results"].get(name), cur["results"].get(name)
+        if b is None or c is None:
+            rows.append((name, b and b["value"], c and c["value"], None, None, "new" if b is None else "missing"))
+            continue
+        sign = 1 if c["better"] == "higher" else -1
+        change = sign * 100.0 * (c["value"] - b["value"]) / b["value"] if b["value"] else 0.0
+        lim = _limit(name, threshold, limits)
+        rows.append((name, b["value"], c["value"], change, lim, "REGRESSION" if change < -lim else "ok"))
+    return rows
+
+def print_compare(rows, base_meta, cur_meta):
+    print(f"baseline {base_meta.get('time')} {base_meta.get('git', '')}  vs  current {cur_meta.get('time')} {cur_meta.get('git', '')}")
+    for name, b, c, change, lim, status in rows:
+        if change is None:
+            print(f"  {name:<32s} {_fmt(b):>14s} {_fmt(c):>14s}  {status}")
+        else:
+            print(f"  {name:<32s} {_fmt(b):>14s} {_fmt(c):>14s} {change:+7.1f}% (limit -{lim:g}%)  {status}")
+    bad = sum(r[5] == "REGRESSION" for r in rows)
+    print(f"[bench] {bad} regression(s) in {sum(r[3] is not None for r in rows)} comparable results")
+    return bad
+
+def _limits(items) -> dict:
+    out = {}
+    for it in items:
+        pat, _, pct = it.partition("=")
+        if not pct:
+            raise SystemExit(f"bad --limit '{it}' (want NAME=PCT)")
+        out[pat] = float(pct)
+    return out
+
+def cmd_run(args):
+    res = run(args)
+    if args.out:
+        args.out.write_text(json.dumps(res, indent=1))
+        print(f"[bench] → {args.out}")
+    if args.baseline:
+        base = json.loads(args.baseline.read_text())
+        if print_compare(compare(base, res, args.threshold, _limits(args.limit)), base["meta"], res["meta"]):
+            raise SystemExit(1)
+
+def cmd_compare(args):
+    base, cur = json.loads(args.baseline.read_text()), json.loads(args.current.read_text())
+    if print_compare(compare(base, cur, args.threshold, _limits(args.limit)), base["meta"], cur["meta"]):
+        raise SystemExit(1)
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline benchmarks for the Sonix tools (simulated USB backend)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run")
+    r.add_argument("-o", "--out", type=Path, default=None)
+    r.add_argument("--only", nargs="+", default=None, help=f"case or result patterns ({', '.join(CASES)}, sf_read.chunk512.*)")
+    r.add_argument("--chunks", nargs="+", type=int, default=list(CHUNKS))
+    r.add_argument("--latencies", nargs="+", type=float, default=list(LATENCIES), help="seconds per simulated transfer")
+    r.add_argument("--sf-bytes", type=lambda x: int(x, 0), default=0x20000)
+    r.add_argument("--calls", type=int, default=2000)
+    r.add_argument("--frames", type=int, default=200)
+    r.add_argument("--baseline", type=Path, default=None, help="compare against this result file afterwards")
+    r.set_defaults(func=cmd_run)
+    c = sub.add_parser("compare")
+    c.add_argument("baseline", type=Path); c.add_argument("current", type=Path)
+    c.set_defaults(func=cmd_compare)
+    for p in (r, c):
+        p.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in %% (default 10)")
+        p.add_argument("--limit", action="append", default=[], help="NAME=PCT per-result threshold (fnmatch)")
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
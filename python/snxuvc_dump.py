@@ -4,24 +4,38 @@ snxuvc_dump.py — Windows-friendly UVC XU dumper for Sonix SN9C292x
 Requires:  pip install pyusb libusb-package
 Bind WinUSB to the camera's VideoControl interface (Interface 0) with Zadig.
 """
-import argparse, binascii, time
+import argparse, binascii, os, time
 import usb.core, usb.util
 from usb.backend import libusb1
 
-# backend wiring (uses libusb-package to find the DLL)
-try:
-    import libusb_package
-    BACKEND = libusb1.get_backend(find_library=libusb_package.find_library)
-except Exception:
-    BACKEND = libusb1.get_backend()
-if BACKEND is None:
-    raise SystemExit("libusb backend not found. Install `libusb-package` or place libusb-1.0.dll on PATH.")
+# backend wiring (uses libusb-package to find the DLL); resolved on first use, since
+# find_library() costs tens of ms and commands that never touch USB should not pay it
+BACKEND = None
+
+def get_backend():
+    global BACKEND
+    if BACKEND is None:
+        if os.environ.get("SNXUVC_SIM"):
+            import snxuvc_sim   # simulated camera for offline runs / benchmarks
+            BACKEND = snxuvc_sim.from_env()
+        else:
+            try:
+                import libusb_package
+                BACKEND = libusb1.get_backend(find_library=libusb_package.find_library)
+            except Exception:
+                BACKEND = libusb1.get_backend()
+        if BACKEND is None:
+            raise SystemExit("libusb backend not found. Install `libusb-package` or place libusb-1.0.dll on PATH.")
+    return BACKEND
 
 UVC_SET_CUR = 0x01
 UVC_GET_CUR = 0x81
 
-def find_device(vid=0x0C45, pid=0x6366):
-    dev = usb.core.find(idVendor=vid, idProduct=pid, backend=BACKEND)
+def find_device(vid=0x0C45, pid=0x6366, ref=None):
+    if ref:
+        import snxuvc_inventory   # serial / port path / alias from the inventory db
+        return snxuvc_inventory.find(ref)
+    dev = usb.core.find(idVendor=vid, idProduct=pid, backend=get_backend())
     if dev is None:
         raise SystemExit(f"No device {vid:04x}:{pid:04x} found. Use --vid/--pid or plug the cam.")
     return dev
@@ -78,7 +92,7 @@ def parse_hex_bytes(lst):
     return bytes(out)
 
 def cmd_scan(args):
-    found = list(usb.core.find(find_all=True, idVendor=args.vid, backend=BACKEND))
+    found = list(usb.core.find(find_all=True, idVendor=args.vid, backend=get_backend()))
     if not found:
         print("No USB devices with that VID.")
         return
@@ -94,61 +108,188 @@ def cmd_scan(args):
             print("  [warn] can't enumerate interfaces:", e)
 
 def cmd_xu_get(args):
-    dev = find_device(args.vid, args.pid)
+    dev = find_device(args.vid, args.pid, args.dev)
     detach_kernel_if_needed(dev, args.vc_if)
     data = uvc_xu_get(dev, args.vc_if, args.xu, args.cs, args.len)
     print(binascii.hexlify(data).decode())
 
 def cmd_xu_set(args):
-    dev = find_device(args.vid, args.pid)
+    dev = find_device(args.vid, args.pid, args.dev)
     detach_kernel_if_needed(dev, args.vc_if)
     payload = parse_hex_bytes(args.data)
     uvc_xu_set(dev, args.vc_if, args.xu, args.cs, payload)
     print(f"SET done ({len(payload)} bytes)")
 
+def sf_read_block(dev, args, addr, total, f, progress=False):
+    """Read `total` bytes of SPI flash at `addr` into f.write() in <=chunk XU transfers (one retry each)."""
+    chunk, cs_set, cs_get = args.chunk, args.cs_set, args.cs_get
+    if chunk <= 0 or chunk > 1023: chunk = 512
+    remain, cur = total, addr
+    while remain > 0:
+        this = min(remain, chunk)
+        payload = bytes([(cur>>16)&0xFF, (cur>>8)&0xFF, cur&0xFF, (this>>8)&0xFF, this&0xFF])
+        for attempt in range(2):
+            try:
+                uvc_xu_set(dev, args.vc_if, args.xu, cs_set, payload)
+                data = uvc_xu_get(dev, args.vc_if, args.xu, cs_get, this); break
+            except usb.core.USBError:
+                if attempt==0: time.sleep(0.05); continue
+                raise
+        if len(data)!=this: raise SystemExit(f"Short read at 0x{cur:06X}: got {len(data)} expected {this}")
+        f.write(data); cur+=this; remain-=this
+        if progress:
+            done = total-remain; pct = (done*100.0)/total
+            print(f"\rRead {done}/{total} bytes ({pct:5.1f}%)", end="", flush=True)
+    if progress: print()
+
+def sf_reader(dev, args):
+    """read(addr, n) -> bytes for the snxfw_layout probes; a short read or a stall raises ReadPastEnd."""
+    import errno, io
+    from snxfw_layout import ReadPastEnd
+    def read(addr, n):
+        buf = io.BytesIO()
+        try:
+            sf_read_block(dev, args, addr, n, buf)
+        except SystemExit as e:                      # short read
+            raise ReadPastEnd(f"sf read 0x{addr:06X}+{n}: {e}")
+        except usb.core.USBError as e:
+            if e.errno == errno.EPIPE:               # stalled after the retry
+                raise ReadPastEnd(f"sf read 0x{addr:06X}+{n}: {e}")
+            raise IOError(f"sf read 0x{addr:06X}+{n} failed: {e}")
+        return buf.getvalue()
+    return read
+
+def sf_size(dev, args):
+    """Flash size from --jedec (capacity byte) or by address wrap-around probing."""
+    import snxfw_layout
+    if args.jedec:
+        j = snxfw_layout.decode_jedec(bytes.fromhex(args.jedec))
+        print(f"[sf] JEDEC {args.jedec}: {j['vendor']}, {j['size'] // 1024 if j['size'] else '?'} KiB")
+        return j["size"]
+    t0 = time.time()
+    size = snxfw_layout.detect_size(sf_reader(dev, args))
+    print(f"[sf] flash size {f'{size // 1024} KiB' if size else 'not detected'} (wrap probe, {time.time()-t0:.2f}s)")
+    return size
+
+def sf_span(dev, args):
+    """(addr, length) from --region / --addr / --length; no length means up to the end of the flash."""
+    addr, total = args.addr, args.length
+    if args.region:
+        import snxfw_layout
+        ra, rl = snxfw_layout.region(args.region)
+        if addr is None: addr = ra
+        if total is None: total = rl
+    if addr is None: addr = 0
+    if total is None:
+        size = sf_size(dev, args)
+        if not size: raise SystemExit("flash size unknown: pass --length, --region or --jedec")
+        total = size - addr
+    return addr, total
+
 def cmd_sf_read(args):
-    dev = find_device(args.vid, args.pid)
+    dev = find_device(args.vid, args.pid, args.dev)
     detach_kernel_if_needed(dev, args.vc_if)
-    addr, total, chunk = args.addr, args.length, args.chunk
-    cs_set, cs_get = args.cs_set, args.cs_get
-    if chunk <= 0 or chunk > 1023: chunk = 512
+    addr, total = sf_span(dev, args)
     if total <= 0: raise SystemExit("length must be > 0")
-    with open(args.out, "wb") as f:
-        remain, cur = total, addr
-        while remain > 0:
-            this = min(remain, chunk)
-            payload = bytes([(cur>>16)&0xFF, (cur>>8)&0xFF, cur&0xFF, (this>>8)&0xFF, this&0xFF])
-            for attempt in range(2):
-                try:
-                    uvc_xu_set(dev, args.vc_if, args.xu, cs_set, payload)
-                    data = uvc_xu_get(dev, args.vc_if, args.xu, cs_get, this); break
-                except usb.core.USBError:
-                    if attempt==0: time.sleep(0.05); continue
-                    raise
-            if len(data)!=this: raise SystemExit(f"Short read at 0x{cur:06X}: got {len(data)} expected {this}")
-            f.write(data); cur+=this; remain-=this
-            if args.progress:
-                done = total-remain; pct = (done*100.0)/total
-                print(f"\rRead {done}/{total} bytes ({pct:5.1f}%)", end="", flush=True)
-        if args.progress: print()
+    print(f"[sf] 0x{addr:06X} +0x{total:X}" + (f" (region {args.region})" if args.region else ""))
+    sparse = args.sparse or args.out.lower().endswith(".snxd")
+    if sparse:
+        from snxfw_sparse import SparseWriter   # erased/constant blocks as runs, the rest compressed
+    with (SparseWriter(args.out, base_addr=addr) if sparse else open(args.out, "wb")) as f:
+        sf_read_block(dev, args, addr, total, f, args.progress)
     print(f"Wrote: {args.out}")
     if args.verify:
         import hashlib
         h=hashlib.sha256()
-        with open(args.out,"rb") as f:
-            for blk in iter(lambda: f.read(65536), b""): h.update(blk)
+        if sparse:
+            from snxfw_sparse import SparseReader
+            with SparseReader(args.out) as r:
+                for blk in r.chunks(): h.update(blk)
+        else:
+            with open(args.out,"rb") as f:
+                for blk in iter(lambda: f.read(65536), b""): h.update(blk)
         print("SHA-256:", h.hexdigest())
 
+def cmd_sf_info(args):
+    import snxfw_layout
+    dev = find_device(args.vid, args.pid, args.dev)
+    detach_kernel_if_needed(dev, args.vc_if)
+    read = sf_reader(dev, args)
+    snxfw_layout.print_info(snxfw_layout.describe(read, sf_size(dev, args)))
+
+def _span(s):
+    from snxfw_sample import parse_span   # ADDR:LEN -> (start, end)
+    return parse_span(s)
+
+def sample_verify(dev, args, golden):
+    """Read a stratified sample (snxfw_sample.py) and compare it; returns (plan info, bytes read, mismatched ranges)."""
+    import io, snxfw_sample as smp
+    from snxfw_layout import region
+    mandatory = list(args.must) + smp.variant_ranges(golden, args.variants)
+    for name in ("header", "params"):
+        a, n = region(name); mandatory.append((a, a + n))
+    idx, info = smp.plan(len(golden), args.confidence, mandatory, args.chunk, args.defect, args.seed)
+    reads = smp.spans(idx, args.chunk, len(golden))
+    bad = []
+    for a, n in reads:
+        buf = io.BytesIO(); sf_read_block(dev, args, a, n, buf)
+        bad += smp.compare(golden, a, buf.getvalue(), args.ignore)
+    return info, sum(n for _, n in reads), bad
+
+def full_verify(dev, args, golden):
+    """Whole-image read-back; returns (data, mismatched ranges, mismatched sector runs)."""
+    import io, snxfw_sample as smp
+    from snxfw_diff import align
+    buf = io.BytesIO(); sf_read_block(dev, args, 0, len(golden), buf, args.progress)
+    data = buf.getvalue()
+    bad = smp.compare(golden, 0, data, args.ignore)
+    return data, bad, align(bad)
+
+def cmd_verify(args):
+    import snxfw_sample as smp
+    golden = open(args.golden, "rb").read()
+    dev = find_device(args.vid, args.pid, args.dev)
+    detach_kernel_if_needed(dev, args.vc_if)
+    t0 = time.time()
+    info, nread, bad = sample_verify(dev, args, golden)
+    smp.print_plan(info, nread, len(golden))
+    dt = time.time() - t0
+    if not bad:
+        print(f"[verify] PASS (sampled) in {dt:.2f}s")
+        return
+    print(f"[verify] sample mismatch in {len(bad)} range(s) after {dt:.2f}s: "
+          + ", ".join(f"0x{s:06X}-0x{e:06X}" for s, e in bad[:8]) + (" ..." if len(bad) > 8 else ""))
+    if args.no_escalate:
+        raise SystemExit("[verify] FAIL")
+    print("[verify] escalating to full read-back")
+    data, bad, sectors = full_verify(dev, args, golden)
+    if args.out:
+        open(args.out, "wb").write(data); print(f"Wrote: {args.out}")
+    print(f"[verify] full: {sum(e - s for s, e in bad)} bytes differ in {len(bad)} range(s), "
+          f"{len(sectors)} sector run(s): " + ", ".join(f"0x{s:06X}-0x{e:06X}" for s, e in sectors))
+    raise SystemExit(f"[verify] FAIL in {time.time() - t0:.2f}s")
+
 def main():
     ap = argparse.ArgumentParser(description="Sonix UVC XU dumper (Windows via PyUSB + libusb-package)")
     ap.add_argument("--vid", type=lambda x:int(x,0), default=0x0C45)
     ap.add_argument("--pid", type=lambda x:int(x,0), default=0x6366)
     ap.add_argument("--vc-if", type=int, default=0)
+    ap.add_argument("--dev", default=None, help="serial, port path or alias from snxuvc_inventory.py (instead of --vid/--pid)")
     sub = ap.add_subparsers(dest="cmd", required=True)
     sc = sub.add_parser("scan"); sc.set_defaults(func=cmd_scan)
     gx = sub.add_parser("xu-get"); gx.add_argument("--xu", type=int, required=True); gx.add_argument("--cs", type=lambda x:int(x,0), required=True); gx.add_argument("--len", type=int, required=True); gx.set_defaults(func=cmd_xu_get)
     sx = sub.add_parser("xu-set"); sx.add_argument("--xu", type=int, required=True); sx.add_argument("--cs", type=lambda x:int(x,0), required=True); sx.add_argument("--data", nargs="+", required=True); sx.set_defaults(func=cmd_xu_set)
-    sf = sub.add_parser("sf-read"); sf.add_argument("--xu", type=int, default=3); sf.add_argument("--cs-set", type=lambda x:int(x,0), default=0x23); sf.add_argument("--cs-get", type=lambda x:int(x,0), default=0x24); sf.add_argument("--addr", type=lambda x:int(x,0), required=True); sf.add_argument("--length", type=lambda x:int(x,0), required=True); sf.add_argument("--chunk", type=int, default=512); sf.add_argument("--out", type=str, required=True); sf.add_argument("--progress", action="store_true"); sf.add_argument("--verify", action="store_true"); sf.set_defaults(func=cmd_sf_read)
+    sf = sub.add_parser("sf-read"); sf.add_argument("--xu", type=int, default=3); sf.add_argument("--cs-set", type=lambda x:int(x,0), default=0x23); sf.add_argument("--cs-get", type=lambda x:int(x,0), default=0x24); sf.add_argument("--addr", type=lambda x:int(x,0), default=None); sf.add_argument("--length", type=lambda x:int(x,0), default=None, help="default: region length, else up to the end of the flash"); sf.add_argument("--region", default=None, help="header/code/params/tables/init/image (snxfw_layout.py)"); sf.add_argument("--jedec", default=None, help="JEDEC ID hex (e.g. EF4015) instead of probing the size"); sf.add_argument("--chunk", type=int, default=512); sf.add_argument("--out", type=str, required=True); sf.add_argument("--progress", action="store_true"); sf.add_argument("--verify", action="store_true"); sf.add_argument("--sparse", action="store_true", help="write a .snxd sparse container (implied by a .snxd name)"); sf.set_defaults(func=cmd_sf_read)
+    si = sub.add_parser("sf-info", help="flash size, header, USB identity and region table")
+    si.add_argument("--xu", type=int, default=3); si.add_argument("--cs-set", type=lambda x:int(x,0), default=0x23); si.add_argument("--cs-get", type=lambda x:int(x,0), default=0x24); si.add_argument("--chunk", type=int, default=512); si.add_argument("--jedec", default=None); si.set_defaults(func=cmd_sf_info)
+    vf = sub.add_parser("verify", help="sampled read-back against a golden image (snxfw_sample.py), full verify on mismatch")
+    vf.add_argument("--xu", type=int, default=3); vf.add_argument("--cs-set", type=lambda x:int(x,0), default=0x23); vf.add_argument("--cs-get", type=lambda x:int(x,0), default=0x24); vf.add_argument("--chunk", type=int, default=512)
+    vf.add_argument("--golden", required=True); vf.add_argument("--confidence", type=float, default=0.99, help="P(detect a --defect sized corruption)")
+    vf.add_argument("--defect", type=lambda x:int(x,0), default=0x1000); vf.add_argument("--variants", nargs="*", default=[], help="other firmware images; differing sectors are always read")
+    vf.add_argument("--must", action="append", type=_span, default=[], help="ADDR:LEN always read (checksum fields ...)")
+    vf.add_argument("--ignore", action="append", type=_span, default=[], help="ADDR:LEN not compared (e.g. 0x100C0:0x40 per-unit serial)")
+    vf.add_argument("--seed", type=int, default=None); vf.add_argument("--no-escalate", action="store_true"); vf.add_argument("--out", default=None, help="save the full read-back on escalation"); vf.add_argument("--progress", action="store_true")
+    vf.set_defaults(func=cmd_verify)
     args = ap.parse_args(); args.func(args)
 
 if __name__ == "__main__":
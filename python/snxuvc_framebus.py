@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+snxuvc_framebus.py — one camera, many readers, via a shared-memory frame ring
+
+Only one process can hold a V4L2/DirectShow capture open. This tool opens the
+camera once ("publish") and writes every frame into a multiprocessing
+shared_memory ring. Readers (the GUIs, headless analyzers) attach by name and
+get zero-copy numpy views of the newest frame.
+
+Requires:  pip install opencv-python numpy   (publisher; readers only need numpy)
+
+Layout (little endian)
+  header  64 B : magic "SNXFBUS1", version, slots, max_h, max_w, max_c, slot_bytes, write_seq
+  slot[i] 64 B : seq, timestamp, h, w, c, nbytes   + frame data (64-byte aligned)
+
+Protocol
+- The producer never waits. It zeroes a slot's seq, copies the frame, then
+  publishes seq in the slot and in the header.
+- A reader looks up header.write_seq, checks the slot still carries that seq,
+  and hands out a view. Slow readers simply see a later seq next time
+  (skipped frames are counted), they never hold the producer back.
+- A view stays intact until the producer wraps around the ring (slots-1
+  frames later); call FrameReader.valid(seq) after processing to be sure.
+
+Usage
+  python snxuvc_framebus.py publish --device 0 --name snxcam0 --width 1280 --height 720
+  python snxuvc_framebus.py publish --device 0 --name snxcam0 --force     # replace a segment left by a crash
+  python snxuvc_framebus.py stat --name snxcam0
+  python uvc_xu_gui.py --bus snxcam0
+"""
+import argparse, struct, sys, time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAGIC = b"SNXFBUS1"
+VERSION = 1
+HDR = struct.Struct("<8sIIIIIIQ")          # magic ver slots h w c slot_bytes write_seq
+HDR_SIZE = 64
+SEQ_OFF = HDR.size - 8                      # header.write_seq
+SLOT_HDR = struct.Struct("<QdIIII")         # seq ts h w c nbytes
+SLOT_HDR_SIZE = 64
+ALIGN = 64
+
+def _align(n):
+    return (n + ALIGN - 1) & ~(ALIGN - 1)
+
+def _untrack(shm):
+    # Python < 3.13 registers attached segments with the resource tracker and
+    # unlinks them when the *reader* exits. Only the publisher owns the segment.
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+class FrameBus:
+    """Producer side. Owns (creates and unlinks) the shared-memory segment."""
+    def __init__(self, name: str, max_h: int, max_w: int, max_c: int = 3, slots: int = 8, force: bool = False):
+        if slots < 2:
+            raise ValueError("need at least 2 slots")
+        self.slots, self.max_h, self.max_w, self.max_c = slots, max_h, max_w, max_c
+        self.slot_bytes = _align(max_h * max_w * max_c)
+        self.stride = SLOT_HDR_SIZE + self.slot_bytes
+        size = HDR_SIZE + slots * self.stride
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # a running publisher's readers would lose their frames: replace only on request
+            if not force:
+                raise FileExistsError(f"frame bus '{name}' already exists (another publisher, or a stale one "
+                                      f"left by a crash); pass --force to replace it") from None
+            old = shared_memory.SharedMemory(name=name)
+            old.close(); old.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        self.seq = 0
+        HDR.pack_into(self.shm.buf, 0, MAGIC, VERSION, slots, max_h, max_w, max_c, self.slot_bytes, 0)
+
+    def publish(self, frame: np.ndarray, ts: float = None) -> int:
+        """Copy one frame into the next slot; returns its sequence number (1-based)."""
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+        h, w, c = frame.shape
+        n = frame.nbytes
+        if n > self.slot_bytes:
+            raise ValueError(f"frame {w}x{h}x{c} exceeds bus slot ({self.max_w}x{self.max_h}x{self.max_c})")
+        seq = self.seq + 1
+        off = HDR_SIZE + (seq % self.slots) * self.stride
+        buf = self.shm.buf
+        struct.pack_into("<Q", buf, off, 0)                       # invalidate while writing
+        dst = np.ndarray((h, w, c), dtype=np.uint8, buffer=buf, offset=off + SLOT_HDR_SIZE)
+        np.copyto(dst, frame, casting="unsafe")
+        SLOT_HDR.pack_into(buf, off, seq, time.time() if ts is None else ts, h, w, c, n)
+        struct.pack_into("<Q", buf, SEQ_OFF, seq)
+        self.seq = seq
+        return seq
+
+    def close(self):
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class FrameReader:
+    """Consumer side. Attaches read-only by convention; never blocks the producer."""
+    def __init__(self, name: str):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"no frame bus '{name}' (start `snxuvc_framebus.py publish --name {name}`)") from None
+        _untrack(self.shm)
+        magic, ver, self.slots, self.max_h, self.max_w, self.max_c, self.slot_bytes, _ = \
+            HDR.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or ver != VERSION:
+            self.shm.close()
+            raise IOError(f"shared memory '{name}' is not a frame bus (magic={magic!r} ver={ver})")
+        self.name = name
+        self.stride = SLOT_HDR_SIZE + self.slot_bytes
+        self.last_seq = 0
+        self.skipped = 0
+
+    def head(self) -> int:
+        return struct.unpack_from("<Q", self.shm.buf, SEQ_OFF)[0]
+
+    def _slot_seq(self, seq):
+        return struct.unpack_from("<Q", self.shm.buf, HDR_SIZE + (seq % self.slots) * self.stride)[0]
+
+    def latest(self):
+        """(seq, timestamp, view) of the newest frame, or None if nothing new since the last call."""
+        for _ in range(3):
+            seq = self.head()
+            if seq == 0 or seq == self.last_seq:
+                return None
+            off = HDR_SIZE + (seq % self.slots) * self.stride
+            sseq, ts, h, w, c, n = SLOT_HDR.unpack_from(self.shm.buf, off)
+            if sseq != seq:
+                continue                                          # producer lapped us mid-read
+            view = np.ndarray((h, w, c), dtype=np.uint8, buffer=self.shm.buf, offset=off + SLOT_HDR_SIZE)
+            if self.last_seq:
+                self.skipped += max(0, seq - self.last_seq - 1)
+            self.last_seq = seq
+            return seq, ts, view
+        return None
+
+    def wait(self, timeout: float = 1.0, poll: float = 0.002):
+        """Poll until a new frame is available; returns latest() or None on timeout."""
+        end = time.monotonic() + timeout
+        while True:
+            r = self.latest()
+            if r is not None or time.monotonic() >= end:
+                return r
+            time.sleep(poll)
+
+    def valid(self, seq: int) -> bool:
+        """True while the slot holding `seq` has not been overwritten."""
+        return self._slot_seq(seq) == seq
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass                                                  # caller still holds a view
+
+class BusCapture:
+    """Drop-in for the subset of cv2.VideoCapture the GUIs use (read/set/isOpened/release)."""
+    def __init__(self, name: str, timeout: float = 1.0):
+        self.reader = FrameReader(name)
+        self.timeout = timeout
+        self.last = (None, None)                                  # (seq, publish time) of the last frame read
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        r = self.reader.wait(self.timeout)
+        if r is None:
+            return False, None
+        self.last = r[:2]
+        return True, r[2]
+
+    def set(self, prop, val):
+        # capture properties belong to the publisher process
+        return False
+
+    def release(self):
+        self.reader.close()
+
+# ---------- CLI ----------
+
+def cmd_publish(args):
+    import cv2
+    cap = cv2.VideoCapture(args.device, cv2.CAP_V4L2 if sys.platform.startswith("linux") else cv2.CAP_ANY)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video device index {args.device}")
+    if args.width:  cap.set(cv2.CAP_PROP_FRAME_WIDTH,  args.width)
+    if args.height: cap.set(cv2.CAP_PROP_FRAME_HEIGHT, args.height)
+    if args.fps:    cap.set(cv2.CAP_PROP_FPS,          args.fps)
+    ok, frame = cap.read()
+    if not ok:
+        raise SystemExit("No frame from camera")
+    h, w = frame.shape[:2]
+    try:
+        bus = FrameBus(args.name, max(h, args.height or 0), max(w, args.width or 0), 3, args.slots, args.force)
+    except FileExistsError as e:
+        cap.release()
+        raise SystemExit(f"[bus] {e}")
+    print(f"[bus] {args.name}: {w}x{h}, {args.slots} slots x {bus.slot_bytes} bytes")
+    t0, n = time.monotonic(), 0
+    try:
+        while True:
+            bus.publish(frame)
+            n += 1
+            if args.stats and time.monotonic() - t0 >= 5:
+                print(f"[bus] seq={bus.seq} {n / (time.monotonic() - t0):.1f} fps")
+                t0, n = time.monotonic(), 0
+            ok, frame = cap.read()
+            if not ok:
+                time.sleep(0.01)
+                ok, frame = cap.read()
+                if not ok:
+                    print("[bus] capture lost"); break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        bus.close()
+
+def cmd_stat(args):
+    try:
+        rd = FrameReader(args.name)
+    except FileNotFoundError as e:
+        raise SystemExit(f"[bus] {e}")
+    print(f"[bus] {args.name}: {rd.slots} slots, max {rd.max_w}x{rd.max_h}x{rd.max_c}")
+    t0, n, lat = time.monotonic(), 0, 0.0
+    try:
+        while time.monotonic() - t0 < args.seconds:
+            r = rd.wait(1.0)
+            if r is None:
+                continue
+            n += 1
+            lat += time.time() - r[1]
+        dt = time.monotonic() - t0
+        print(f"frames={n} fps={n / dt:.1f} skipped={rd.skipped} mean_age={1000 * lat / max(1, n):.2f} ms")
+    finally:
+        rd.close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Shared-memory frame bus for one camera, many readers")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("publish", help="open the camera and publish frames")
+    p.add_argument("--device", type=int, default=0, help="OpenCV video device index")
+    p.add_argument("--name", default="snxcam0", help="shared memory name")
+    p.add_argument("--slots", type=int, default=8)
+    p.add_argument("--width", type=int, default=0)
+    p.add_argument("--height", type=int, default=0)
+    p.add_argument("--fps", type=int, default=0)
+    p.add_argument("--stats", action="store_true", help="print publish rate every 5 s")
+    p.add_argument("--force", action="store_true", help="replace an existing segment of the same name")
+    p.set_defaults(func=cmd_publish)
+    s = sub.add_parser("stat", help="attach as a reader and report rate / skipped frames")
+    s.add_argument("--name", default="snxcam0")
+    s.add_argument("--seconds", type=float, default=5.0)
+    s.set_defaults(func=cmd_stat)
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
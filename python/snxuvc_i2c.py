@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+snxuvc_i2c.py — sensor register access through the SN9C292 I2C master (GC2053, OV2710)
+
+XU_I2C_Read / XU_I2C_Write in sonix_xu_ctrls.c drive the ASIC I2C master at
+0x10D0-0x10D9 with single ASIC_RW transfers (I2C_Cmd):
+  0x10D9 = 1, 0x10D8 = 1                      enable, ASIC master mode
+  0x10D0 = 0x80 | (len & 7) << 4 | cmd << 1   cmd 0 write, 1 read
+  0x10D1 = slave id,  0x10D2..0x10D6 = address/data bytes
+  0x10D7 = 0x10                               trigger
+  poll 0x10D0: bit2 done, bit3 NAK/fail;  read data is right-aligned in 0x10D2..0x10D6
+A register read is an address write followed by a read command. The C code
+rewrites the whole block and sleeps 5 ms + 10 ms per poll on every command,
+so one register costs ~15 ms. Here the master is enabled once per session
+and the done bit is polled without sleeping. The slave and data bytes go out
+on every command: the firmware (and any other XU client) drives the same
+master between our commands, so their last value here proves nothing.
+
+Sensor registers are cached as they are read or written, but a table replay
+only skips a write when the register was read back (or loaded with --cached)
+and holds the value: earlier writes never count, so repeated entries such as
+GC2053's 0xFE 0x80 reset pulse all go out (--force rewrites everything).
+A soft reset (GC2053 0xFE bit 7, OV2710 0x3008 bit 7) drops the cache.
+GC2053 is paged through 0xFE; the cache and snapshots are keyed by (page, register).
+
+Table files (vendor init tables, tuning tables, snapshots)
+  one register per line, the first two numbers are register and value:
+      0xfe 0x00          {0x3008, 0x82},          3103 93
+  `delay N` / `sleep N` / `msleep N` waits N ms; //, # and ; start comments.
+  Snapshots are written in the same format and can be replayed as-is.
+
+Usage
+  python snxuvc_i2c.py --device /dev/video0 id
+  python snxuvc_i2c.py --device /dev/video0 --sensor ov2710 read 0x3008 2
+  python snxuvc_i2c.py --device /dev/video0 write 0xfe 0x00 0x80 0x10
+  python snxuvc_i2c.py --usb --sensor gc2053 snapshot -o gc2053_a.txt
+  python snxuvc_i2c.py --usb --sensor gc2053 diff gc2053_a.txt            # vs live
+  python snxuvc_i2c.py diff gc2053_a.txt gc2053_b.txt                     # offline
+  python snxuvc_i2c.py --device /dev/video0 --sensor gc2053 apply tuning.txt
+"""
+import argparse, re, time
+from pathlib import Path
+from typing import NamedTuple
+
+from snxuvc_asic import Asic
+from snxuvc_xu import SonixXU
+
+I2C_CTRL, I2C_SLAVE, I2C_DATA, I2C_TRIGGER, I2C_MODE, I2C_ENABLE = 0x10D0, 0x10D1, 0x10D2, 0x10D7, 0x10D8, 0x10D9
+I2C_WRITE, I2C_READ = 0, 1
+DONE, FAIL = 0x04, 0x08
+TIMEOUT = 0.35                                # I2C_Cmd: 5 ms + 30 polls x 10 ms
+
+class Profile(NamedTuple):
+    name: str
+    slave: int                                # 8-bit write address, as the C code passes it
+    addr_len: int
+    chip_id: tuple                            # ((reg, value), ...)
+    page_reg: int                             # bank select register, None if flat
+    banks: tuple                              # snapshot ranges: ((page, start, end), ...), end exclusive
+    reset: tuple                              # (reg, bit): writing bit set soft-resets the sensor
+
+SENSORS = {
+    "gc2053": Profile("gc2053", 0x6E, 1, ((0xF0, 0x20), (0xF1, 0x53)), 0xFE,
+                      tuple((p, 0x00, 0xFE) for p in range(4)), (0xFE, 0x80)),
+    "ov2710": Profile("ov2710", 0x6C, 2, ((0x300A, 0x27), (0x300B, 0x10)), None,
+                      ((None, 0x3000, 0x3100), (None, 0x3400, 0x3410), (None, 0x3500, 0x3520),
+                       (None, 0x3600, 0x3630), (None, 0x3700, 0x3730), (None, 0x3800, 0x3830),
+                       (None, 0x4000, 0x4010), (None, 0x4700, 0x4710), (None, 0x4800, 0x4840),
+                       (None, 0x5000, 0x5060)), (0x3008, 0x80)),
+}
+
+class I2CError(IOError):
+    pass
+
+class I2CMaster:
+    """The ASIC I2C master."""
+    def __init__(self, asic: Asic, timeout: float = TIMEOUT):
+        self.asic, self.timeout = asic, timeout
+        self.enabled = False
+        self.cmds = self.polls = 0
+
+    def _cmd(self, cmd: int, slave: int, data: bytes, n: int):
+        pairs = [] if self.enabled else [(I2C_ENABLE, 1), (I2C_MODE, 1)]
+        pairs.append((I2C_CTRL, 0x80 | (n & 7) << 4 | cmd << 1))
+        pairs.append((I2C_SLAVE, slave))
+        pairs += [(I2C_DATA + i, b) for i, b in enumerate(data)]
+        pairs.append((I2C_TRIGGER, 0x10))
+        with self.asic.xu.lock:
+            self.asic.write_many(pairs)
+            self.enabled = True
+            self.cmds += 1
+            t0 = time.perf_counter()
+            while True:
+                st = self.asic.read(I2C_CTRL)[0]
+                self.polls += 1
+                if st & DONE:
+                    break
+                if time.perf_counter() - t0 > self.timeout:
+                    raise I2CError(f"I2C slave 0x{slave:02X}: timeout (status 0x{st:02X})")
+            if st & FAIL:
+                raise I2CError(f"I2C slave 0x{slave:02X}: no ACK (status 0x{st:02X})")
+            if cmd == I2C_READ:
+                return self.asic.read(I2C_DATA + 5 - n, n)
+
+    def write(self, slave: int, addr: int, addr_len: int, data: bytes):
+        if addr_len + len(data) > 5:
+            raise I2CError(f"I2C write of {addr_len}+{len(data)} bytes does not fit the 5 data registers")
+        self._cmd(I2C_WRITE, slave, addr.to_bytes(addr_len, "big") + bytes(data), addr_len + len(data))
+
+    def read(self, slave: int, addr: int, addr_len: int, n: int = 1) -> bytes:
+        if not 1 <= n <= 5:
+            raise I2CError(f"I2C read of {n} bytes (1..5)")
+        self._cmd(I2C_WRITE, slave, addr.to_bytes(addr_len, "big"), addr_len)
+        return self._cmd(I2C_READ, slave, b"", n)
+
+class Sensor:
+    """Register-level access to one sensor, with a cache keyed by (page, reg)."""
+    def __init__(self, master: I2CMaster, profile: Profile, slave: int = None, burst: int = 1):
+        self.i2c, self.p = master, profile
+        self.slave = profile.slave if slave is None else slave
+        self.burst = max(1, min(burst, 5))
+        self.cache = {}
+        self.known = set()                        # keys whose cached value was read back or loaded
+        self.page = None
+        self.written = self.skipped = 0
+
+    def _key(self, reg: int):
+        return (None if reg == self.p.page_reg else self.page, reg)
+
+    def forget(self):
+        self.cache.clear(); self.known.clear()
+
+    def load(self, regs: dict):
+        """Values the sensor is known to hold (a snapshot, --cached); writes may be skipped against them."""
+        self.cache.update(regs); self.known.update(regs)
+
+    def read(self, reg: int, n: int = 1) -> bytes:
+        out = bytearray()
+        with self.i2c.asic.xu.lock:
+            while len(out) < n:
+                k = min(self.burst, n - len(out))
+                r = reg + len(out)
+                data = self.i2c.read(self.slave, r, self.p.addr_len, k)
+                for i, v in enumerate(data):
+                    key = self._key(r + i)
+                    self.cache[key] = v; self.known.add(key)
+                    if r + i == self.p.page_reg:
+                        self.page = v & 0x7F
+                out += data
+        return bytes(out)
+
+    def write(self, reg: int, value: int, force: bool = False) -> bool:
+        """True if the register was written, False if it was read back / loaded holding value."""
+        key = self._key(reg)
+        if not force and key in self.known and self.cache[key] == value:
+            self.skipped += 1
+            if reg == self.p.page_reg:
+                self.page = value & 0x7F
+            return False
+        self.i2c.write(self.slave, reg, self.p.addr_len, bytes([value]))
+        if reg == self.p.reset[0] and value & self.p.reset[1]:
+            self.forget()                         # registers are back at their defaults
+        else:
+            self.cache[key] = value; self.known.discard(key)
+        if reg == self.p.page_reg:
+            self.page = value & 0x7F
+        self.written += 1
+        return True
+
+    def set_page(self, page):
+        if page is not None and self.p.page_reg is not None:
+            self.write(self.p.page_reg, page)
+
+    def apply(self, ops, force: bool = False):
+        """Run parsed table ops [("w", reg, val) | ("d", ms)] in one locked session."""
+        with self.i2c.asic.xu.lock:
+            for op in ops:
+                if op[0] == "d":
+                    time.sleep(op[1] / 1000)
+                else:
+                    self.write(op[1], op[2], force)
+
+    def identify(self) -> bool:
+        self.set_page(0)
+        return all(self.read(r)[0] == v for r, v in self.p.chip_id)
+
+    def snapshot(self, banks=None) -> dict:
+        """{(page, reg): value} over the profile's register banks."""
+        out = {}
+        with self.i2c.asic.xu.lock:
+            for page, start, end in banks or self.p.banks:
+                self.set_page(page)
+                for i, v in enumerate(self.read(start, end - start)):
+                    out[(page, start + i)] = v
+            self.set_page(0)
+        return out
+
+# ---------- table files ----------
+
+_NUM = re.compile(r"\b(?:0[xX])?[0-9a-fA-F]+\b")
+
+def parse_table(text: str):
+    """Table text -> [("w", reg, val) | ("d", ms)]; bare numbers are hex, as in vendor tables."""
+    ops = []
+    for n, line in enumerate(text.splitlines(), 1):
+        line = re.split(r"//|#|;", line, 1)[0].strip()
+        if not line:
+            continue
+        m = re.match(r"(?:m?sleep|delay)\s*\(?\s*(\d+)", line, re.I)
+        if m:
+            ops.append(("d", int(m[1]))); continue
+        nums = [int(t, 16) for t in _NUM.findall(line)]
+        if len(nums) < 2:
+            raise SystemExit(f"line {n}: want 'REG VALUE' ({line!r})")
+        ops.append(("w", nums[0], nums[1] & 0xFF))
+    return ops
+
+def ops_to_regs(ops, page_reg) -> dict:
+    """Replay ops offline: {(page, reg): value} as the sensor would hold them afterwards."""
+    out, page = {}, None
+    for op in ops:
+        if op[0] != "w":
+            continue
+        _, reg, val = op
+        if reg == page_reg:
+            page = val & 0x7F
+        else:
+            out[(page, reg)] = val
+    return out
+
+def format_snapshot(regs: dict, profile: Profile) -> str:
+    w = 2 * profile.addr_len
+    lines, page = [f"# {profile.name} snapshot {time.strftime('%Y-%m-%d %H:%M:%S')}"], None
+    for (p, reg), v in sorted(regs.items(), key=lambda kv: (kv[0][0] or 0, kv[0][1])):
+        if p != page and p is not None:
+            lines.append(f"0x{profile.page_reg:0{w}X} 0x{p:02X}   # page {p}"); page = p
+        lines.append(f"0x{reg:0{w}X} 0x{v:02X}")
+    if page is not None:
+        lines.append(f"0x{profile.page_reg:0{w}X} 0x00")
+    return "\n".join(lines) + "\n"
+
+def diff_regs(a: dict, b: dict):
+    """[(key, a_val, b_val)] for registers present in both that differ, plus ones only in one side (None)."""
+    return [(k, a.get(k), b.get(k)) for k in sorted(set(a) | set(b), key=lambda k: (k[0] or 0, k[1]))
+            if a.get(k) != b.get(k)]
+
+# ---------- CLI ----------
+
+def _profile(args) -> Profile:
+    return SENSORS[args.sensor]
+
+def _open(args):
+    if not args.usb and not args.device and not args.dev:
+        raise SystemExit("pass --device /dev/videoN or --usb")
+    xu = SonixXU.open(None if args.usb or args.dev else args.device, args.vid, args.pid, args.vc_if, args.dev)
+    return xu, Sensor(I2CMaster(Asic(xu)), _profile(args), args.slave, args.burst)
+
+def _stats(s: Sensor, what: str, dt: float):
+    asic = s.i2c.asic
+    print(f"[i2c] {what}: {s.written} written, {s.skipped} unchanged, {s.i2c.cmds} I2C cmds, "
+          f"{asic.reads + asic.writes} ASIC transfers in {dt * 1000:.0f} ms")
+
+def cmd_id(args, s):
+    with s.i2c.asic.xu.lock:
+        for name, p in SENSORS.items():
+            s.p, s.slave, s.page = p, p.slave if args.slave is None else args.slave, None
+            s.forget()
+            try:
+                if s.identify():
+                    print(f"[i2c] {name} at slave 0x{s.slave:02X}"); return
+            except I2CError as e:
+                print(f"[i2c] {name}: {e}")
+    raise SystemExit("[i2c] no known sensor answered")
+
+def cmd_read(args, s):
+    s.set_page(args.page)
+    data = s.read(args.reg, args.n)
+    w = 2 * s.p.addr_len
+    for i, v in enumerate(data):
+        print(f"0x{args.reg + i:0{w}X} 0x{v:02X}")
+
+def cmd_write(args, s):
+    t0 = time.perf_counter()
+    s.set_page(args.page)
+    s.apply([("w", args.reg + i, v) for i, v in enumerate(args.values)], force=True)
+    _stats(s, "write", time.perf_counter() - t0)
+
+def cmd_apply(args, s):
+    ops = parse_table(args.table.read_text())
+    t0 = time.perf_counter()
+    if args.cached:
+        s.load(ops_to_regs(parse_table(args.cached.read_text()), s.p.page_reg))
+    s.apply(ops, args.force)
+    _stats(s, f"{args.table.name} ({sum(o[0] == 'w' for o in ops)} entries)", time.perf_counter() - t0)
+    if args.save:
+        args.save.write_text(format_snapshot(s.cache, s.p))
+
+def cmd_snapshot(args, s):
+    t0 = time.perf_counter()
+    regs = s.snapshot()
+    dt = time.perf_counter() - t0
+    args.out.write_text(format_snapshot(regs, s.p))
+    print(f"[i2c] {len(regs)} registers in {dt:.2f} s → {args.out}")
+
+def cmd_diff(args):
+    p = _profile(args)
+    a = ops_to_regs(parse_table(args.a.read_text()), p.page_reg)
+    if args.b:
+        b, label = ops_to_regs(parse_table(args.b.read_text()), p.page_reg), args.b.name
+    else:
+        xu, s = _open(args)
+        with xu:
+            banks = sorted({(pg, r) for pg, r in a})
+            b = {}
+            for pg, r in banks:
+                s.set_page(pg)
+                b[(pg, r)] = s.read(r)[0]
+            s.set_page(0)
+        label = "live"
+    w = 2 * p.addr_len
+    diffs = diff_regs(a, b)
+    for (pg, reg), x, y in diffs:
+        where = f"p{pg} " if pg is not None else ""
+        fx, fy = (f"{v:02X}" if v is not None else "--" for v in (x, y))
+        print(f"  {where}0x{reg:0{w}X}  {args.a.name} {fx}  {label} {fy}")
+    print(f"[i2c] {len(diffs)} of {len(set(a) | set(b))} registers differ")
+
+def main():
+    ap = argparse.ArgumentParser(description="Sensor I2C registers through the Sonix XU")
+    ap.add_argument("--device", default=None, help="/dev/videoN (V4L2 ioctl); omit with --usb")
+    ap.add_argument("--usb", action="store_true", help="libusb on --vid/--pid instead of V4L2")
+    ap.add_argument("--vid", type=lambda x: int(x, 0), default=0x0C45)
+    ap.add_argument("--pid", type=lambda x: int(x, 0), default=0x6366)
+    ap.add_argument("--vc-if", type=int, default=0)
+    ap.add_argument("--dev", default=None, help="libusb device by serial, port or alias (snxuvc_inventory.py)")
+    ap.add_argument("--sensor", choices=sorted(SENSORS), default="gc2053")
+    ap.add_argument("--slave", type=lambda x: int(x, 0), default=None, help="override the profile's slave id")
+    ap.add_argument("--burst", type=int, default=1, help="bytes per I2C read (1..5, needs sensor auto-increment)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("id", help="probe the known sensors' chip ids").set_defaults(func=cmd_id)
+    p = sub.add_parser("read"); p.add_argument("reg", type=lambda x: int(x, 0))
+    p.add_argument("n", type=lambda x: int(x, 0), nargs="?", default=1)
+    p.add_argument("--page", type=lambda x: int(x, 0), default=None)
+    p.set_defaults(func=cmd_read)
+    p = sub.add_parser("write", help="write consecutive registers (always sent)")
+    p.add_argument("reg", type=lambda x: int(x, 0)); p.add_argument("values", nargs="+", type=lambda x: int(x, 0))
+    p.add_argument("--page", type=lambda x: int(x, 0), default=None)
+    p.set_defaults(func=cmd_write)
+    p = sub.add_parser("apply", help="replay a register table, skipping registers read back holding the value")
+    p.add_argument("table", type=Path)
+    p.add_argument("--force", action="store_true", help="write every entry")
+    p.add_argument("--cached", type=Path, default=None, help="snapshot/table the sensor is known to hold already")
+    p.add_argument("--save", type=Path, default=None, help="write the resulting register cache as a snapshot")
+    p.set_defaults(func=cmd_apply)
+    p = sub.add_parser("snapshot", help="read the profile's register banks")
+    p.add_argument("-o", "--out", type=Path, required=True)
+    p.set_defaults(func=cmd_snapshot)
+    p = sub.add_parser("diff", help="snapshot/table vs another file, or vs the live sensor")
+    p.add_argument("a", type=Path); p.add_argument("b", type=Path, nargs="?")
+    p.set_defaults(func=None)
+    args = ap.parse_args()
+    if args.cmd == "diff":
+        cmd_diff(args); return
+    xu, s = _open(args)
+    with xu:
+        try:
+            args.func(args, s)
+        except I2CError as e:
+            raise SystemExit(f"[i2c] {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+snxuvc_inventory.py — device inventory: who each camera is, discovered once and cached
+
+Identity that is expensive to learn is read once per unit and kept in a small
+sqlite database (default ~/.snxuvc/inventory.db, or $SNXUVC_INVENTORY):
+  cheap  (bus enumeration, no open) : VID:PID, bcdDevice, port path, bus address
+  string (one GET_DESCRIPTOR)       : serial
+  XU     (SonixXU session)          : chip id / DRAM (XU_Ctrl_ReadChipID, ASIC 0x101F/0x1607),
+                                      sensor (snxuvc_i2c chip-id probe),
+                                      firmware SHA-256 (128 KiB flash read-back)
+A refresh enumerates the bus only; a device whose port and bus address are
+unchanged since the last refresh is not opened at all. A re-plugged device
+(new address) costs one serial read, and the XU probes run only for units the
+database has not seen with the same serial and bcdDevice (or with --deep).
+A serial found on more than one unit (firmware that ships SN0001 on all of
+them) is no identity: those units are keyed by port, re-probed on every
+re-plug, and resolving that serial is an error.
+pyusb has no hotplug callbacks, so `watch` repeats that cheap refresh every
+--interval seconds.
+
+The rows are loaded into dicts keyed by serial, port and alias when the
+database is opened, so resolve() is a dict lookup and tools can take
+`--dev REF` (serial, port path like 1-4.2, alias or key) instead of
+enumerating:
+  python snxuvc_dump.py --dev rack3 sf-read --region params --out p.bin
+
+Usage
+  python snxuvc_inventory.py refresh                 # add/refresh present cameras
+  python snxuvc_inventory.py refresh --deep --no-fw  # re-run the XU probes, skip the flash hash
+  python snxuvc_inventory.py list [--all]
+  python snxuvc_inventory.py alias SN0042 rack3-slot07
+  python snxuvc_inventory.py show rack3-slot07
+  python snxuvc_inventory.py watch --interval 1
+  python snxuvc_inventory.py forget 1-4.2
+"""
+import argparse, hashlib, io, os, sqlite3, time
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_DB = Path(os.environ.get("SNXUVC_INVENTORY", Path.home() / ".snxuvc" / "inventory.db"))
+VID = 0x0C45
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    key TEXT PRIMARY KEY, vid INTEGER, pid INTEGER, bcd INTEGER, serial TEXT, port TEXT, address INTEGER,
+    chip TEXT, dram TEXT, sensor TEXT, fw_sha256 TEXT, alias TEXT,
+    first_seen REAL, last_seen REAL, identified REAL, present INTEGER);
+CREATE INDEX IF NOT EXISTS devices_serial ON devices(serial);
+CREATE INDEX IF NOT EXISTS devices_port ON devices(port);
+CREATE UNIQUE INDEX IF NOT EXISTS devices_alias ON devices(alias);
+"""
+FIELDS = ("key", "vid", "pid", "bcd", "serial", "port", "address", "chip", "dram", "sensor", "fw_sha256", "alias",
+          "first_seen", "last_seen", "identified", "present")
+
+def port_path(dev) -> str:
+    """'bus-port.port...' as Linux sysfs names it; stable for a given physical socket."""
+    ports = getattr(dev, "port_numbers", None) or ()
+    return f"{dev.bus}-{'.'.join(map(str, ports))}" if ports else f"{dev.bus}-a{dev.address}"
+
+def enumerate_usb(vid: int = VID, pid: int = -1):
+    import usb.core
+    from snxuvc_dump import get_backend
+    return [d for d in usb.core.find(find_all=True, idVendor=vid, backend=get_backend()) if pid == -1 or d.idProduct == pid]
+
+def read_serial(dev) -> str:
+    import usb.util
+    try:
+        return usb.util.get_string(dev, dev.iSerialNumber) if dev.iSerialNumber else ""
+    except Exception:
+        return ""                                     # no access to the string (driver/permissions)
+
+def probe(dev, vc_if: int = 0, fw: bool = True) -> dict:
+    """
+    XU identity of a pyusb device: chip, dram, sensor, fw_sha256 (None where a probe failed).
+    uvcvideo is detached only for the probe and reattached before returning.
+    """
+    from snxuvc_xu import SonixXU, UsbTransport
+    try:
+        xu = SonixXU(UsbTransport(dev, vc_if))
+    except Exception as e:
+        print(f"[inv] {port_path(dev)}: open failed: {e}")
+        return {"chip": None, "dram": None, "sensor": None, "fw_sha256": None}
+    try:
+        return _probe(xu, dev, vc_if, fw)
+    finally:
+        xu.close()
+
+def _probe(xu, dev, vc_if: int, fw: bool) -> dict:
+    from argparse import Namespace
+    out = {"chip": None, "dram": None, "sensor": None, "fw_sha256": None}
+    try:
+        info = xu.chip_id()
+        out["chip"], out["dram"] = info.name, info.dram or None
+    except Exception as e:
+        print(f"[inv] {port_path(dev)}: chip id failed: {e}")
+        return out
+    try:
+        from snxuvc_asic import Asic
+        from snxuvc_i2c import SENSORS, I2CError, I2CMaster, Sensor
+        m = I2CMaster(Asic(xu))
+        for name, p in SENSORS.items():
+            try:
+                if Sensor(m, p).identify():
+                    out["sensor"] = name; break
+            except I2CError:
+                pass
+    except Exception as e:
+        print(f"[inv] {port_path(dev)}: sensor probe failed: {e}")
+    if fw:
+        from snxfw_layout import IMAGE_SIZE
+        from snxuvc_dump import sf_read_block
+        buf = io.BytesIO()
+        try:
+            sf_read_block(dev, Namespace(xu=3, cs_set=0x23, cs_get=0x24, chunk=512, vc_if=vc_if), 0, IMAGE_SIZE, buf)
+            out["fw_sha256"] = hashlib.sha256(buf.getvalue()).hexdigest()
+        except (SystemExit, Exception) as e:
+            print(f"[inv] {port_path(dev)}: firmware read failed: {e}")
+    return out
+
+class Inventory:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+        self.rows = {r[0]: dict(zip(FIELDS, r)) for r in self.db.execute(f"SELECT {', '.join(FIELDS)} FROM devices")}
+        self._index()
+
+    def _index(self):
+        self.by_serial, self.by_port, self.by_alias = {}, {}, {}
+        self.shared = set()                           # serials that do not name one unit
+        for r in self.rows.values():
+            if r["serial"]:
+                if r["serial"] in self.by_serial or r["key"].startswith("port:"):
+                    self.shared.add(r["serial"])
+                self.by_serial.setdefault(r["serial"], []).append(r)
+            if r["alias"]:
+                self.by_alias[r["alias"]] = r
+            if r["present"] or r["port"] not in self.by_port:
+                self.by_port[r["port"]] = r           # a present device owns its port
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def resolve(self, ref: str):
+        """Row for an alias, serial, port path or key; None if unknown, SystemExit if the serial is shared."""
+        if ref in self.by_alias:
+            return self.by_alias[ref]
+        rows = self.by_serial.get(ref)
+        if rows and ref in self.shared:
+            raise SystemExit(f"[inv] serial '{ref}' is shared by {', '.join(r['key'] for r in rows)}; "
+                             "use the port path or an alias")
+        return rows[0] if rows else self.by_port.get(ref) or self.rows.get(ref)
+
+    def save(self, row: dict):
+        self.db.execute(f"INSERT OR REPLACE INTO devices ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                        [row.get(f) for f in FIELDS])
+        self.rows[row["key"]] = row
+
+    def set_alias(self, ref: str, alias: str):
+        row = self.resolve(ref)
+        if row is None:
+            raise SystemExit(f"[inv] unknown device '{ref}'")
+        other = self.by_alias.get(alias)
+        if other is not None and other is not row:
+            raise SystemExit(f"[inv] alias '{alias}' already names {other['key']}")
+        row["alias"] = alias or None
+        self.save(row); self.db.commit(); self._index()
+        return row
+
+    def forget(self, ref: str):
+        row = self.resolve(ref)
+        if row is None:
+            raise SystemExit(f"[inv] unknown device '{ref}'")
+        self.db.execute("DELETE FROM devices WHERE key = ?", (row["key"],)); self.db.commit()
+        del self.rows[row["key"]]; self._index()
+        return row
+
+    def refresh(self, devices=None, deep: bool = False, fw: bool = True, vc_if: int = 0, vid: int = VID, pid: int = -1):
+        """Sync the table with the bus. Returns {"added", "changed", "gone", "unchanged", "probed"} key lists."""
+        devices = enumerate_usb(vid, pid) if devices is None else devices
+        now = time.time()
+        res = {k: [] for k in ("added", "changed", "gone", "unchanged", "probed")}
+        seen, units = set(), []
+        for dev in devices:
+            port = port_path(dev)
+            old = self.by_port.get(port)
+            if old and old["present"] and old["address"] == dev.address and not deep:
+                units.append((dev, port, old["serial"] or "", old))     # same plug-in as last time
+            else:
+                units.append((dev, port, read_serial(dev), None))
+        # firmware that ships one serial on every unit: such serials name no unit, key those rows by port
+        count = {}
+        for _, _, serial, _ in units:
+            if serial:
+                count[serial] = count.get(serial, 0) + 1
+        shared = self.shared | {sn for sn, n in count.items() if n > 1}
+        carry = {}
+        for key, row in list(self.rows.items()):
+            if key.startswith("sn:") and row["serial"] in shared:     # it described whichever unit came first
+                carry[row["port"]] = row["alias"]
+                self.db.execute("DELETE FROM devices WHERE key = ?", (key,)); del self.rows[key]
+        for dev, port, serial, old in units:
+            if old is not None and old["key"] in self.rows:
+                old["last_seen"] = now; self.save(old)        # nothing to learn
+                seen.add(old["key"]); res["unchanged"].append(old["key"])
+                continue
+            key = f"sn:{serial}" if serial and serial not in shared else f"port:{port}"
+            row = dict(self.rows.get(key) or dict(dict.fromkeys(FIELDS), key=key, first_seen=now, alias=carry.get(port)))
+            known = (row.get("identified") and row.get("bcd") == dev.bcdDevice and row.get("chip")
+                     and serial not in shared)               # a shared serial proves nothing about a re-plug
+            row.update(vid=dev.idVendor, pid=dev.idProduct, bcd=dev.bcdDevice, serial=serial, port=port,
+                       address=dev.address, last_seen=now, present=1)
+            if deep or not known or (fw and not row.get("fw_sha256")):
+                row.update(probe(dev, vc_if, fw))
+                row["identified"] = now
+                res["probed"].append(key)
+            res["added" if key not in self.rows else "changed"].append(key)
+            self.save(row); seen.add(key)
+        for key, row in self.rows.items():
+            if row["present"] and key not in seen:
+                row["present"] = 0; self.save(row); res["gone"].append(key)
+        self.db.commit()
+        self._index()
+        return res
+
+def find_usb(row: dict, vid: int = VID):
+    """pyusb device currently at the row's port (None if it is not plugged in)."""
+    for dev in enumerate_usb(row.get("vid") or vid):
+        if port_path(dev) == row["port"]:
+            return dev
+    return None
+
+def find(ref: str, db=DEFAULT_DB):
+    """Resolve REF through the inventory and return the pyusb device; SystemExit if unknown or absent."""
+    with Inventory(db) as inv:
+        row = inv.resolve(ref)
+    if row is None:
+        raise SystemExit(f"[inv] unknown device '{ref}' (run snxuvc_inventory.py refresh)")
+    dev = find_usb(row)
+    if dev is None:
+        raise SystemExit(f"[inv] {ref} ({row['key']}) is not plugged in at {row['port']}")
+    return dev
+
+# ---------- CLI ----------
+
+def _line(r: dict) -> str:
+    seen = datetime.fromtimestamp(r["last_seen"]).strftime("%Y-%m-%d %H:%M") if r["last_seen"] else "-"
+    return (f"{'*' if r['present'] else ' '} {r['key']:<22s} {r['vid'] or 0:04x}:{r['pid'] or 0:04x} bcd {r['bcd'] or 0:04x} "
+            f"port {r['port']:<10s} {r['chip'] or '?':<9s} {r['sensor'] or '?':<7s} "
+            f"fw {(r['fw_sha256'] or '?')[:12]:<12s} {r['alias'] or '':<14s} {seen}")
+
+def _summary(res: dict, dt: float):
+    print(f"[inv] {len(res['added'])} added, {len(res['changed'])} changed, {len(res['gone'])} gone, "
+          f"{len(res['unchanged'])} unchanged, {len(res['probed'])} probed in {dt * 1000:.0f} ms")
+
+def cmd_refresh(args, inv):
+    t0 = time.perf_counter()
+    res = inv.refresh(deep=args.deep, fw=not args.no_fw, vc_if=args.vc_if, vid=args.vid, pid=args.pid)
+    _summary(res, time.perf_counter() - t0)
+    for k in res["added"] + res["changed"]:
+        print(_line(inv.rows[k]))
+
+def cmd_list(args, inv):
+    for r in sorted(inv.rows.values(), key=lambda r: (not r["present"], r["port"] or "")):
+        if r["present"] or args.all:
+            print(_line(r))
+
+def cmd_show(args, inv):
+    r = inv.resolve(args.ref)
+    if r is None:
+        raise SystemExit(f"[inv] unknown device '{args.ref}'")
+    for f in FIELDS:
+        v = r[f]
+        if f in ("first_seen", "last_seen", "identified") and v:
+            v = datetime.fromtimestamp(v).isoformat(timespec="seconds")
+        elif f in ("vid", "pid", "bcd") and v is not None:
+            v = f"{v:04x}"
+        print(f"{f:<11s} {v}")
+
+def cmd_alias(args, inv):
+    print(_line(inv.set_alias(args.ref, args.alias)))
+
+def cmd_forget(args, inv):
+    print(f"[inv] forgot {inv.forget(args.ref)['key']}")
+
+def cmd_watch(args, inv):
+    print(f"[inv] watching {args.vid:04x}:{'*' if args.pid == -1 else f'{args.pid:04x}'} every {args.interval}s (Ctrl+C to stop)")
+    try:
+        while True:
+            t0 = time.perf_counter()
+            res = inv.refresh(fw=not args.no_fw, vc_if=args.vc_if, vid=args.vid, pid=args.pid)
+            if res["added"] or res["changed"] or res["gone"]:
+                _summary(res, time.perf_counter() - t0)
+                for k in res["added"] + res["changed"]:
+                    print("+", _line(inv.rows[k]))
+                for k in res["gone"]:
+                    print("-", _line(inv.rows[k]))
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    ap = argparse.ArgumentParser(description="Cached identity of attached Sonix cameras")
+    ap.add_argument("--db", type=Path, default=DEFAULT_DB)
+    ap.add_argument("--vid", type=lambda x: int(x, 0), default=VID)
+    ap.add_argument("--pid", type=lambda x: int(x, 0), default=-1, help="-1 = any PID of --vid")
+    ap.add_argument("--vc-if", type=int, default=0)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("refresh", help="sync with the bus, probe new units")
+    p.add_argument("--deep", action="store_true", help="re-run the XU probes on every present device")
+    p.add_argument("--no-fw", action="store_true", help="skip the firmware hash (128 KiB read per new unit)")
+    p.set_defaults(func=cmd_refresh)
+    p = sub.add_parser("list"); p.add_argument("--all", action="store_true", help="include unplugged units")
+    p.set_defaults(func=cmd_list)
+    p = sub.add_parser("show"); p.add_argument("ref"); p.set_defaults(func=cmd_show)
+    p = sub.add_parser("alias", help="name a unit (empty string clears)"); p.add_argument("ref"); p.add_argument("alias")
+    p.set_defaults(func=cmd_alias)
+    p = sub.add_parser("forget"); p.add_argument("ref"); p.set_defaults(func=cmd_forget)
+    p = sub.add_parser("watch", help="refresh on an interval, print plug/unplug events")
+    p.add_argument("--interval", type=float, default=1.0); p.add_argument("--no-fw", action="store_true")
+    p.set_defaults(func=cmd_watch)
+    args = ap.parse_args()
+    with Inventory(args.db) as inv:
+        args.func(args, inv)
+
+if __name__ == "__main__":
+    main()
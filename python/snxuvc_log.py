@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+snxuvc_log.py — bounded GUI log: ring buffer, timed batch flushes, level/tag filter, rotating spill
+
+The GUIs used to insert() + see() into a tk.Text for every line, so a long
+brute-force run made each update slower and the widget grew without bound.
+Here:
+  LogBuffer  thread-safe, fixed-size ring of (seq, time, level, tag, text); every
+             line also goes to a rotating file (batched writes, spill -> spill.1 .. .N)
+             so nothing is lost when the ring wraps. Safe to call from any thread.
+  LogView    ttk frame with a read-only Text that shows at most `max_lines` of the
+             ring. A Tk timer drains new lines every `interval` ms and inserts them
+             in one call; filter changes rebuild the view from the ring. Autoscroll
+             only while the view is at the bottom.
+The tag is the leading "[tag]" of a line unless given; the level is guessed
+from the text ("failed"/"error" -> error, "warn" -> warn) unless given.
+
+Usage
+  buf = LogBuffer(capacity=20000, spill="logs/gui.log")
+  view = LogView(parent, buf); view.grid(...)
+  buf.add("[h264] gop 30")                 # from any thread
+  python snxuvc_log.py demo --rate 2000    # stress the view (lines/s)
+"""
+import argparse, os, re, threading, time
+from collections import deque
+
+import tkinter as tk
+from tkinter import ttk
+
+LEVELS = ("debug", "info", "warn", "error")
+_TAG = re.compile(r"\s*\[([^\]]+)\]")
+_ERR = re.compile(r"\b(failed|error|exception)\b", re.I)
+_WARN = re.compile(r"\bwarn(ing)?\b|\bFAIL\b", re.I)
+
+def guess_level(text: str) -> str:
+    return "error" if _ERR.search(text) else "warn" if _WARN.search(text) else "info"
+
+class LogBuffer:
+    def __init__(self, capacity: int = 20000, spill: str = None, max_bytes: int = 10 << 20, backups: int = 5):
+        self.ring = deque(maxlen=capacity)
+        self.pending = deque(maxlen=capacity)     # lines added since the view last drained
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.tags = set()
+        self.spill, self.max_bytes, self.backups = spill, max_bytes, backups
+        self._out, self._f = [], None
+        if spill:
+            os.makedirs(os.path.dirname(os.path.abspath(spill)), exist_ok=True)
+            self._f = open(spill, "a", encoding="utf-8")
+
+    def add(self, text: str, level: str = None, tag: str = None):
+        if tag is None:
+            m = _TAG.match(text)
+            tag = m.group(1) if m else ""
+        level = level or guess_level(text)
+        now = time.time()
+        with self.lock:
+            self.seq += 1
+            rec = (self.seq, now, level, tag, text)
+            self.ring.append(rec)
+            self.pending.append(rec)
+            self.tags.add(tag)
+            if self._f:
+                self._out.append(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}.{int(now * 1000) % 1000:03d} {level:<5s} {text}\n")
+                if len(self._out) >= 256:
+                    self._flush()
+
+    def _flush(self):
+        """Write the batched spill lines; rotate spill -> spill.1 .. spill.N past max_bytes (lock held)."""
+        self._f.write("".join(self._out)); self._out = []
+        self._f.flush()
+        if self._f.tell() < self.max_bytes:
+            return
+        self._f.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.spill}.{i}"):
+                os.replace(f"{self.spill}.{i}", f"{self.spill}.{i + 1}")
+        if self.backups:
+            os.replace(self.spill, f"{self.spill}.1")
+        self._f = open(self.spill, "w", encoding="utf-8")
+
+    def flush(self):
+        with self.lock:
+            if self._f and self._out:
+                self._flush()
+
+    def drain(self) -> list:
+        with self.lock:
+            out = list(self.pending); self.pending.clear()
+            if self._f and self._out:
+                self._flush()
+        return out
+
+    def snapshot(self) -> list:
+        with self.lock:
+            return list(self.ring)
+
+    def clear(self):
+        with self.lock:
+            self.ring.clear(); self.pending.clear()
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            if self._f:
+                self._f.close(); self._f = None
+
+class LogView(ttk.Frame):
+    def __init__(self, parent, buf: LogBuffer, max_lines: int = 2000, interval: int = 100, height: int = 10):
+        super().__init__(parent)
+        self.buf, self.max_lines, self.interval = buf, max_lines, interval
+        self.grid_rowconfigure(1, weight=1); self.grid_columnconfigure(0, weight=1)
+
+        bar = ttk.Frame(self); bar.grid(row=0, column=0, columnspan=2, sticky="ew")
+        ttk.Label(bar, text="Level").pack(side="left")
+        self.level = tk.StringVar(value="debug")
+        ttk.Combobox(bar, textvariable=self.level, values=LEVELS, width=6, state="readonly").pack(side="left", padx=2)
+        ttk.Label(bar, text="Tag").pack(side="left")
+        self.tag = tk.StringVar(value="")
+        self.tag_combo = ttk.Combobox(bar, textvariable=self.tag, width=12, postcommand=self._tags)
+        self.tag_combo.pack(side="left", padx=2)
+        ttk.Label(bar, text="Find").pack(side="left")
+        self.find = tk.StringVar(value="")
+        ttk.Entry(bar, textvariable=self.find, width=16).pack(side="left", padx=2)
+        ttk.Button(bar, text="Clear", command=self.clear).pack(side="left", padx=4)
+        self.count = ttk.Label(bar, text=""); self.count.pack(side="right")
+        for v in (self.level, self.tag, self.find):
+            v.trace_add("write", lambda *_: self.rebuild())
+
+        self.text = tk.Text(self, height=height, wrap="none", state="disabled")
+        self.text.grid(row=1, column=0, sticky="nsew")
+        sb = ttk.Scrollbar(self, orient="vertical", command=self.text.yview); sb.grid(row=1, column=1, sticky="ns")
+        self.text.configure(yscrollcommand=sb.set)
+        self.text.tag_configure("warn", foreground="#b36b00")
+        self.text.tag_configure("error", foreground="#c00000")
+        self.after(self.interval, self._tick)
+
+    def _tags(self):
+        with self.buf.lock:
+            self.tag_combo["values"] = [""] + sorted(t for t in self.buf.tags if t)
+
+    def _match(self, rec) -> bool:
+        _, _, level, tag, text = rec
+        return (LEVELS.index(level) >= LEVELS.index(self.level.get())
+                and (not self.tag.get() or tag == self.tag.get())
+                and (not self.find.get() or self.find.get().lower() in text.lower()))
+
+    def _insert(self, recs):
+        recs = [r for r in recs if self._match(r)][-self.max_lines:]
+        if not recs:
+            return
+        at_end = self.text.yview()[1] >= 0.999
+        t = self.text
+        t.configure(state="normal")
+        run, lvl = [], recs[0][2]                  # one insert per run of equal level
+        for r in recs:
+            if r[2] != lvl:
+                t.insert("end", "".join(run), lvl); run, lvl = [], r[2]
+            run.append(r[4] + "\n")
+        t.insert("end", "".join(run), lvl)
+        lines = int(t.index("end-1c").split(".")[0]) - 1
+        if lines > self.max_lines:
+            t.delete("1.0", f"{lines - self.max_lines + 1}.0")
+        t.configure(state="disabled")
+        if at_end:
+            t.see("end")
+
+    def _tick(self):
+        try:
+            self._insert(self.buf.drain())
+            self.count.configure(text=f"{self.buf.seq} lines")
+        finally:
+            self.after(self.interval, self._tick)
+
+    def rebuild(self):
+        self.buf.drain()                           # everything pending is in the snapshot too
+        self.text.configure(state="normal"); self.text.delete("1.0", "end"); self.text.configure(state="disabled")
+        self._insert(self.buf.snapshot())
+
+    def clear(self):
+        self.buf.clear()
+        self.rebuild()
+
+# ---------- demo ----------
+
+def main():
+    ap = argparse.ArgumentParser(description="Bounded log view stress test")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("demo", help="open a window and feed it lines from a thread")
+    d.add_argument("--rate", type=float, default=1000, help="lines per second")
+    d.add_argument("--capacity", type=int, default=20000)
+    d.add_argument("--max-lines", type=int, default=2000)
+    d.add_argument("--spill", default=None, help="rotating log file")
+    args = ap.parse_args()
+
+    root = tk.Tk(); root.title("snxuvc_log demo")
+    buf = LogBuffer(args.capacity, args.spill)
+    view = LogView(root, buf, args.max_lines, height=30); view.pack(fill="both", expand=True)
+    def feed():
+        n, t0 = 0, time.monotonic()
+        while True:
+            n += 1
+            buf.add(f"[BRUTE] S{n % 32:02d} SET 00 0{n % 8} -> {'FAIL' if n % 17 == 0 else 'OK'}")
+            if n % 1000 == 0:
+                buf.add(f"[demo] {n} lines, {n / (time.monotonic() - t0):.0f}/s")
+            time.sleep(max(0.0, t0 + n / args.rate - time.monotonic()))
+    threading.Thread(target=feed, daemon=True).start()
+    root.mainloop()
+    buf.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,28 @@
 #!/usr/bin/env python3
 # Probe UVC Extension Unit mapping for Sonix SPI read (Windows, PyUSB + libusb-package)
-import sys, binascii
+import os, sys, binascii
 import usb.core, usb.util
 from usb.backend import libusb1
 from array import array
 
-# ---- backend wiring ----
-try:
-    import libusb_package
-    BACKEND = libusb1.get_backend(find_library=libusb_package.find_library)
-except Exception:
-    BACKEND = libusb1.get_backend()
-if BACKEND is None:
-    sys.exit("libusb backend not found. pip install libusb-package")
+# ---- backend wiring (resolved in main(); assign BACKEND to override) ----
+BACKEND = None
+
+def get_backend():
+    global BACKEND
+    if BACKEND is None:
+        if os.environ.get("SNXUVC_SIM"):
+            import snxuvc_sim   # simulated camera for offline runs / benchmarks
+            BACKEND = snxuvc_sim.from_env()
+        else:
+            try:
+                import libusb_package
+                BACKEND = libusb1.get_backend(find_library=libusb_package.find_library)
+            except Exception:
+                BACKEND = libusb1.get_backend()
+        if BACKEND is None:
+            sys.exit("libusb backend not found. pip install libusb-package")
+    return BACKEND
 
 VID, PID, VC_IF = 0x0C45, 0x6366, 0
 XU_CANDIDATES = list(range(1, 9))
@@ -49,7 +59,7 @@ def uvc_xu_get(dev, xu, cs, length):
     return bytes(data)
 
 def main():
-    dev = usb.core.find(idVendor=VID, idProduct=PID, backend=BACKEND)
+    dev = usb.core.find(idVendor=VID, idProduct=PID, backend=get_backend())
     if not dev:
         sys.exit("Device 0C45:6366 not found.")
     print("Probing…")
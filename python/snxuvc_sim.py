@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+snxuvc_sim.py — stand-in pyusb backend: a simulated SN9C292 camera for offline runs
+
+A usb.backend.IBackend that enumerates one or more fake 0C45:6366 cameras and
+answers control transfers the way the XU code expects:
+  SYS unit 3  cs 0x23/0x24 : SF read (SET [a2 a1 a0 n1 n0], GET n bytes of the image)
+              cs 1         : ASIC_RW over a 64 KiB register file (0x101F = 0x92)
+  USR unit 4  cs 2..9      : echoes the last SET payload per selector
+  GET_DESCRIPTOR(STRING)   : language ids and the serial number
+Anything else stalls (USBError EPIPE), so probes walk the unit/selector space
+as they do on hardware. Every transfer takes `latency` seconds (spin-wait, so
+sub-millisecond latencies are honoured) to model EP0 round trips.
+
+Tools pick it up through the environment, without code changes:
+  SNXUVC_SIM=1                       one camera with the stock image
+  SNXUVC_SIM=dump.bin                 one camera with that image
+  SNXUVC_SIM_COUNT=8 SNXUVC_SIM_LATENCY=0.0005
+Usage
+  SNXUVC_SIM=1 python snxuvc_dump.py sf-info
+  SNXUVC_SIM=1 python snxuvc_dump.py sf-read --region params --out p.bin
+  python snxuvc_bench.py run            # uses this backend directly
+"""
+import array, errno, os, time
+from pathlib import Path
+
+import usb.backend
+from usb.core import USBError
+
+STOCK_IMAGE = Path(__file__).resolve().parent.parent / "camera info" / "firmware_backup_raw.bin"
+UVC_SET_CUR, UVC_GET_CUR = 0x01, 0x81
+
+class _Desc:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+class SimCamera:
+    """State of one fake camera; also usable on its own as an XU target."""
+    def __init__(self, image: bytes = None, serial: str = "SIM0001", bus: int = 1, port: int = 1, address: int = 2,
+                 latency: float = 0.0):
+        self.image = image if image is not None else (STOCK_IMAGE.read_bytes() if STOCK_IMAGE.exists() else bytes(0x20000))
+        self.serial, self.bus, self.port, self.address, self.latency = serial, bus, port, address, latency
+        self.asic = bytearray(0x10000)
+        self.asic[0x101F], self.asic[0x1607] = 0x92, 0x00
+        self.asic_addr = 0
+        self.sf = (0, 0)
+        self.usr = {}
+        self.transfers = 0
+
+    def _wait(self):
+        self.transfers += 1
+        if self.latency:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+
+    def xu_set(self, unit: int, cs: int, data: bytes):
+        if unit == 3 and cs == 0x23 and len(data) >= 5:
+            self.sf = ((data[0] << 16) | (data[1] << 8) | data[2], (data[3] << 8) | data[4])
+        elif unit == 3 and cs == 0x01 and len(data) == 4:
+            addr = data[0] | data[1] << 8
+            if data[3] == 0xFF:
+                self.asic_addr = addr                 # dummy write before a read
+            else:
+                self.asic[addr] = data[2]
+        elif unit == 4 and 2 <= cs <= 9:
+            self.usr[cs] = bytes(data)
+        else:
+            raise USBError("Pipe error", errno.EPIPE)
+
+    def xu_get(self, unit: int, cs: int, n: int) -> bytes:
+        if unit == 3 and cs == 0x24:
+            a, ln = self.sf
+            a %= len(self.image)                      # SPI flash wraps at the chip size
+            return (self.image[a:a + min(n, ln)] + bytes(n))[:n]
+        if unit == 3 and cs == 0x01:
+            return bytes([0, 0, self.asic[self.asic_addr], 0])[:n]
+        if unit == 4 and 2 <= cs <= 9:
+            return (self.usr.get(cs, b"") + bytes(n))[:n]
+        raise USBError("Pipe error", errno.EPIPE)
+
+    def control(self, bm: int, br: int, wValue: int, wIndex: int, data):
+        self._wait()
+        unit, cs = wIndex >> 8, wValue >> 8
+        if bm == 0x21 and br == UVC_SET_CUR:
+            self.xu_set(unit, cs, bytes(data))
+            return len(data)
+        if bm == 0xA1 and br == UVC_GET_CUR:
+            return self.xu_get(unit, cs, data)
+        if bm == 0x80 and br == 0x06 and wValue >> 8 == 0x03:
+            if wValue & 0xFF == 0:
+                return bytes([4, 3, 0x09, 0x04])[:data]
+            s = self.serial.encode("utf-16le")
+            return bytes([2 + len(s), 3]) + s
+        raise USBError("Pipe error", errno.EPIPE)
+
+class SimBackend(usb.backend.IBackend):
+    def __init__(self, cameras):
+        self.cams = list(cameras)
+
+    def enumerate_devices(self):
+        return iter(self.cams)
+
+    def get_device_descriptor(self, cam):
+        return _Desc(bLength=18, bDescriptorType=1, bcdUSB=0x0200, bDeviceClass=0xEF, bDeviceSubClass=2,
+                     bDeviceProtocol=1, bMaxPacketSize0=64, idVendor=0x0C45, idProduct=0x6366, bcdDevice=0x0100,
+                     iManufacturer=0, iProduct=0, iSerialNumber=3, bNumConfigurations=1,
+                     address=cam.address, bus=cam.bus, port_number=cam.port, port_numbers=(cam.port,), speed=3)
+
+    def get_configuration_descriptor(self, cam, config):
+        return _Desc(bLength=9, bDescriptorType=2, wTotalLength=9 + 2 * 9, bNumInterfaces=2, bConfigurationValue=1,
+                     iConfiguration=0, bmAttributes=0x80, bMaxPower=250, extra_descriptors=[])
+
+    def get_interface_descriptor(self, cam, intf, alt, config):
+        if intf > 1 or alt > 0:
+            raise IndexError("no such interface")     # pyusb walks alt settings until this
+        return _Desc(bLength=9, bDescriptorType=4, bInterfaceNumber=intf, bAlternateSetting=0, bNumEndpoints=0,
+                     bInterfaceClass=0x0E, bInterfaceSubClass=1 + intf, bInterfaceProtocol=0, iInterface=0,
+                     extra_descriptors=[])
+
+    def open_device(self, cam):
+        return cam
+
+    def close_device(self, handle):
+        pass
+
+    def get_configuration(self, handle):
+        return 1
+
+    def set_configuration(self, handle, value):
+        pass
+
+    def claim_interface(self, handle, intf):
+        pass
+
+    def release_interface(self, handle, intf):
+        pass
+
+    def is_kernel_driver_active(self, handle, intf):
+        return False
+
+    def detach_kernel_driver(self, handle, intf):
+        pass
+
+    def get_parent(self, cam):
+        return None
+
+    def ctrl_transfer(self, handle, bmRequestType, bRequest, wValue, wIndex, data, timeout):
+        if bmRequestType & 0x80:
+            n = data if isinstance(data, int) else len(data)
+            out = handle.control(bmRequestType, bRequest, wValue, wIndex, n)
+            if isinstance(data, int):
+                return array.array("B", out)
+            data[:len(out)] = array.array("B", out)
+            return len(out)
+        return handle.control(bmRequestType, bRequest, wValue, wIndex, data)
+
+def backend(image=None, count: int = 1, latency: float = 0.0) -> SimBackend:
+    img = Path(image).read_bytes() if image else None
+    return SimBackend(SimCamera(img, f"SIM{i + 1:04d}", 1, i + 1, i + 2, latency) for i in range(count))
+
+def from_env():
+    """Backend described by SNXUVC_SIM / SNXUVC_SIM_COUNT / SNXUVC_SIM_LATENCY, or None if SNXUVC_SIM is unset."""
+    spec = os.environ.get("SNXUVC_SIM")
+    if not spec:
+        return None
+    return backend(None if spec == "1" else spec, int(os.environ.get("SNXUVC_SIM_COUNT", 1)),
+                   float(os.environ.get("SNXUVC_SIM_LATENCY", 0)))
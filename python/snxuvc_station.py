@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+snxuvc_station.py — headless production station: plug a camera in, get a verdict in the JSON log
+
+The station watches the bus for the configured VID:PIDs (pyusb has no hotplug
+callbacks, so it polls the enumeration — no device is opened for that) and
+runs a pipeline on every new plug-in, one worker thread per device:
+  identify  : serial, chip id, sensor (snxuvc_inventory.probe; no flash hash)
+  dump      : full read-back to dump_dir and diff against the golden image
+  verify    : stratified sampled read-back (snxuvc_dump.sample_verify), escalating
+              to a full read-back + sector diff on mismatch
+  reflash   : run flash_cmd for the differing sector runs only ("sectors") or
+              once for the whole image ("full"); skipped when nothing differs
+  postcheck : after a reflash, wait for the camera to re-enumerate on the same
+              port (only if "reenumerates": the flasher resets it), read back the rewritten sectors in full and re-run the sample
+The flash stages detach uvcvideo from the VC interface (again after a
+re-enumeration) and the device gets it back when the pipeline ends. Each stage is timed. One JSON line per device goes to the log (identity,
+stage timings, differing sectors, verdict), and a unit stays claimed until
+it is unplugged, so re-enumeration after a flash does not start it again.
+
+No XU command writes the SPI flash (sonix_xu_ctrls.c has FLASH_CTRL reads
+only), so reflash runs an external flasher. Placeholders in flash_cmd:
+  {image} golden path  {part} file holding golden[addr:end]  {addr} {end} {len} (hex)
+  {port} {serial}
+With more than one worker, flash_cmd must name the unit ({port} or {serial});
+a flasher that picks "the" camera itself would write whichever one it finds.
+
+Config (JSON; command-line flags override)
+  {"match": ["0c45:6366"], "golden": "golden.bin",
+   "pipeline": ["identify", "verify", "reflash", "postcheck"],
+   "confidence": 0.99, "ignore": ["0x100C0:0x40"], "dump_dir": "dumps",
+   "flash_cmd": "sonix_burn.exe -d {port} -f {part} -a {addr}", "flash_mode": "sectors",
+   "workers": 8, "log": "station.jsonl", "interval": 0.5, "reenumerates": true, "reconnect_timeout": 20}
+
+Usage
+  python snxuvc_station.py --config station.json
+  python snxuvc_station.py --golden golden.bin --pipeline identify,verify --log line3.jsonl
+  python snxuvc_station.py --config station.json --once        # run the pipeline on what is plugged in now
+"""
+import argparse, json, shlex, subprocess, tempfile, threading, time
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+STAGES = ("identify", "dump", "verify", "reflash", "postcheck")
+DEFAULTS = {
+    "match": ["0c45:6366"], "golden": None, "pipeline": ["identify", "verify"],
+    "confidence": 0.99, "defect": 0x1000, "ignore": [], "must": [], "variants": [],
+    "dump_dir": "dumps", "flash_cmd": None, "flash_mode": "sectors",
+    "workers": 8, "log": "station.jsonl", "interval": 0.5, "reenumerates": True, "reconnect_timeout": 20.0,
+    "vc_if": 0, "chunk": 512,
+}
+
+class StageFail(Exception):
+    pass
+
+def load_config(path=None, **over) -> dict:
+    cfg = dict(DEFAULTS)
+    if path:
+        cfg.update(json.loads(Path(path).read_text()))
+    cfg.update({k: v for k, v in over.items() if v is not None})
+    bad = [s for s in cfg["pipeline"] if s not in STAGES]
+    if bad:
+        raise SystemExit(f"unknown stage(s) {', '.join(bad)} (have: {', '.join(STAGES)})")
+    if set(cfg["pipeline"]) & {"dump", "verify", "reflash", "postcheck"} and not cfg["golden"]:
+        raise SystemExit("the pipeline needs a golden image (--golden or \"golden\" in the config)")
+    if "reflash" in cfg["pipeline"] and not cfg["flash_cmd"]:
+        raise SystemExit("reflash needs flash_cmd in the config")
+    if ("reflash" in cfg["pipeline"] and cfg["workers"] > 1
+            and "{port}" not in cfg["flash_cmd"] and "{serial}" not in cfg["flash_cmd"]):
+        raise SystemExit("flash_cmd names no device ({port} or {serial}); with several workers it could "
+                         "flash the wrong camera — add one or set \"workers\": 1")
+    cfg["match"] = [tuple(int(x, 16) for x in m.split(":")) for m in cfg["match"]]
+    return cfg
+
+class Station:
+    def __init__(self, cfg: dict):
+        from snxfw_sample import parse_span
+        self.cfg = cfg
+        self.golden = Path(cfg["golden"]).read_bytes() if cfg["golden"] else None
+        self.xargs = Namespace(xu=3, cs_set=0x23, cs_get=0x24, chunk=cfg["chunk"], vc_if=cfg["vc_if"],
+                               confidence=cfg["confidence"], defect=cfg["defect"], seed=None, progress=False,
+                               must=[parse_span(s) for s in cfg["must"]], ignore=[parse_span(s) for s in cfg["ignore"]],
+                               variants=cfg["variants"])
+        self.pool = ThreadPoolExecutor(cfg["workers"], thread_name_prefix="station")
+        self.log_lock = threading.Lock()
+        self.claimed = {}                         # port -> bus address of the plug-in being / already handled
+        self.busy = set()                         # ports with a running job (kept through re-enumeration)
+        self.results = []
+
+    # --- bus ---
+    def enumerate(self):
+        from snxuvc_inventory import enumerate_usb, port_path
+        out = {}
+        for vid in {v for v, _ in self.cfg["match"]}:
+            for dev in enumerate_usb(vid):
+                if (dev.idVendor, dev.idProduct) in self.cfg["match"]:
+                    out[port_path(dev)] = dev
+        return out
+
+    def wait_port(self, port: str, old_address: int = None):
+        """
+        The device at `port` once it has re-enumerated (new address), or any device there after the
+        timeout. Without "reenumerates" the device already there is taken as is.
+        """
+        if not self.cfg["reenumerates"]:
+            old_address = None
+        t0, dev = time.time(), None
+        while time.time() - t0 < self.cfg["reconnect_timeout"]:
+            dev = self.enumerate().get(port)
+            if dev is not None and dev.address != old_address:
+                return dev
+            time.sleep(0.25)
+        return dev
+
+    def poll(self):
+        """Start jobs for new plug-ins; release ports whose device is gone."""
+        present = self.enumerate()
+        for port in [p for p in self.claimed if p not in present and p not in self.busy]:
+            del self.claimed[port]
+        for port, dev in present.items():
+            if port not in self.claimed:
+                self.claimed[port] = dev.address
+                self.busy.add(port)
+                self.pool.submit(self.run, dev, port).add_done_callback(self._crashed)
+
+    @staticmethod
+    def _crashed(fut):
+        e = fut.exception()
+        if e is not None:                          # run() itself failed (log write ...), not a stage
+            print(f"[station] worker died: {type(e).__name__}: {e}", flush=True)
+
+    # --- uvcvideo holds the VC interface; take it for the flash reads, give it back at the end ---
+    def _hold(self, job):
+        dev = job["dev"]
+        if job.get("held") is dev:
+            return
+        if job.get("held") is not None:            # re-enumerated: the old handle is stale
+            import usb.util
+            usb.util.dispose_resources(job["held"])
+        try:
+            if dev.is_kernel_driver_active(self.cfg["vc_if"]):
+                dev.detach_kernel_driver(self.cfg["vc_if"])
+                job["reattach"] = dev
+        except NotImplementedError:                # Windows / backend without the query
+            pass
+        job["held"] = dev
+
+    def _release(self, job):
+        import usb.util
+        dev = job.pop("reattach", None)
+        if dev is not None and dev is job["dev"]:  # not if the flasher reset it under us
+            try:
+                dev.attach_kernel_driver(self.cfg["vc_if"])
+            except Exception as e:
+                print(f"[station] {job['port']}: uvcvideo reattach failed: {e}")
+        if job.get("held") is not None:
+            usb.util.dispose_resources(job["held"])
+
+    # --- stages ---
+    def s_identify(self, job):
+        from snxuvc_inventory import probe, read_serial
+        job["serial"] = read_serial(job["dev"])
+        info = probe(job["dev"], self.cfg["vc_if"], fw=False)
+        job.update(info)
+        if not info["chip"]:
+            raise StageFail("no answer on the XU (chip id)")
+        return {"serial": job["serial"], "chip": info["chip"], "sensor": info["sensor"]}
+
+    def s_dump(self, job):
+        from snxuvc_dump import full_verify
+        data, bad, sectors = full_verify(job["dev"], self.xargs, self.golden)
+        name = "_".join(filter(None, (job.get("serial"), job["port"], f"{datetime.now():%Y%m%d_%H%M%S}")))
+        out = Path(self.cfg["dump_dir"]) / f"{name}.bin"      # serials repeat across a batch; the port does not, per job
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_bytes(data)
+        job["sectors"] = sectors
+        return {"file": str(out), "diff_bytes": sum(e - s for s, e in bad), "sectors": _hex(sectors)}
+
+    def s_verify(self, job):
+        from snxuvc_dump import full_verify, sample_verify
+        if "sectors" in job:                       # a dump already diffed the whole image
+            return {"skipped": "dump"}
+        info, nread, bad = sample_verify(job["dev"], self.xargs, self.golden)
+        out = {"sampled_bytes": nread, "p_defect": round(info["p_defect"], 4), "sample_bad": len(bad)}
+        job["sectors"] = []
+        if bad:
+            _, full, sectors = full_verify(job["dev"], self.xargs, self.golden)
+            job["sectors"] = sectors
+            out.update(diff_bytes=sum(e - s for s, e in full), sectors=_hex(sectors))
+        return out
+
+    def s_reflash(self, job):
+        sectors = job.get("sectors")
+        if sectors is None:
+            raise StageFail("reflash needs a dump or verify stage before it")
+        if not sectors:
+            return {"skipped": "image matches"}
+        runs = [(0, len(self.golden))] if self.cfg["flash_mode"] == "full" else sectors
+        for a, e in runs:
+            with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+                f.write(self.golden[a:e])
+            cmd = self.cfg["flash_cmd"].format(image=self.cfg["golden"], part=f.name, addr=f"0x{a:X}", end=f"0x{e:X}",
+                                               len=f"0x{e - a:X}", port=job["port"], serial=job.get("serial", ""))
+            try:
+                r = subprocess.run(shlex.split(cmd), capture_output=True, text=True)
+            finally:
+                Path(f.name).unlink(missing_ok=True)
+            if r.returncode:
+                raise StageFail(f"flasher exit {r.returncode} at 0x{a:06X}: {(r.stderr or r.stdout).strip()[-200:]}")
+        job["flashed"] = runs
+        return {"runs": _hex(runs), "bytes": sum(e - a for a, e in runs)}
+
+    def s_postcheck(self, job):
+        import io, snxfw_sample as smp
+        from snxuvc_dump import sample_verify, sf_read_block
+        if not job.get("flashed"):
+            return {"skipped": "no reflash"}
+        dev = self.wait_port(job["port"], job["dev"].address)
+        if dev is None:
+            raise StageFail(f"device did not come back on {job['port']}")
+        job["dev"] = dev
+        self.claimed[job["port"]] = dev.address
+        self._hold(job)                            # a fresh device: uvcvideo bound it again
+        bad = []
+        for a, e in job["flashed"]:
+            buf = io.BytesIO(); sf_read_block(dev, self.xargs, a, e - a, buf)
+            bad += smp.compare(self.golden, a, buf.getvalue(), self.xargs.ignore)
+        _, nread, sbad = sample_verify(dev, self.xargs, self.golden)
+        if bad or sbad:
+            raise StageFail(f"still differs after reflash: {_hex(bad + sbad)[:8]}")
+        return {"reread_bytes": sum(e - a for a, e in job["flashed"]), "sampled_bytes": nread}
+
+    # --- one device ---
+    def run(self, dev, port):
+        try:
+            return self._run({"dev": dev, "port": port})
+        finally:
+            self.busy.discard(port)
+
+    def _run(self, job):
+        dev, port = job["dev"], job["port"]
+        rec = {"time": datetime.now().isoformat(timespec="seconds"), "port": port,
+               "usb": f"{dev.idVendor:04x}:{dev.idProduct:04x}", "bcd": f"{dev.bcdDevice:04x}", "stages": []}
+        t0 = time.perf_counter()
+        verdict = "pass"
+        for name in self.cfg["pipeline"]:
+            ts = time.perf_counter()
+            st = {"stage": name}
+            try:
+                if name in ("dump", "verify"):
+                    self._hold(job)
+                st.update(getattr(self, f"s_{name}")(job) or {})
+                st["ok"] = True
+            except StageFail as e:
+                st.update(ok=False, error=str(e)); verdict = "fail"
+            except Exception as e:                     # USB errors, short reads, flasher not found ...
+                st.update(ok=False, error=f"{type(e).__name__}: {e}"); verdict = "error"
+            st["s"] = round(time.perf_counter() - ts, 3)
+            rec["stages"].append(st)
+            if not st["ok"]:
+                break
+        try:
+            self._release(job)
+        except Exception as e:
+            print(f"[station] {port}: {e}")
+        if verdict == "pass" and job.get("flashed"):
+            verdict = "reflashed"
+        elif verdict == "pass" and job.get("sectors"):
+            verdict = "mismatch"                          # differs, no reflash stage configured
+        rec.update({k: job.get(k) for k in ("serial", "chip", "sensor") if job.get(k) is not None})
+        rec.update(verdict=verdict, s=round(time.perf_counter() - t0, 3))
+        with self.log_lock:
+            with open(self.cfg["log"], "a") as f:
+                f.write(json.dumps(rec) + "\n")
+            self.results.append(rec)
+        timing = " ".join(f"{s['stage']}={s['s']:.2f}s" for s in rec["stages"])
+        print(f"[station] {port:<10s} {rec.get('serial') or '-':<14s} {verdict.upper():<9s} {rec['s']:.2f}s  {timing}", flush=True)
+        return rec
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+def _hex(ranges):
+    return [f"0x{s:06X}-0x{e:06X}" for s, e in ranges]
+
+# ---------- CLI ----------
+
+def main():
+    ap = argparse.ArgumentParser(description="Headless identify/verify/reflash station for Sonix cameras")
+    ap.add_argument("--config", type=Path, default=None)
+    ap.add_argument("--golden", default=None)
+    ap.add_argument("--pipeline", type=lambda s: s.split(","), default=None, help=f"comma list of {','.join(STAGES)}")
+    ap.add_argument("--match", nargs="+", default=None, help="VID:PID (hex) to handle")
+    ap.add_argument("--log", default=None, help="JSON lines log (appended)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--confidence", type=float, default=None)
+    ap.add_argument("--once", action="store_true", help="process the devices present now and exit")
+    args = ap.parse_args()
+    cfg = load_config(args.config, golden=args.golden, pipeline=args.pipeline, match=args.match, log=args.log,
+                      workers=args.workers, confidence=args.confidence)
+    st = Station(cfg)
+    names = ", ".join(f"{v:04x}:{p:04x}" for v, p in cfg["match"])
+    print(f"[station] {' → '.join(cfg['pipeline'])} on {names}, {cfg['workers']} workers, log {cfg['log']}")
+    t0 = time.time()
+    try:
+        st.poll()
+        while not args.once:
+            time.sleep(cfg["interval"])
+            st.poll()
+    except KeyboardInterrupt:
+        print("[station] stopping (waiting for running devices)")
+    finally:
+        st.close()
+    n = len(st.results)
+    if n:
+        ok = sum(r["verdict"] in ("pass", "reflashed") for r in st.results)
+        dt = time.time() - t0
+        print(f"[station] {n} device(s), {ok} good, {n - ok} bad in {dt:.1f}s ({3600 * n / max(dt, 1e-9):.0f}/h)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+snxuvc_sweep.py — encoder parameter sweep: set each grid point over the XU, capture, measure
+
+For every combination of --param values the sweep
+  1. (re)starts the compressed stream when size/fps change (snxuvc_timing.V4L2Capture,
+     no decoding, so bytesused, V4L2 seq/timestamps and UVC PTS/SCR are all available),
+  2. applies the encoder settings through SonixXU (XU_H264 / XU_MJPG) on the same node
+     and reads them back,
+  3. forces an I-frame, discards --settle seconds, then captures --seconds,
+and measures the stream the camera actually produced:
+  kbps (and error vs the target), frame size p5/p50/p95/max, mean I / P frame size,
+  I-frame count and spacing (H.264 slice headers, not size guesses), encode latency
+  ((SCR.stc - PTS) / dwClockFrequency, needs the UVC metadata node), driver->app
+  latency, V4L2 seq drops and cadence gaps.
+One row per point goes to --out (CSV) and a table is printed at the end;
+--frames DIR also keeps the per-frame timing CSV of every point.
+
+Parameters (--param NAME=V1,V2,...; values accept k/M suffixes)
+  size     WxH of the stream                fps      frames per second
+  mode     cbr | vbr   (h264_set_mode)      gop      frames (h264_set_gop)
+  bitrate  bps (h264_set_bitrate, MJPG: mjpg_set_bitrate)
+  qp       0..51 (h264_set_qp)              iframe   force an I-frame every n frames (0 = off)
+
+Usage
+  python snxuvc_sweep.py plan --format H264 --param bitrate=512k,1M,2M --param gop=15,30,60 --seconds 10
+  python snxuvc_sweep.py run --device /dev/video0 --format H264 --size 1280x720 --fps 30 \\
+      --param mode=cbr,vbr --param bitrate=512k,1M,2M --param gop=15,30 --seconds 10 --out sweep.csv
+  python snxuvc_sweep.py run --device /dev/video0 --format MJPG --param bitrate=2M,4M,8M --out mjpg.csv
+  python snxuvc_sweep.py show sweep.csv --sort kbps
+"""
+import argparse, csv, itertools, os, time
+
+STREAM = ("size", "fps")                                        # need a stream restart
+ORDER = ("size", "fps", "mode", "gop", "bitrate", "qp", "iframe")
+MODES = {"cbr": 1, "vbr": 2}
+# name: {format: (setter, getter)}; applied in ORDER so the rate-control mode goes first
+ENCODER = {
+    "mode":    {"H264": ("h264_set_mode", "h264_get_mode")},
+    "gop":     {"H264": ("h264_set_gop", "h264_get_gop")},
+    "bitrate": {"H264": ("h264_set_bitrate", "h264_get_bitrate"), "MJPG": ("mjpg_set_bitrate", "mjpg_get_bitrate")},
+    "qp":      {"H264": ("h264_set_qp", "h264_get_qp")},
+}
+MAX_BITRATE = {"H264": 0xFFFFFF, "MJPG": 0xFFFFFFFF}                # 3-byte / 4-byte XU fields
+COLUMNS = ("frames", "fps_real", "kbps", "rate_err_pct", "size_p5", "size_p50", "size_p95", "size_max", "i_frames", "i_size",
+           "p_size", "i_every", "i_every_max", "encode_ms", "encode_p95_ms", "latency_ms", "drops", "gaps")
+
+def _num(s: str) -> int:
+    s = s.strip().lower()
+    mul = {"k": 1000, "m": 1000000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mul > 1 else s) * mul) if s[:2] != "0x" else int(s, 16)
+
+def parse_value(name: str, s: str):
+    if name == "size":
+        w, h = s.lower().split("x")
+        return int(w), int(h)
+    if name == "mode":
+        return MODES[s.lower()] if s.lower() in MODES else int(s)
+    return _num(s)
+
+def show_value(name: str, v) -> str:
+    if name == "size":
+        return f"{v[0]}x{v[1]}"
+    if name == "mode":
+        return {1: "cbr", 2: "vbr"}.get(v, str(v))
+    if name == "bitrate":
+        return f"{v / 1e6:g}M" if v >= 1000000 else f"{v / 1e3:g}k"
+    return str(v)
+
+def parse_params(items, fmt: str) -> dict:
+    out = {}
+    for it in items:
+        name, _, vals = it.partition("=")
+        if name not in ORDER or not vals:
+            raise SystemExit(f"bad --param '{it}' (NAME=V1,V2 with NAME in {', '.join(ORDER)})")
+        if name in ENCODER and fmt not in ENCODER[name] or name == "iframe" and fmt != "H264":
+            raise SystemExit(f"{name} is not an {fmt} setting")
+        out[name] = [parse_value(name, v) for v in vals.split(",") if v]
+        if name == "bitrate" and max(out[name]) > MAX_BITRATE[fmt]:
+            raise SystemExit(f"bitrate {show_value(name, max(out[name]))} does not fit the {fmt} field "
+                             f"(max {MAX_BITRATE[fmt]} bps)")
+    return out
+
+def grid(params: dict, base: dict) -> list:
+    """All combinations, stream parameters outermost so restarts are rare."""
+    names = [n for n in ORDER if n in params]
+    pts = [dict(base, **dict(zip(names, combo))) for combo in itertools.product(*(params[n] for n in names))]
+    return sorted(pts, key=lambda p: tuple(p.get(n) or 0 for n in STREAM)) if set(STREAM) & set(names) else pts
+
+# ---------- measurement ----------
+
+def _ue(data: bytes, pos: int):
+    """Exp-Golomb ue(v) at bit `pos`; returns (value, next bit) or (None, pos) past the end."""
+    n = 0
+    while pos < len(data) * 8 and not (data[pos >> 3] >> (7 - (pos & 7))) & 1:
+        n += 1; pos += 1
+    if pos + n >= len(data) * 8:
+        return None, pos
+    pos += 1
+    v = 0
+    for _ in range(n):
+        v = (v << 1) | ((data[pos >> 3] >> (7 - (pos & 7))) & 1); pos += 1
+    return (1 << n) - 1 + v, pos
+
+def h264_frame_type(data: bytes):
+    """'I', 'P' or 'B' from the first slice NAL of an Annex-B access unit, else None."""
+    i = data.find(b"\x00\x00\x01")
+    while 0 <= i < len(data) - 4:
+        nal = data[i + 3] & 0x1F
+        if nal == 5:
+            return "I"
+        if nal == 1:
+            _, pos = _ue(data[i + 4:i + 12], 0)                 # first_mb_in_slice
+            st, _ = _ue(data[i + 4:i + 12], pos)                # slice_type
+            return None if st is None else "PBIPI"[st % 5]      # 0 P, 1 B, 2 I, 3 SP (P-like), 4 SI
+        i = data.find(b"\x00\x00\x01", i + 3)
+    return None
+
+def _pct(xs, p):
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(p / 100.0 * len(s)))] if s else None
+
+def _mean(xs):
+    return sum(xs) / len(xs) if xs else None
+
+def measure(cap, xu, fmt: str, seconds: float, iframe: int = 0, target: int = None) -> dict:
+    """Capture `seconds` of the running stream; the caller resets cap.stats beforehand."""
+    sizes, types, enc = [], [], []
+    hz = cap.stats.clock_hz
+    t0, n = time.monotonic(), 0
+    while time.monotonic() - t0 < seconds:
+        ok, data = cap.read()
+        if not ok:
+            continue
+        n += 1
+        t = cap.last
+        sizes.append(t.nbytes)
+        types.append(h264_frame_type(data) if fmt == "H264" else "I")
+        if hz and t.pts is not None and t.stc is not None:
+            enc.append(1000 * ((t.stc - t.pts) & 0xFFFFFFFF) / hz)
+        if iframe and n % iframe == 0:
+            xu.h264_set_iframe()
+    s = cap.stats.summary()
+    idx = [k for k, ty in enumerate(types) if ty == "I"]
+    gaps = [b - a for a, b in zip(idx, idx[1:])]
+    isz = [sizes[k] for k in idx]
+    psz = [z for z, ty in zip(sizes, types) if ty in ("P", "B")]
+    kbps = s["kbps"]
+    return {"frames": len(sizes), "fps_real": s["fps"], "kbps": kbps,
+            "rate_err_pct": 100.0 * (kbps * 1000 - target) / target if kbps and target else None,
+            "size_p5": _pct(sizes, 5), "size_p50": _pct(sizes, 50), "size_p95": _pct(sizes, 95),
+            "size_max": max(sizes) if sizes else None,
+            "i_frames": len(idx), "i_size": _mean(isz), "p_size": _mean(psz),
+            "i_every": _pct(gaps, 50), "i_every_max": max(gaps) if gaps else None,
+            "encode_ms": _mean(enc), "encode_p95_ms": _pct(enc, 95),
+            "latency_ms": s["latency_ms"], "drops": s["drops"], "gaps": s["gaps"]}
+
+# ---------- sweep ----------
+
+def apply(xu, fmt: str, point: dict) -> dict:
+    """Set the encoder parameters of `point`; returns what the camera reads back."""
+    back = {}
+    for name in ORDER:
+        if name in point and name in ENCODER:
+            setter, getter = ENCODER[name][fmt]
+            getattr(xu, setter)(point[name])
+            try:
+                back[f"{name}_readback"] = getattr(xu, getter)()
+            except OSError as e:
+                back[f"{name}_readback"] = f"error: {e}"
+    return back
+
+def run(args, points: list):
+    from snxuvc_timing import CsvLog, FrameStats, V4L2Capture
+    from snxuvc_xu import SonixXU
+    xu = SonixXU.open(args.device)
+    cap, key, rows = None, None, []
+    if args.frames:
+        os.makedirs(args.frames, exist_ok=True)
+    try:
+        for i, p in enumerate(points, 1):
+            t0 = time.monotonic()
+            k = (p["size"], p["fps"])
+            if k != key:
+                if cap:
+                    cap.release()
+                cap = V4L2Capture(args.device, p["size"][0], p["size"][1], p["fps"], args.format, args.buffers,
+                                  decode=False, clock_hz=args.clock_hz)
+                key = k
+            row = {n: show_value(n, p[n]) for n in ORDER if n in p}
+            try:
+                row.update(apply(xu, args.format, p))
+                if args.format == "H264":
+                    xu.h264_set_iframe()                                     # start every point on a clean GOP
+                end = time.monotonic() + args.settle
+                while time.monotonic() < end:
+                    cap.read()
+                cap.stats = FrameStats(0, p["fps"], cap.stats.clock_hz)
+                if args.frames:
+                    cap.csv = CsvLog(os.path.join(args.frames, f"point{i:03d}.csv"))
+                row.update(measure(cap, xu, args.format, args.seconds, p.get("iframe", 0), p.get("bitrate")))
+                row["error"] = ""
+            except OSError as e:
+                row["error"] = str(e)
+            finally:
+                if cap.csv:
+                    cap.csv.close(); cap.csv = None
+            rows.append(row)
+            print(f"[sweep] {i}/{len(points)} {_label(row)}  {_brief(row)}  ({time.monotonic() - t0:.1f}s)")
+    finally:
+        if cap:
+            cap.release()
+        xu.close()
+    return rows
+
+def _label(row) -> str:
+    return " ".join(f"{n}={row[n]}" for n in ORDER if n in row)
+
+def _brief(row) -> str:
+    if row.get("error"):
+        return f"ERROR {row['error']}"
+    f = lambda k, fmt: "-" if row.get(k) is None else format(row[k], fmt)
+    return (f"{f('kbps', '.0f')} kbit/s ({f('rate_err_pct', '+.1f')}%)  I every {f('i_every', '.0f')}"
+            f"  enc {f('encode_ms', '.1f')} ms  drops {row.get('drops', '-')}")
+
+def write_csv(path: str, rows: list):
+    fields = [n for n in ORDER if any(n in r for r in rows)]
+    fields += sorted({k for r in rows for k in r if k.endswith("_readback")})
+    fields += [c for c in COLUMNS if any(c in r for r in rows)] + ["error"]
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fields, extrasaction="ignore")
+        w.writeheader(); w.writerows(rows)
+
+def print_table(rows: list, sort: str = None):
+    if sort:
+        rows = sorted(rows, key=lambda r: (r.get(sort) in (None, ""), _sortable(r.get(sort))))
+    keys = [n for n in ORDER if any(n in r for r in rows)]
+    cols = keys + [c for c in COLUMNS if any(r.get(c) not in (None, "") for r in rows)]
+    cell = lambda v: "-" if v in (None, "") else (f"{v:.1f}" if isinstance(v, float) else str(v))
+    table = [[cell(r.get(c)) for c in cols] for r in rows]
+    width = [max(len(c), *(len(t[j]) for t in table)) if table else len(c) for j, c in enumerate(cols)]
+    print("  ".join(c.rjust(w) for c, w in zip(cols, width)))
+    for t in table:
+        print("  ".join(v.rjust(w) for v, w in zip(t, width)))
+
+def _parse_cell(v: str):
+    for t in (int, float):
+        try:
+            return t(v)
+        except ValueError:
+            pass
+    return v or None
+
+def _sortable(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float("inf")
+
+# ---------- CLI ----------
+
+def _points(args):
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    return grid(parse_params(args.param, args.format), {"size": (w, h), "fps": args.fps})
+
+def cmd_plan(args):
+    pts = _points(args)
+    for i, p in enumerate(pts, 1):
+        print(f"  {i:3d}  " + " ".join(f"{n}={show_value(n, p[n])}" for n in ORDER if n in p))
+    restarts = len({(p["size"], p["fps"]) for p in pts})
+    print(f"[sweep] {len(pts)} point(s), {restarts} stream config(s), "
+          f"~{len(pts) * (args.seconds + args.settle) / 60:.1f} min of capture")
+
+def cmd_run(args):
+    pts = _points(args)
+    print(f"[sweep] {args.device} {args.format}: {len(pts)} point(s) x ({args.settle:g}+{args.seconds:g}) s")
+    rows = run(args, pts)
+    if args.out:
+        write_csv(args.out, rows)
+        print(f"[sweep] → {args.out}")
+    print_table(rows, args.sort)
+
+def cmd_show(args):
+    with open(args.csv, newline="") as f:
+        rows = [{k: _parse_cell(v) if k in COLUMNS else v for k, v in r.items()} for r in csv.DictReader(f)]
+    print_table(rows, args.sort)
+
+def main():
+    ap = argparse.ArgumentParser(description="Sonix H264/MJPG encoder parameter sweep")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="apply every grid point, capture and measure")
+    pl = sub.add_parser("plan", help="list the grid points and the capture time")
+    for p in (r, pl):
+        p.add_argument("--format", choices=("H264", "MJPG"), default="H264")
+        p.add_argument("--param", action="append", default=[], help="NAME=V1,V2,... (size fps mode gop bitrate qp iframe)")
+        p.add_argument("--size", default="1280x720", help="stream size when not swept")
+        p.add_argument("--fps", type=int, default=30, help="frame rate when not swept")
+        p.add_argument("--seconds", type=float, default=10.0, help="capture per point")
+        p.add_argument("--settle", type=float, default=2.0, help="discarded after applying a point")
+    r.add_argument("--device", default="/dev/video0")
+    r.add_argument("--buffers", type=int, default=8)
+    r.add_argument("--clock-hz", type=int, default=None, help="UVC dwClockFrequency when sysfs does not give it")
+    r.add_argument("--out", default=None, help="results CSV")
+    r.add_argument("--frames", default=None, help="directory for per-point frame timing CSVs")
+    r.add_argument("--sort", default=None, help="table column to sort by")
+    r.set_defaults(func=cmd_run)
+    pl.set_defaults(func=cmd_plan)
+    s = sub.add_parser("show", help="print a results CSV as a table")
+    s.add_argument("csv"); s.add_argument("--sort", default=None)
+    s.set_defaults(func=cmd_show)
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+snxuvc_timing.py — per-frame capture timing: V4L2 timestamps, UVC PTS/SCR, jitter, drops, drift
+
+`_loop` / `_video_loop` only see cap.read(), so a late or missing frame could be
+the camera, the USB link or our own Python loop. This module records, per frame:
+  host     time.monotonic() right after the buffer was dequeued (before decoding)
+  buf      V4L2 buffer timestamp (CLOCK_MONOTONIC; uvcvideo marks it start-of-exposure
+           once its clock recovery has settled)
+  seq      V4L2 buffer sequence (gaps = frames the driver completed that we never saw)
+  pts/stc  UVC payload header PTS and SCR (source time clock + 11-bit SOF) from the
+           uvcvideo metadata node (/dev/videoN+1, V4L2_META_FMT_UVC, kernel >= 4.16)
+and derives, over a sliding window:
+  fps, camera jitter (buf intervals), host jitter (host intervals), seq drops,
+  cadence gaps (interval > 1.5x nominal with no seq gap: camera/USB side),
+  driver->app latency (host - buf), sensor->host latency ((stc - pts)/clock + host - packet
+  arrival), camera clock drift vs host in ppm (least squares of STC against arrival time),
+  bitrate and I-frame spacing from compressed frame sizes.
+
+Captures
+  V4L2Capture(path, ...) : own mmap stream (+ metadata node); full data, cv2-like read/set/release
+  TimedCapture(cap)      : wraps cv2.VideoCapture / BusCapture; host time, CAP_PROP_POS_MSEC
+                           (V4L2 buffer time) or the bus slot seq, no PTS/SCR
+Both keep .stats (FrameStats) and optionally write one CSV row per frame.
+
+The STC clock rate is dwClockFrequency of the VC interface header, read from sysfs;
+pass --clock-hz when it is missing (drift and the device part of the latency need it).
+
+Usage
+  python snxuvc_timing.py record --device /dev/video0 --width 1280 --height 720 --fps 30 --seconds 60 --csv run.csv
+  python snxuvc_timing.py record --device /dev/video0 --fourcc H264 --no-decode --csv h264.csv
+  python snxuvc_timing.py summary run.csv --fps 30
+  python sonix_uvc_gui_v3.py --timing --timing-csv logs/
+"""
+import argparse, csv, fcntl, glob, math, mmap, os, select, struct, time
+from collections import deque
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from snxuvc_xu import _iowr
+
+def _iow(typ, nr, size):
+    return (1 << 30) | (size << 16) | (ord(typ) << 8) | nr
+
+# ---------- V4L2 ABI (LP64 layouts) ----------
+
+FMT = struct.Struct("@I4x12I152x")                    # v4l2_format, pix member
+PARM = struct.Struct("@I6I176x")                      # v4l2_streamparm, capture member
+REQBUFS = struct.Struct("@IIIIB3x")                   # v4l2_requestbuffers
+BUF = struct.Struct("@IIIIIll16sIILIIi0L")            # v4l2_buffer
+CTRL = struct.Struct("@Ii")                           # v4l2_control
+VIDIOC_S_FMT, VIDIOC_REQBUFS, VIDIOC_QUERYBUF = _iowr("V", 5, FMT.size), _iowr("V", 8, REQBUFS.size), _iowr("V", 9, BUF.size)
+VIDIOC_QBUF, VIDIOC_DQBUF = _iowr("V", 15, BUF.size), _iowr("V", 17, BUF.size)
+VIDIOC_STREAMON, VIDIOC_STREAMOFF = _iow("V", 18, 4), _iow("V", 19, 4)
+VIDIOC_S_PARM, VIDIOC_S_CTRL = _iowr("V", 22, PARM.size), _iowr("V", 28, CTRL.size)
+TYPE_VIDEO, TYPE_META, MEMORY_MMAP = 1, 13, 1
+FLAG_TSTAMP_SOE = 0x10000
+
+# OpenCV property ids (cv2.CAP_PROP_*) -> V4L2 control ids, so the GUI sliders keep working
+PROP_WIDTH, PROP_HEIGHT, PROP_FPS, PROP_POS_MSEC = 3, 4, 5, 0
+CTRLS = {10: 0x00980900, 11: 0x00980901, 12: 0x00980902, 14: 0x00980913}    # brightness contrast saturation gain
+
+def fourcc(s: str) -> int:
+    return struct.unpack("<I", s.encode("ascii").ljust(4)[:4])[0]
+
+# ---------- frame record ----------
+
+class FrameTiming(NamedTuple):
+    seq: Optional[int]
+    host: float                       # s, CLOCK_MONOTONIC, at dequeue
+    buf: Optional[float]              # s, CLOCK_MONOTONIC, V4L2 buffer timestamp
+    nbytes: Optional[int] = None      # compressed size (bytesused)
+    flags: int = 0                    # v4l2_buffer.flags
+    pts: Optional[int] = None         # UVC PTS, device clock ticks
+    stc: Optional[int] = None         # UVC SCR source time clock of the last payload
+    scr_sof: Optional[int] = None     # UVC SCR 11-bit SOF counter
+    meta_ns: Optional[int] = None     # host arrival (ns) of the payload that carried stc
+
+CSV_FIELDS = list(FrameTiming._fields) + ["interval_ms", "host_interval_ms", "lost", "latency_ms", "sensor_ms"]
+
+def parse_uvc_meta(data: bytes) -> list:
+    """Blocks of a V4L2_META_FMT_UVC buffer: [(ns, host_sof, pts, stc, scr_sof)]."""
+    out, i = [], 0
+    while i + 12 <= len(data):
+        ns, sof, ln, _ = struct.unpack_from("<QHBB", data, i)
+        hdr = data[i + 12:i + 12 + ln]
+        pts = stc = ssof = None
+        if ln >= 2:
+            j = 2
+            if hdr[1] & 0x04 and ln >= j + 4:
+                pts = struct.unpack_from("<I", hdr, j)[0]; j += 4
+            if hdr[1] & 0x08 and ln >= j + 6:
+                stc, ssof = struct.unpack_from("<IH", hdr, j); ssof &= 0x7FF
+        out.append((ns, sof, pts, stc, ssof))
+        i += 12 + ln
+    return out
+
+def meta_fields(blocks: list) -> dict:
+    """PTS of the first payload and the SCR of the last one that carried it."""
+    d = {}
+    for ns, _, pts, stc, ssof in blocks:
+        if pts is not None and "pts" not in d:
+            d["pts"] = pts
+        if stc is not None:
+            d.update(stc=stc, scr_sof=ssof, meta_ns=ns)
+    return d
+
+# ---------- sysfs ----------
+
+def _sysfs(path: str) -> str:
+    return f"/sys/class/video4linux/{os.path.basename(os.path.realpath(path))}"
+
+def meta_node(path: str) -> Optional[str]:
+    """The uvcvideo metadata node that belongs to video node `path`, if any."""
+    try:
+        dev = os.path.realpath(_sysfs(path) + "/device")
+        for n in sorted(glob.glob("/sys/class/video4linux/video*")):
+            if os.path.realpath(n + "/device") == dev and open(n + "/index").read().strip() == "1":
+                return "/dev/" + os.path.basename(n)
+    except OSError:
+        pass
+    return None
+
+def clock_frequency(path: str) -> Optional[int]:
+    """dwClockFrequency from the VC interface header of the camera behind `path` (Hz)."""
+    try:
+        d = open(os.path.realpath(_sysfs(path) + "/device") + "/../descriptors", "rb").read()
+    except OSError:
+        return None
+    i, vc = 0, False
+    while i + 2 < len(d) and d[i]:
+        ln, typ = d[i], d[i + 1]
+        if typ == 0x04 and ln >= 9:
+            vc = d[i + 5] == 0x0E and d[i + 6] == 0x01
+        elif typ == 0x24 and vc and ln >= 12 and d[i + 2] == 0x01:
+            return struct.unpack_from("<I", d, i + 7)[0] or None
+        i += ln
+    return None
+
+# ---------- stats ----------
+
+def _pct(xs, p):
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(p / 100.0 * len(s)))] if s else None
+
+def _std(xs):
+    if len(xs) < 2:
+        return None
+    m = sum(xs) / len(xs)
+    return math.sqrt(sum((x - m) ** 2 for x in xs) / (len(xs) - 1))
+
+class FrameStats:
+    """Running counters for a session plus a sliding window for rates and jitter."""
+    def __init__(self, window: int = 300, fps: float = 0.0, clock_hz: Optional[int] = None):
+        self.win = deque(maxlen=window or None)
+        self.nominal = 1.0 / fps if fps else None
+        self.clock_hz = clock_hz
+        self.frames = self.drops = self.gaps = 0
+        self.prev = None
+        self.keys = deque(maxlen=64)                 # seqs of I-frame-sized frames
+        self._stc = None                             # (last raw stc, wrap offset)
+        self._fit = None                             # drift regression: x0, y0, n, sx, sy, sxx, sxy
+
+    def _interval(self):
+        if self.nominal:
+            return self.nominal
+        iv = [r["interval_ms"] for r in self.win if r["interval_ms"]]
+        return _pct(iv, 50) / 1000 if iv else None
+
+    def _drift_add(self, t: FrameTiming):
+        last, off = self._stc or (t.stc, 0)
+        if t.stc < last - (1 << 31):
+            off += 1 << 32
+        self._stc = (t.stc, off)
+        x, y = t.meta_ns / 1e9, (t.stc + off) / self.clock_hz
+        if self._fit is None:
+            self._fit = [x, y, 0, 0.0, 0.0, 0.0, 0.0]
+        f = self._fit
+        x, y = x - f[0], y - f[1]
+        f[2] += 1; f[3] += x; f[4] += y; f[5] += x * x; f[6] += x * y
+
+    def drift_ppm(self) -> Optional[float]:
+        """Camera clock rate vs host clock, from STC against payload arrival time."""
+        f = self._fit
+        if not f or f[2] < 10:
+            return None
+        n, sx, sy, sxx, sxy = f[2:]
+        den = n * sxx - sx * sx
+        return (((n * sxy - sx * sy) / den) - 1.0) * 1e6 if den > 1e-9 else None
+
+    def add(self, t: FrameTiming) -> dict:
+        """Account one frame; returns the CSV row (raw fields plus derived ones)."""
+        r = t._asdict()
+        p, r["lost"] = self.prev, 0
+        r["interval_ms"] = r["host_interval_ms"] = r["latency_ms"] = r["sensor_ms"] = None
+        if p is not None:
+            r["host_interval_ms"] = 1000 * (t.host - p.host)
+            if t.buf is not None and p.buf is not None:
+                r["interval_ms"] = 1000 * (t.buf - p.buf)
+            if t.seq is not None and p.seq is not None and t.seq - p.seq > 1:
+                r["lost"] = t.seq - p.seq - 1
+                self.drops += r["lost"]
+            else:
+                nom = self._interval()
+                iv = r["interval_ms"] if r["interval_ms"] is not None else r["host_interval_ms"]
+                if nom and iv > 1500 * nom:
+                    self.gaps += round(iv / 1000 / nom) - 1
+        if t.buf is not None:
+            r["latency_ms"] = 1000 * (t.host - t.buf)
+        if self.clock_hz and t.stc is not None and t.meta_ns is not None:
+            self._drift_add(t)
+            if t.pts is not None:
+                r["sensor_ms"] = 1000 * (((t.stc - t.pts) & 0xFFFFFFFF) / self.clock_hz + t.host - t.meta_ns / 1e9)
+        self.win.append(r)
+        if t.nbytes and len(self.win) >= 8:
+            med = _pct([w["nbytes"] for w in self.win if w["nbytes"]], 50)
+            if med and t.nbytes > 2.5 * med:
+                self.keys.append(t.seq if t.seq is not None else self.frames)
+        self.frames += 1
+        self.prev = t
+        return r
+
+    def summary(self) -> dict:
+        w = list(self.win)
+        cam = [r["interval_ms"] for r in w if r["interval_ms"] is not None]
+        host = [r["host_interval_ms"] for r in w if r["host_interval_ms"] is not None]
+        lat = [r["latency_ms"] for r in w if r["latency_ms"] is not None]
+        sen = [r["sensor_ms"] for r in w if r["sensor_ms"] is not None]
+        ref = [r["buf"] if r["buf"] is not None else r["host"] for r in w]
+        span = ref[-1] - ref[0] if len(ref) > 1 else 0
+        nb = sum(r["nbytes"] or 0 for r in w[1:])
+        ks = list(self.keys)
+        s = {"frames": self.frames, "drops": self.drops, "gaps": self.gaps,
+             "fps": (len(w) - 1) / span if span > 0 else None,
+             "cam_jitter_ms": _std(cam), "host_jitter_ms": _std(host),
+             "cam_max_ms": max(cam) if cam else None, "host_max_ms": max(host) if host else None,
+             "latency_ms": sum(lat) / len(lat) if lat else None, "latency_p95_ms": _pct(lat, 95),
+             "sensor_ms": sum(sen) / len(sen) if sen else None, "sensor_p95_ms": _pct(sen, 95),
+             "drift_ppm": self.drift_ppm(),
+             "kbps": 8 * nb / span / 1000 if nb and span > 0 else None,
+             "iframe_every": _pct([b - a for a, b in zip(ks, ks[1:])], 50) if len(ks) > 2 else None}
+        if self.nominal and s["fps"]:
+            s["rate_ppm"] = (self.nominal * s["fps"] - 1.0) * 1e6
+        return s
+
+    def lines(self) -> list:
+        """Short overlay / console text."""
+        s = self.summary()
+        f = lambda k, fmt: "-" if s.get(k) is None else format(s[k], fmt)
+        out = [f"{f('fps', '.2f')} fps  cam jit {f('cam_jitter_ms', '.2f')} ms  host jit {f('host_jitter_ms', '.2f')} ms",
+               f"drops {s['drops']} (seq)  gaps {s['gaps']}  lat {f('latency_ms', '.1f')} ms p95 {f('latency_p95_ms', '.1f')}"]
+        if s["sensor_ms"] is not None or s["drift_ppm"] is not None:
+            out.append(f"sensor->host {f('sensor_ms', '.1f')} ms  drift {f('drift_ppm', '+.0f')} ppm")
+        if s["kbps"] is not None:
+            out.append(f"{f('kbps', '.0f')} kbit/s  I-frame every {f('iframe_every', '.0f')}")
+        return out
+
+class CsvLog:
+    """One row per frame; `path` may be a directory (a timestamped file per session)."""
+    def __init__(self, path: str, tag: str = "session"):
+        if os.path.isdir(path):
+            path = os.path.join(path, f"timing_{tag}_{datetime.now():%Y%m%d_%H%M%S}.csv")
+        self.path = path
+        self.f = open(path, "w", newline="")
+        self.w = csv.DictWriter(self.f, CSV_FIELDS, extrasaction="ignore")
+        self.w.writeheader()
+
+    def write(self, row: dict):
+        self.w.writerow(row)
+
+    def close(self):
+        self.f.close()
+
+class _Timed:
+    """Stats, CSV and the cached overlay text shared by both capture classes."""
+    def _timing_init(self, fps, clock_hz, csv_path, tag, window):
+        self.stats = FrameStats(window, fps, clock_hz)
+        self.csv = CsvLog(csv_path, tag) if csv_path else None
+        self.last = None
+        self._text, self._text_t = [], 0.0
+
+    def _record(self, t: FrameTiming):
+        self.last = t
+        row = self.stats.add(t)
+        if self.csv:
+            self.csv.write(row)
+
+    def overlay_lines(self, every: float = 0.5) -> list:
+        now = time.monotonic()
+        if now - self._text_t >= every:
+            self._text, self._text_t = self.stats.lines(), now
+        return self._text
+
+    def _timing_close(self):
+        if self.csv:
+            self.csv.close(); self.csv = None
+
+def draw_overlay(img, lines, scale: float = 0.45):
+    """Outlined text in the top-left corner of a BGR frame (in place)."""
+    import cv2
+    for i, s in enumerate(lines):
+        org = (6, 16 + i * int(40 * scale))
+        cv2.putText(img, s, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), 3, cv2.LINE_AA)
+        cv2.putText(img, s, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), 1, cv2.LINE_AA)
+    return img
+
+# ---------- captures ----------
+
+class _Stream:
+    """mmap buffers of one queue (video or metadata) on an open node."""
+    def __init__(self, fd: int, btype: int, count: int):
+        self.fd, self.type = fd, btype
+        rb = bytearray(REQBUFS.pack(count, btype, MEMORY_MMAP, 0, 0))
+        fcntl.ioctl(fd, VIDIOC_REQBUFS, rb)
+        self.maps = []
+        for i in range(REQBUFS.unpack(rb)[0]):
+            b = self._buf(i)
+            fcntl.ioctl(fd, VIDIOC_QUERYBUF, b)
+            f = BUF.unpack(b)
+            self.maps.append(mmap.mmap(fd, f[11], mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE, offset=f[10]))
+            fcntl.ioctl(fd, VIDIOC_QBUF, b)
+        fcntl.ioctl(fd, VIDIOC_STREAMON, struct.pack("@I", btype))
+
+    def _buf(self, i):
+        return bytearray(BUF.pack(i, self.type, 0, 0, 0, 0, 0, bytes(16), 0, MEMORY_MMAP, 0, 0, 0, 0))
+
+    def dequeue(self, timeout: float):
+        """(index, bytesused, flags, timestamp s, sequence) or None."""
+        if timeout and not select.select([self.fd], [], [], timeout)[0]:
+            return None
+        b = self._buf(0)
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_DQBUF, b)
+        except BlockingIOError:
+            return None
+        f = BUF.unpack(b)
+        return f[0], f[2], f[3], f[5] + f[6] / 1e6, f[8]
+
+    def queue(self, i: int):
+        fcntl.ioctl(self.fd, VIDIOC_QBUF, self._buf(i))
+
+    def close(self):
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_STREAMOFF, struct.pack("@I", self.type))
+        except OSError:
+            pass
+        for m in self.maps:
+            m.close()
+        self.maps = []
+
+class V4L2Capture(_Timed):
+    """cv2.VideoCapture stand-in on our own mmap stream, with per-frame timing and UVC PTS/SCR."""
+    def __init__(self, path: str, width: int = 1280, height: int = 720, fps: int = 30, fmt: str = "MJPG",
+                 buffers: int = 4, meta: bool = True, decode: bool = True, clock_hz: Optional[int] = None,
+                 csv_path: Optional[str] = None, window: int = 300):
+        self.path, self.fmt, self.nbuf, self.decode = path, fmt, buffers, decode
+        self.width, self.height, self.fps = width, height, fps
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        self.vid = None
+        self.mfd = self.mst = None
+        self.mpath = meta_node(path) if meta else None
+        self.pending = {}                            # meta seq -> fields
+        self._dirty = False
+        self._timing_init(fps, clock_hz or clock_frequency(path), csv_path, os.path.basename(path), window)
+        self._start()
+
+    def _start(self):
+        b = bytearray(FMT.pack(TYPE_VIDEO, self.width, self.height, fourcc(self.fmt), 0, 0, 0, 0, 0, 0, 0, 0, 0))
+        fcntl.ioctl(self.fd, VIDIOC_S_FMT, b)
+        self.width, self.height = FMT.unpack(b)[1:3]
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_S_PARM, bytearray(PARM.pack(TYPE_VIDEO, 0, 0, 1, self.fps, 0, 0)))
+        except OSError:
+            pass
+        self.vid = _Stream(self.fd, TYPE_VIDEO, self.nbuf)
+        if self.mpath:
+            try:
+                self.mfd = os.open(self.mpath, os.O_RDWR | os.O_NONBLOCK)
+                self.mst = _Stream(self.mfd, TYPE_META, self.nbuf + 2)
+            except OSError:
+                if self.mfd is not None:
+                    os.close(self.mfd)
+                self.mfd = self.mst = self.mpath = None  # not a UVC metadata node (or busy): no PTS/SCR
+
+    def _stop(self):
+        for s in (self.vid, self.mst):
+            if s:
+                s.close()
+        self.vid = self.mst = None
+        if self.mfd is not None:
+            os.close(self.mfd); self.mfd = None
+        self.pending.clear()
+
+    def _meta(self, seq: int) -> dict:
+        for wait in (0, 0.002):                      # the meta buffer completes with the video buffer
+            while True:
+                m = self.mst.dequeue(wait if seq not in self.pending else 0)
+                if m is None:
+                    break
+                self.pending[m[4]] = meta_fields(parse_uvc_meta(self.mst.maps[m[0]][:m[1]]))
+                self.mst.queue(m[0])
+                wait = 0
+            if seq in self.pending:
+                break
+        for k in [k for k in self.pending if k < seq - 16]:
+            del self.pending[k]
+        return self.pending.pop(seq, {})
+
+    def isOpened(self):
+        return self.vid is not None
+
+    def read(self, timeout: float = 1.0):
+        if self._dirty:
+            self._stop(); self._start(); self._dirty = False
+        d = self.vid.dequeue(timeout)
+        if d is None:
+            return False, None
+        host = time.monotonic()
+        i, n, flags, ts, seq = d
+        data = self.vid.maps[i][:n]
+        self.vid.queue(i)
+        extra = self._meta(seq) if self.mst else {}
+        self._record(FrameTiming(seq, host, ts or None, n, flags, **extra))
+        if not self.decode:
+            return True, data
+        import cv2, numpy as np
+        raw = np.frombuffer(data, np.uint8)
+        if self.fmt == "YUYV":
+            frame = cv2.cvtColor(raw.reshape(self.height, self.width, 2), cv2.COLOR_YUV2BGR_YUYV)
+        else:
+            frame = cv2.imdecode(raw, cv2.IMREAD_COLOR)
+        return frame is not None, frame
+
+    def set(self, prop, val):
+        prop = int(prop)
+        if prop in (PROP_WIDTH, PROP_HEIGHT, PROP_FPS):
+            attr = {PROP_WIDTH: "width", PROP_HEIGHT: "height", PROP_FPS: "fps"}[prop]
+            if getattr(self, attr) != int(val):
+                setattr(self, attr, int(val)); self._dirty = True
+                if prop == PROP_FPS:
+                    self.stats.nominal = 1.0 / int(val) if val else None
+            return True
+        if prop in CTRLS:
+            try:
+                fcntl.ioctl(self.fd, VIDIOC_S_CTRL, bytearray(CTRL.pack(CTRLS[prop], int(val))))
+                return True
+            except OSError:
+                return False
+        return False
+
+    def get(self, prop):
+        return {PROP_WIDTH: self.width, PROP_HEIGHT: self.height, PROP_FPS: self.fps,
+                PROP_POS_MSEC: 1000 * self.last.buf if self.last and self.last.buf else 0}.get(int(prop), 0)
+
+    def release(self):
+        self._stop()
+        self._timing_close()
+        if self.fd is not None:
+            os.close(self.fd); self.fd = None
+
+class TimedCapture(_Timed):
+    """Timing around an existing capture (cv2.VideoCapture or snxuvc_framebus.BusCapture)."""
+    def __init__(self, cap, fps: float = 0.0, csv_path: Optional[str] = None, tag: str = "capture", window: int = 300):
+        self.cap = cap
+        self._timing_init(fps, None, csv_path, tag, window)
+
+    def read(self):
+        if hasattr(self.cap, "grab"):                # cv2: DQBUF in grab(), decode in retrieve()
+            ok = self.cap.grab()
+            host = time.monotonic()
+            ok, frame = self.cap.retrieve() if ok else (False, None)
+            ms = self.cap.get(PROP_POS_MSEC) if ok else 0
+            seq, buf = None, ms / 1000 if ms else None
+        else:
+            ok, frame = self.cap.read()
+            host = time.monotonic()
+            seq, ts = getattr(self.cap, "last", (None, None))
+            buf = host - (time.time() - ts) if ts else None     # bus slots carry wall-clock publish time
+        if ok:
+            self._record(FrameTiming(seq, host, buf))
+        return ok, frame
+
+    def release(self):
+        self._timing_close()
+        self.cap.release()
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+# ---------- CLI ----------
+
+def cmd_record(args):
+    cap = V4L2Capture(args.device, args.width, args.height, args.fps, args.fourcc, args.buffers, not args.no_meta,
+                      not args.no_decode, args.clock_hz, args.csv)
+    st = cap.stats
+    print(f"[timing] {args.device} {cap.width}x{cap.height} {args.fourcc}@{args.fps}  meta={cap.mpath or '-'}"
+          f"  clock={st.clock_hz or '?'} Hz" + (f"  csv={cap.csv.path}" if cap.csv else ""))
+    t0 = tp = time.monotonic()
+    try:
+        while not args.seconds or time.monotonic() - t0 < args.seconds:
+            ok, _ = cap.read()
+            if not ok:
+                print("[timing] no frame within 1 s")
+            if time.monotonic() - tp >= args.every:
+                tp = time.monotonic()
+                print(f"[timing] {time.monotonic() - t0:6.1f}s  " + " | ".join(st.lines()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+    print_summary(st)
+
+def print_summary(st: FrameStats):
+    for k, v in st.summary().items():
+        print(f"  {k:<15s} {'-' if v is None else (f'{v:.3f}' if isinstance(v, float) else v)}")
+
+def cmd_summary(args):
+    st = FrameStats(0, args.fps, args.clock_hz)
+    num = lambda v, f: f(v) if v not in ("", None) else None
+    with open(args.csv, newline="") as f:
+        for r in csv.DictReader(f):
+            st.add(FrameTiming(num(r["seq"], int), float(r["host"]), num(r["buf"], float), num(r["nbytes"], int),
+                               num(r["flags"], int) or 0, num(r["pts"], int), num(r["stc"], int),
+                               num(r["scr_sof"], int), num(r["meta_ns"], int)))
+    print(f"[timing] {args.csv}")
+    print_summary(st)
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-frame capture timing (V4L2 timestamps, UVC PTS/SCR)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("record", help="stream from a V4L2 node and report timing")
+    r.add_argument("--device", default="/dev/video0")
+    r.add_argument("--width", type=int, default=1280)
+    r.add_argument("--height", type=int, default=720)
+    r.add_argument("--fps", type=int, default=30)
+    r.add_argument("--fourcc", default="MJPG", help="MJPG, YUYV or H264")
+    r.add_argument("--buffers", type=int, default=4)
+    r.add_argument("--seconds", type=float, default=0, help="0 = until Ctrl-C")
+    r.add_argument("--every", type=float, default=1.0, help="console report interval (s)")
+    r.add_argument("--csv", default=None, help="per-frame CSV (file, or directory for a timestamped file)")
+    r.add_argument("--no-meta", action="store_true", help="do not open the UVC metadata node")
+    r.add_argument("--no-decode", action="store_true", help="skip decoding (required for H264)")
+    r.add_argument("--clock-hz", type=int, default=None, help="UVC dwClockFrequency when sysfs does not give it")
+    r.set_defaults(func=cmd_record)
+    s = sub.add_parser("summary", help="recompute the statistics of a recorded CSV")
+    s.add_argument("csv")
+    s.add_argument("--fps", type=float, default=0.0, help="nominal rate (for cadence gaps and rate ppm)")
+    s.add_argument("--clock-hz", type=int, default=None)
+    s.set_defaults(func=cmd_summary)
+    args = ap.parse_args(); args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+snxuvc_xu.py — Sonix XU command set (sonix_xu_ctrls.c) in Python, structured results
+
+Every vendor feature of SONiX_UVC_TestAP is a short control-transfer
+conversation on one of two Extension Units:
+  SYS unit 3 : ASIC_RW (cs 1, 4 bytes), FLASH_CTRL (cs 3)
+  USR unit 4 : H264 (2), MJPG (3), OSD (4), MOTION_DETECTION (5), IMG_SETTING (6),
+               MULTI_STREAM (7), GPIO (8), DYNAMIC_FPS / frame drop (9) — 11-byte
+               payloads, 24 for motion detection
+A USR command first SETs [0x9A tag, sub-command] to select the item, then
+either SETs the value (the rest of the buffer is left as the C code leaves
+it) or GETs the payload back. This module sends the same bytes, so each GUI
+action is one tag write plus one transfer, on a session that stays open.
+
+Transports
+  V4L2Transport("/dev/video0") : UVCIOC_CTRL_QUERY ioctl via uvcvideo (Linux; works while streaming)
+  UsbTransport(dev, vc_if)     : class requests on EP0 through snxuvc_dump.py (WinUSB/libusb)
+
+Usage
+  python snxuvc_xu.py --device /dev/video0 chip
+  python snxuvc_xu.py --device /dev/video0 call osd_get_enable
+  python snxuvc_xu.py --device /dev/video0 call osd_set_enable 0 0
+  python snxuvc_xu.py --usb call h264_get_gop
+  python snxuvc_xu.py list
+"""
+import argparse, os, struct, threading
+from datetime import datetime
+from typing import NamedTuple
+
+XU_SYS, XU_USR = 3, 4
+# SYS selectors
+SYS_ASIC_RW, SYS_FLASH_CTRL = 0x01, 0x03
+# USR selectors
+USR_H264, USR_MJPG, USR_OSD, USR_MD, USR_IMG, USR_MULTI, USR_GPIO, USR_FPS = 2, 3, 4, 5, 6, 7, 8, 9
+
+TAG = 0x9A
+LEN = 11
+SIZES = {USR_MD: 24}                      # payload length per USR selector (default LEN)
+UVC_SET_CUR, UVC_GET_CUR = 0x01, 0x81
+
+CHIP_IDS = {0x90: "SN9C291A", 0x92: "SN9C292"}
+DRAM = {0x00: ("SN9C292A", "64M"), 0x03: ("SN9C291B", "16M")}
+
+# ---------- results ----------
+
+class ChipInfo(NamedTuple):
+    id: int
+    name: str
+    dram: str
+
+class LineBlock(NamedTuple):
+    line: int
+    block: int
+
+class Colors(NamedTuple):
+    font: int
+    border: int
+
+class OsdPosition(NamedTuple):
+    line_row: int
+    line_col: int
+    block_row: int
+    block_col: int
+
+class StreamSizes(NamedTuple):
+    s0: int
+    s1: int
+    s2: int
+
+class StreamPositions(NamedTuple):
+    s0_row: int
+    s0_col: int
+    s1_row: int
+    s1_col: int
+    s2_row: int
+    s2_col: int
+
+class CarcamCtrl(NamedTuple):
+    speed_en: int
+    coordinate_en: int
+    coordinate_ctrl: int
+
+class Coordinate(NamedTuple):
+    direction: int
+    v1: int
+    v2: int
+    v3: int
+    v4: int
+
+class QpLimit(NamedTuple):
+    min: int
+    max: int
+
+class StreamInfo(NamedTuple):
+    type: int
+    format: int
+
+class Gpio(NamedTuple):
+    enable: int
+    output: int
+    input: int
+
+class StreamPair(NamedTuple):
+    s1: int
+    s2: int
+
+# ---------- transports ----------
+
+def _iowr(typ, nr, size):
+    return (3 << 30) | (size << 16) | (ord(typ) << 8) | nr
+
+class V4L2Transport:
+    """struct uvc_xu_control_query {u8 unit, selector, query; u16 size; u8 *data} through uvcvideo."""
+    QUERY = struct.Struct("@BBBHP")
+    UVCIOC_CTRL_QUERY = _iowr("u", 0x21, QUERY.size)
+
+    def __init__(self, path: str):
+        import ctypes, fcntl
+        self._ctypes, self._ioctl = ctypes, fcntl.ioctl
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        self._bufs = {}                      # payload length -> reusable ctypes buffer (callers hold SonixXU.lock)
+
+    def _query(self, unit, cs, query, buf):
+        n = len(buf)
+        cbuf = self._bufs.get(n)
+        if cbuf is None:
+            cbuf = self._bufs[n] = self._ctypes.create_string_buffer(n)
+        self._ctypes.memmove(cbuf, bytes(buf), n)
+        self._ioctl(self.fd, self.UVCIOC_CTRL_QUERY, self.QUERY.pack(unit, cs, query, n, self._ctypes.addressof(cbuf)))
+        return cbuf.raw
+
+    def set(self, unit: int, cs: int, data: bytes):
+        self._query(unit, cs, UVC_SET_CUR, data)
+
+    def get(self, unit: int, cs: int, n: int) -> bytes:
+        return self._query(unit, cs, UVC_GET_CUR, bytes(n))
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd); self.fd = None
+
+class UsbTransport:
+    """SET_CUR/GET_CUR on EP0 with the helpers of snxuvc_dump.py (needs the VC interface on WinUSB/libusb)."""
+    def __init__(self, dev=None, vc_if: int = 0, vid: int = 0x0C45, pid: int = 0x6366):
+        import snxuvc_dump
+        self._d = snxuvc_dump
+        self.dev = dev or snxuvc_dump.find_device(vid, pid)
+        self.vc_if = vc_if
+        try:
+            self.detached = bool(self.dev.is_kernel_driver_active(vc_if))
+        except Exception:                           # Windows / backends without the query
+            self.detached = False
+        snxuvc_dump.detach_kernel_if_needed(self.dev, vc_if)
+
+    def set(self, unit: int, cs: int, data: bytes):
+        self._d.uvc_xu_set(self.dev, self.vc_if, unit, cs, bytes(data))
+
+    def get(self, unit: int, cs: int, n: int) -> bytes:
+        return bytes(self._d.uvc_xu_get(self.dev, self.vc_if, unit, cs, n))
+
+    def close(self):
+        """Hand the VC interface back to uvcvideo if we took it, so /dev/videoN comes back."""
+        import usb.util
+        if self.detached:
+            try:
+                self.dev.attach_kernel_driver(self.vc_if)
+            except Exception as e:
+                print(f"[xu] reattaching the kernel driver failed: {e}")
+            self.detached = False
+        usb.util.dispose_resources(self.dev)
+
+# ---------- command layer ----------
+
+class SonixXU:
+    """XU_* commands of sonix_xu_ctrls.c on an open transport; safe to share between threads."""
+    def __init__(self, transport):
+        self.t = transport
+        self.lock = threading.RLock()
+
+    @classmethod
+    def open(cls, device: str = None, vid: int = 0x0C45, pid: int = 0x6366, vc_if: int = 0, ref: str = None):
+        """/dev/videoN → V4L2 ioctl transport; None → libusb on VID:PID (or the inventory entry `ref`)."""
+        if device:
+            return cls(V4L2Transport(device))
+        dev = None
+        if ref:
+            import snxuvc_inventory
+            dev = snxuvc_inventory.find(ref)
+        return cls(UsbTransport(dev, vc_if, vid, pid))
+
+    def close(self):
+        self.t.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- USR tag protocol ---
+    def _select(self, cs: int, sub: int) -> bytearray:
+        buf = bytearray(SIZES.get(cs, LEN)); buf[0], buf[1] = TAG, sub
+        self.t.set(XU_USR, cs, buf)
+        return buf
+
+    def _put(self, cs: int, sub: int, *vals, clear: bool = False):
+        with self.lock:
+            buf = self._select(cs, sub)
+            if clear:
+                buf[:] = bytes(len(buf))
+            buf[:len(vals)] = bytes(v & 0xFF for v in vals)
+            self.t.set(XU_USR, cs, buf)
+
+    def _fetch(self, cs: int, sub: int) -> bytes:
+        with self.lock:
+            self._select(cs, sub)
+            return self.t.get(XU_USR, cs, SIZES.get(cs, LEN))
+
+    def _stream_select(self, sid: int, sub: int) -> bytearray:
+        """Multi-stream per-stream items: pick the stream with sub 0x05, then select `sub`."""
+        buf = self._select(USR_MULTI, 0x05)
+        buf[0] = sid
+        self.t.set(XU_USR, USR_MULTI, buf)
+        buf[0], buf[1] = TAG, sub
+        self.t.set(XU_USR, USR_MULTI, buf)
+        return buf
+
+    # --- ASIC (SYS unit) ---
+    def asic_read(self, addr: int) -> int:
+        with self.lock:
+            self.t.set(XU_SYS, SYS_ASIC_RW, bytes([addr & 0xFF, (addr >> 8) & 0xFF, 0, 0xFF]))   # dummy write
+            return self.t.get(XU_SYS, SYS_ASIC_RW, 4)[2]
+
+    def asic_write(self, addr: int, value: int):
+        with self.lock:
+            self.t.set(XU_SYS, SYS_ASIC_RW, bytes([addr & 0xFF, (addr >> 8) & 0xFF, value & 0xFF, 0]))
+
+    def chip_id(self) -> ChipInfo:
+        cid = self.asic_read(0x101F)
+        if cid != 0x92:
+            return ChipInfo(cid, CHIP_IDS.get(cid, f"0x{cid:02X}"), "")
+        name, dram = DRAM.get(self.asic_read(0x1607), ("SN9C292", "?"))
+        return ChipInfo(cid, name, dram)
+
+    # --- H264 ---
+    def h264_get_mode(self) -> int:
+        return self._fetch(USR_H264, 0x06)[0]                       # 1 CBR, 2 VBR
+
+    def h264_set_mode(self, mode: int):
+        self._put(USR_H264, 0x06, mode, clear=True)
+
+    def h264_get_qp_limit(self) -> QpLimit:
+        d = self._fetch(USR_H264, 0x01)
+        return QpLimit(d[0], d[1])
+
+    def h264_get_qp(self) -> int:
+        return self._fetch(USR_H264, 0x07)[0]
+
+    def h264_set_qp(self, qp: int):
+        self._put(USR_H264, 0x07, qp, clear=True)
+
+    def h264_get_bitrate(self) -> int:
+        d = self._fetch(USR_H264, 0x02)
+        return (d[0] << 16) | (d[1] << 8) | d[2]
+
+    def h264_set_bitrate(self, bps: int):
+        self._put(USR_H264, 0x02, bps >> 16, bps >> 8, bps)
+
+    def h264_set_iframe(self):
+        self._put(USR_H264, 0x04, 1)
+
+    def h264_get_sei(self) -> int:
+        return self._fetch(USR_H264, 0x05)[0]
+
+    def h264_set_sei(self, enable: int):
+        self._put(USR_H264, 0x05, enable)
+
+    def h264_get_gop(self) -> int:
+        d = self._fetch(USR_H264, 0x03)
+        return (d[1] << 8) | d[0]
+
+    def h264_set_gop(self, gop: int):
+        self._put(USR_H264, 0x03, gop, gop >> 8)
+
+    # --- MJPG ---
+    def mjpg_get_bitrate(self) -> int:
+        return int.from_bytes(self._fetch(USR_MJPG, 0x01)[:4], "big")
+
+    def mjpg_set_bitrate(self, bps: int):
+        self._put(USR_MJPG, 0x01, bps >> 24, bps >> 16, bps >> 8, bps)
+
+    # --- multi-stream ---
+    def multi_get_status(self) -> StreamInfo:
+        d = self._fetch(USR_MULTI, 0x01)
+        return StreamInfo(d[0], (d[1] << 8) | d[2])
+
+    def multi_get_info(self) -> StreamInfo:
+        d = self._fetch(USR_MULTI, 0x02)
+        return StreamInfo(d[0], (d[1] << 8) | d[2])
+
+    def multi_set_type(self, fmt: int):
+        self._put(USR_MULTI, 0x02, fmt)
+
+    def multi_get_enable(self) -> int:
+        return self._fetch(USR_MULTI, 0x03)[0]
+
+    def multi_set_enable(self, enable: int):
+        self._put(USR_MULTI, 0x03, enable, 0)
+
+    def multi_get_bitrate(self, sid: int) -> int:
+        with self.lock:
+            buf = self._select(USR_MULTI, 0x05)
+            buf[0] = sid
+            self.t.set(XU_USR, USR_MULTI, buf)
+            d = self.t.get(XU_USR, USR_MULTI, LEN)
+        return (d[1] << 16) | (d[2] << 8) | d[3]
+
+    def multi_set_bitrate(self, sid: int, bps: int):
+        self._put(USR_MULTI, 0x04, sid, bps >> 16, bps >> 8, bps)
+
+    def multi_get_qp(self, sid: int) -> int:
+        with self.lock:
+            self._stream_select(sid, 0x06)
+            return self.t.get(XU_USR, USR_MULTI, LEN)[1]
+
+    def multi_set_qp(self, sid: int, qp: int):
+        with self.lock:
+            buf = self._stream_select(sid, 0x06)
+            buf[0], buf[1] = sid, qp & 0xFF
+            self.t.set(XU_USR, USR_MULTI, buf)
+
+    def multi_get_h264_mode(self, sid: int) -> int:
+        with self.lock:
+            self._stream_select(sid, 0x07)
+            return self.t.get(XU_USR, USR_MULTI, LEN)[1]
+
+    def multi_set_h264_mode(self, sid: int, mode: int):
+        self._put(USR_MULTI, 0x07, sid, mode)
+
+    def multi_get_substream_fps(self, main_fps: int = None) -> int:
+        fps = self._fetch(USR_MULTI, 0x08)[0]
+        return min(fps, main_fps) if main_fps else fps
+
+    def multi_set_substream_fps(self, fps: int, main_fps: int = None):
+        self._put(USR_MULTI, 0x08, min(fps, main_fps) if main_fps else fps)
+
+    def multi_get_substream_gop(self) -> int:
+        d = self._fetch(USR_MULTI, 0x09)
+        return min((d[1] << 8) | d[0], self.h264_get_gop())
+
+    def multi_set_substream_gop(self, gop: int):
+        gop = min(gop, self.h264_get_gop())                          # never above the main stream's GOP
+        self._put(USR_MULTI, 0x09, gop, gop >> 8)
+
+    # --- OSD ---
+    def osd_set_timer(self, enable: int):
+        self._put(USR_OSD, 0x00, enable)
+
+    def osd_get_rtc(self) -> datetime:
+        d = self._fetch(USR_OSD, 0x01)
+        return datetime((d[5] << 8) | d[6], d[4], d[3], d[2], d[1], d[0])
+
+    def osd_set_rtc(self, t: datetime):
+        self._put(USR_OSD, 0x01, t.second, t.minute, t.hour, t.day, t.month, t.year >> 8, t.year)
+
+    def osd_get_size(self) -> LineBlock:
+        d = self._fetch(USR_OSD, 0x02)
+        return LineBlock(d[0], d[1])
+
+    def osd_set_size(self, line: int, block: int):
+        self._put(USR_OSD, 0x02, min(line, 4), min(block, 4))
+
+    def osd_get_color(self) -> Colors:
+        d = self._fetch(USR_OSD, 0x03)
+        return Colors(d[0], d[1])
+
+    def osd_set_color(self, font: int, border: int):
+        self._put(USR_OSD, 0x03, min(font, 4), min(border, 4))
+
+    def osd_get_enable(self) -> LineBlock:
+        d = self._fetch(USR_OSD, 0x04)
+        return LineBlock(d[0], d[1])
+
+    def osd_set_enable(self, line: int, block: int):
+        self._put(USR_OSD, 0x04, line, block)
+
+    def osd_get_autoscale(self) -> LineBlock:
+        d = self._fetch(USR_OSD, 0x05)
+        return LineBlock(d[0], d[1])
+
+    def osd_set_autoscale(self, line: int, block: int):
+        self._put(USR_OSD, 0x05, line, block)
+
+    def osd_get_multi_size(self) -> StreamSizes:
+        d = self._fetch(USR_OSD, 0x06)
+        return StreamSizes(d[0], d[1], d[2])
+
+    def osd_set_multi_size(self, s0: int, s1: int, s2: int):
+        self._put(USR_OSD, 0x06, s0, s1, s2)
+
+    def osd_get_string(self, group: int) -> str:
+        with self.lock:
+            buf = self._select(USR_OSD, 0x07)
+            buf[0], buf[1] = 0, group
+            self.t.set(XU_USR, USR_OSD, buf)
+            d = self.t.get(XU_USR, USR_OSD, LEN)
+        return d[2:10].split(b"\0", 1)[0].decode("ascii", "replace")
+
+    def osd_set_string(self, group: int, text: str):
+        s = text.encode("ascii", "replace")[:8].ljust(8, b"\0")
+        self._put(USR_OSD, 0x07, 1, group, *s)
+
+    def osd_get_start_position(self) -> OsdPosition:
+        d = self._fetch(USR_OSD, 0x08)
+        return OsdPosition(*struct.unpack(">4H", d[:8]))
+
+    def osd_set_start_position(self, osd_type: int, row: int, col: int):
+        """osd_type 0..3 (line/block ...), row/col in units of 16 lines/pixels."""
+        self._put(USR_OSD, 0x08, osd_type if osd_type <= 3 else 0, row >> 8, row, col >> 8, col)
+
+    def osd_get_ms_start_position(self) -> StreamPositions:
+        return StreamPositions(*self._fetch(USR_OSD, 0x09)[:6])
+
+    def osd_set_ms_start_position(self, sid: int, row: int, col: int):
+        self._put(USR_OSD, 0x09, sid, row, col)
+
+    def osd_get_carcam(self) -> CarcamCtrl:
+        return CarcamCtrl(*self._fetch(USR_OSD, 0x0A)[:3])
+
+    def osd_set_carcam(self, speed_en: int, coordinate_en: int, coordinate_ctrl: int):
+        self._put(USR_OSD, 0x0A, speed_en, coordinate_en, coordinate_ctrl)
+
+    def osd_get_speed(self) -> int:
+        d = self._fetch(USR_OSD, 0x0B)
+        return (d[0] << 8) | d[1]
+
+    def osd_set_speed(self, speed: int):
+        self._put(USR_OSD, 0x0B, speed >> 8, speed)
+
+    def osd_get_coordinate(self) -> Coordinate:
+        d = self._fetch(USR_OSD, 0x0C)
+        return Coordinate(d[0], d[1], int.from_bytes(d[2:5], "big"), d[5], int.from_bytes(d[6:9], "big"))
+
+    def osd_set_coordinate(self, direction: int, v1: int, v2: int, v3: int, v4: int):
+        self._put(USR_OSD, 0x0C, direction, v1, v2 >> 16, v2 >> 8, v2, v3, v4 >> 16, v4 >> 8, v4)
+
+    # --- motion detection ---
+    def md_get_mode(self) -> int:
+        return self._fetch(USR_MD, 0x01)[0]
+
+    def md_set_mode(self, enable: int):
+        self._put(USR_MD, 0x01, enable)
+
+    def md_get_threshold(self) -> int:
+        d = self._fetch(USR_MD, 0x02)
+        return (d[0] << 8) | d[1]
+
+    def md_set_threshold(self, th: int):
+        self._put(USR_MD, 0x02, th >> 8, th)
+
+    def md_get_mask(self) -> bytes:
+        """24 bytes, one bit per block of the 16x12 grid."""
+        return self._fetch(USR_MD, 0x03)
+
+    def md_set_mask(self, mask):
+        self._put(USR_MD, 0x03, *bytes(mask)[:24])
+
+    def md_get_result(self) -> bytes:
+        return self._fetch(USR_MD, 0x04)
+
+    def md_set_result(self, result):
+        self._put(USR_MD, 0x04, *bytes(result)[:24])
+
+    # --- image ---
+    def img_get_mirror(self) -> int:
+        return self._fetch(USR_IMG, 0x01)[0]
+
+    def img_set_mirror(self, on: int):
+        self._put(USR_IMG, 0x01, on)
+
+    def img_get_flip(self) -> int:
+        return self._fetch(USR_IMG, 0x02)[0]
+
+    def img_set_flip(self, on: int):
+        self._put(USR_IMG, 0x02, on)
+
+    def img_get_color(self) -> int:
+        return self._fetch(USR_IMG, 0x03)[0]
+
+    def img_set_color(self, color: int):
+        self._put(USR_IMG, 0x03, color)
+
+    # --- GPIO ---
+    def gpio_get(self) -> Gpio:
+        return Gpio(*self._fetch(USR_GPIO, 0x01)[:3])
+
+    def gpio_set(self, enable: int, value: int):
+        self._put(USR_GPIO, 0x01, enable, value)
+
+    # --- frame drop (dynamic fps) ---
+    def frame_drop_get_enable(self) -> StreamPair:
+        return StreamPair(*self._fetch(USR_FPS, 0x01)[:2])
+
+    def frame_drop_set_enable(self, s1: int, s2: int):
+        self._put(USR_FPS, 0x01, s1, s2)
+
+    def frame_drop_get_fps(self) -> StreamPair:
+        return StreamPair(*self._fetch(USR_FPS, 0x02)[:2])
+
+    def frame_drop_set_fps(self, s1: int, s2: int):
+        self._put(USR_FPS, 0x02, s1, s2)
+
+COMMANDS = sorted(n for n in vars(SonixXU) if not n.startswith("_") and n not in ("open", "close", "lock"))
+
+# ---------- CLI ----------
+
+def _arg(s):
+    try:
+        return int(s, 0)
+    except ValueError:
+        return s
+
+def main():
+    ap = argparse.ArgumentParser(description="Sonix XU commands without SONiX_UVC_TestAP")
+    ap.add_argument("--device", default=None, help="/dev/videoN (V4L2 ioctl); omit with --usb")
+    ap.add_argument("--usb", action="store_true", help="libusb on --vid/--pid instead of V4L2")
+    ap.add_argument("--vid", type=lambda x: int(x, 0), default=0x0C45)
+    ap.add_argument("--pid", type=lambda x: int(x, 0), default=0x6366)
+    ap.add_argument("--vc-if", type=int, default=0)
+    ap.add_argument("--dev", default=None, help="libusb device by serial, port or alias (snxuvc_inventory.py)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="command names")
+    sub.add_parser("chip", help="chip id / DRAM size")
+    c = sub.add_parser("call", help="run one command, e.g. `call osd_set_enable 1 0`")
+    c.add_argument("name", choices=COMMANDS, metavar="NAME"); c.add_argument("args", nargs="*", type=_arg)
+    args = ap.parse_args()
+    if args.cmd == "list":
+        print("\n".join(COMMANDS)); return
+    if not args.usb and not args.device and not args.dev:
+        raise SystemExit("pass --device /dev/videoN or --usb")
+    with SonixXU.open(None if args.usb or args.dev else args.device, args.vid, args.pid, args.vc_if, args.dev) as xu:
+        if args.cmd == "chip":
+            print(xu.chip_id()); return
+        vals = [datetime.fromisoformat(a) if isinstance(a, str) and a[:1].isdigit() else a for a in args.args]
+        r = getattr(xu, args.name)(*vals)
+        print(r.hex(" ") if isinstance(r, bytes) else ("ok" if r is None else r))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 # Sonix UVC Control GUI — v3 (Linux)
-# Live preview + V4L2 sliders + Sonix vendor controls via SONiX_UVC_TestAP
-# Default tool path: ~/C1_SONIX_Test_AP/SONiX_UVC_TestAP
+# Live preview + V4L2 sliders + Sonix vendor controls via snxuvc_xu.py
+# (XU queries on the open /dev/videoN — no SONiX_UVC_TestAP process per action)
+# --bus NAME: preview from a snxuvc_framebus.py publisher instead of opening the camera
+# --timing [--timing-csv PATH]: per-frame timing overlay / CSV via snxuvc_timing.py
+# --log-file PATH: full log spilled to a rotating file (the Log tab keeps a bounded view)
 
-import os, re, glob, subprocess, threading, time
+import argparse, re, glob, subprocess, threading, time
 from typing import List, Tuple, Optional
 
 import cv2
@@ -11,21 +14,27 @@ import numpy as np
 from PIL import Image, ImageTk
 
 import tkinter as tk
-from tkinter import ttk, filedialog
+from tkinter import ttk
+
+from snxuvc_log import LogBuffer, LogView
+from snxuvc_timing import draw_overlay
+from snxuvc_xu import SonixXU
 
 # ---------- helpers ----------
 
-DEFAULT_TOOL = os.path.expanduser("~/C1_SONIX_Test_AP/SONiX_UVC_TestAP")
+def fit(frame, box_w, box_h):
+    h,w = frame.shape[:2]
+    if w == 0 or h == 0: return frame
+    scale = min(box_w/w, box_h/h)
+    if scale <= 0: scale = 1.0
+    return cv2.resize(frame, (int(w*scale), int(h*scale)))
 
-def run_tool(tool: str, args: List[str], timeout=8) -> Tuple[int, str, str]:
-    try:
-        p = subprocess.run([tool] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                           text=True, timeout=timeout, check=False)
-        return p.returncode, p.stdout, p.stderr
-    except FileNotFoundError:
-        return 127, "", f"Tool not found: {tool}"
-    except subprocess.TimeoutExpired:
-        return 124, "", "Timed out"
+def render(frame, box, overlay: Optional[List[str]] = None) -> Image.Image:
+    """One preview frame of App._loop: fit into box, timing overlay, BGR -> RGB PIL image (snxuvc_bench times this)."""
+    disp = fit(frame, *box)
+    if overlay:
+        draw_overlay(disp, overlay)
+    return Image.fromarray(cv2.cvtColor(disp, cv2.COLOR_BGR2RGB))
 
 def list_cameras() -> List[Tuple[str,str]]:
     """Return [(path, label), ...] for /dev/video*; label tries to include card name via v4l2-ctl."""
@@ -52,19 +61,20 @@ def list_cameras() -> List[Tuple[str,str]]:
         out.append((d, label))
     return out
 
-def parse_osd_get_enable(out: str) -> Tuple[Optional[int], Optional[int]]:
-    m1 = re.search(r'OSD\s+Enable\s+Line\s*=\s*(\d+)', out)
-    m2 = re.search(r'OSD\s+Enable\s+Block\s*=\s*(\d+)', out)
-    return (int(m1.group(1)) if m1 else None, int(m2.group(1)) if m2 else None)
-
 # ---------- GUI ----------
 
 class App(tk.Tk):
-    def __init__(self):
+    def __init__(self, bus: Optional[str] = None, timing: bool = False, timing_csv: Optional[str] = None,
+                 log_file: Optional[str] = None, log_lines: int = 2000):
         super().__init__()
+        self.logbuf = LogBuffer(max(log_lines * 10, 20000), log_file)   # thread-safe; the view drains it on a timer
+        self.log_lines = log_lines
         self.title("Sonix UVC Control GUI v3")
+        self.bus = bus
+        self.timing, self.timing_csv = timing or bool(timing_csv), timing_csv
         self.geometry("1400x900")
-        self.tool = tk.StringVar(value=DEFAULT_TOOL)
+        self.xu = None                       # SonixXU session, reopened when the device changes
+        self.iframe_every = 0                # force an H264 I-frame every n previewed frames
         self.cap = None
         self.preview_on = False
         self.preview_box = (640, 360)
@@ -91,16 +101,12 @@ class App(tk.Tk):
         left.grid_columnconfigure(0, weight=1)
 
         top = ttk.Frame(left); top.grid(row=0, column=0, sticky="ew", padx=6, pady=4)
-        ttk.Label(top, text="Tool:").grid(row=0, column=0, sticky="w")
-        tk.Entry(top, textvariable=self.tool, width=48).grid(row=0, column=1, sticky="w", padx=4)
-        ttk.Button(top, text="Browse…", command=self._pick_tool).grid(row=0, column=2, padx=2)
-
-        ttk.Label(top, text="Device:").grid(row=0, column=3, sticky="w", padx=(12,0))
+        ttk.Label(top, text="Device:").grid(row=0, column=0, sticky="w")
         self.dev_var = tk.StringVar(value="/dev/video0")
         self.dev_combo = ttk.Combobox(top, textvariable=self.dev_var, width=34, state="readonly")
-        self.dev_combo.grid(row=0, column=4, sticky="w", padx=4)
-        ttk.Button(top, text="Refresh", command=self._refresh_cameras).grid(row=0, column=5, padx=2)
-        ttk.Button(top, text="Map XU", command=self.map_xu).grid(row=0, column=6, padx=6)
+        self.dev_combo.grid(row=0, column=1, sticky="w", padx=4)
+        ttk.Button(top, text="Refresh", command=self._refresh_cameras).grid(row=0, column=2, padx=2)
+        ttk.Button(top, text="Open XU", command=self.open_xu).grid(row=0, column=3, padx=6)
 
         res = ttk.Frame(left); res.grid(row=1, column=0, sticky="ew", padx=6, pady=(0,4))
         ttk.Label(res, text="W").grid(row=0, column=0); tk.Spinbox(res, from_=160, to=3840, textvariable=self.req_w, width=6).grid(row=0, column=1)
@@ -134,11 +140,7 @@ class App(tk.Tk):
         # Log
         tlog = ttk.Frame(right); right.add(tlog, text="Log")
         tlog.grid_rowconfigure(0, weight=1); tlog.grid_columnconfigure(0, weight=1)
-        self.log = tk.Text(tlog); self.log.grid(row=0, column=0, sticky="nsew")
-
-    def _pick_tool(self):
-        p = filedialog.askopenfilename(title="Select SONiX_UVC_TestAP", initialdir=os.path.expanduser("~"))
-        if p: self.tool.set(p)
+        self.log = LogView(tlog, self.logbuf, self.log_lines, height=20); self.log.grid(row=0, column=0, sticky="nsew")
 
     def _refresh_cameras(self):
         cams = list_cameras()
@@ -179,15 +181,44 @@ class App(tk.Tk):
             if self.cap:
                 try: self.cap.release()
                 except: pass
-            idx = self._dev_index(self._current_device())
-            self.cap = cv2.VideoCapture(idx, cv2.CAP_V4L2)
-            self._apply_resolution()
+            if self.bus:
+                from snxuvc_framebus import BusCapture
+                self.cap = BusCapture(self.bus)
+                src = f"bus {self.bus}"
+                if self.timing:
+                    from snxuvc_timing import TimedCapture
+                    self.cap = TimedCapture(self.cap, csv_path=self.timing_csv, tag=f"bus_{self.bus}")
+            elif self.timing:
+                self.cap = self._timed_capture(self._current_device())
+                src = self._current_device()
+            else:
+                idx = self._dev_index(self._current_device())
+                self.cap = cv2.VideoCapture(idx, cv2.CAP_V4L2)
+                self._apply_resolution()
+                src = self._current_device()
             self.preview_on = True
             threading.Thread(target=self._loop, daemon=True).start()
-            self._log(f"[preview] opened {self._current_device()}")
+            self._log(f"[preview] opened {src}")
+            if getattr(self.cap, "csv", None):
+                self._log(f"[timing] csv {self.cap.csv.path}")
         except Exception as e:
             self._log(f"[preview] failed: {e}")
 
+    def _timed_capture(self, path: str):
+        """Own V4L2 stream (buffer seq/timestamps + UVC PTS/SCR); OpenCV with host timing as fallback."""
+        from snxuvc_timing import V4L2Capture, TimedCapture
+        w, h, fps = int(self.req_w.get()), int(self.req_h.get()), int(self.req_fps.get())
+        try:
+            cap = V4L2Capture(path, w, h, fps, csv_path=self.timing_csv)
+            self._log(f"[timing] {path} meta={cap.mpath or '-'} clock={cap.stats.clock_hz or '?'} Hz")
+            return cap
+        except OSError as e:
+            self._log(f"[timing] raw V4L2 capture failed ({e}), using OpenCV timestamps")
+        cap = TimedCapture(cv2.VideoCapture(self._dev_index(path), cv2.CAP_V4L2), fps, self.timing_csv, path.rsplit("/", 1)[-1])
+        self.cap = cap
+        self._apply_resolution()
+        return cap
+
     def _dev_index(self, path: str) -> int:
         m = re.search(r'/dev/video(\d+)', path)
         return int(m.group(1)) if m else 0
@@ -202,35 +233,47 @@ class App(tk.Tk):
         except Exception as e:
             self._log(f"[preview] res set error: {e}")
 
-    def _fit(self, frame, box_w, box_h):
-        h,w = frame.shape[:2]
-        if w == 0 or h == 0: return frame
-        scale = min(box_w/w, box_h/h)
-        if scale <= 0: scale = 1.0
-        return cv2.resize(frame, (int(w*scale), int(h*scale)))
-
     def _loop(self):
+        n = 0
         while self.preview_on:
             ok, frame = (self.cap.read() if self.cap else (False, None))
             if not ok:
                 time.sleep(0.05); continue
-            disp = self._fit(frame, *self.preview_box)
-            rgb = cv2.cvtColor(disp, cv2.COLOR_BGR2RGB)
-            imgtk = ImageTk.PhotoImage(Image.fromarray(rgb))
+            n += 1
+            if self.iframe_every and self.xu and n % self.iframe_every == 0:
+                try: self.xu.h264_set_iframe()
+                except Exception as e:
+                    self.iframe_every = 0; self._log(f"[h264] periodic I-frame stopped: {e}")
+            img = render(frame, self.preview_box, self.cap.overlay_lines() if self.timing else None)
+            imgtk = ImageTk.PhotoImage(img)
             self.canvas.imgtk = imgtk
             self.canvas.configure(image=imgtk)
 
     # ----- log -----
     def _log(self, s: str):
+        self.logbuf.add(s)                   # safe from the preview thread too
+
+    # ----- vendor: XU session -----
+    def _xu(self) -> SonixXU:
+        path = self._current_device()
+        if self.xu is None or self.xu.t.path != path:
+            if self.xu: self.xu.close()
+            self.xu = SonixXU.open(path)
+        return self.xu
+
+    def _xu_do(self, label: str, fn):
+        """Run one XU command, log the structured result; None on failure."""
         try:
-            self.log.insert("end", s+"\n"); self.log.see("end")
-        except Exception:
-            print(s)
+            r = fn(self._xu())
+        except Exception as e:
+            self._log(f"[{label}] failed: {e}")
+            return None
+        self._log(f"[{label}] {'ok' if r is None else (r.hex(' ') if isinstance(r, bytes) else r)}")
+        return r
 
-    # ----- vendor: Map XU -----
-    def map_xu(self):
-        rc,out,err = run_tool(self.tool.get(), ["-a", self._current_device()], timeout=10)
-        self._log(f"[map_xu rc={rc}] {out or err}")
+    def open_xu(self):
+        self.xu = None
+        self._xu_do("chip", lambda x: x.chip_id())
 
     # ----- vendor: OSD -----
     def _build_tab_osd(self, nb: ttk.Notebook):
@@ -295,74 +338,59 @@ class App(tk.Tk):
 
     # ----- vendor: OSD ops -----
     def osd_get_oe(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-oe", self._current_device()])
-        self._log(out or err)
-        line,block = parse_osd_get_enable(out)
-        if line is not None: self.oe_line.set(line)
-        if block is not None: self.oe_block.set(block)
+        r = self._xu_do("osd enable", lambda x: x.osd_get_enable())
+        if r: self.oe_line.set(r.line); self.oe_block.set(r.block)
 
     def osd_set_oe(self):
-        arg = f"{self.oe_line.get()} {self.oe_block.get()}"
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-oe", arg, self._current_device()])
-        self._log(out or err)
+        self._xu_do("osd enable", lambda x: x.osd_set_enable(self.oe_line.get(), self.oe_block.get()))
 
     def osd_set_timer(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-timer", str(self.timer.get()), self._current_device()])
-        self._log(out or err)
+        self._xu_do("osd timer", lambda x: x.osd_set_timer(self.timer.get()))
 
     def osd_get_os(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-os", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("osd size", lambda x: x.osd_get_size())
+        if r: self.os_line.set(r.line); self.os_block.set(r.block)
 
     def osd_set_os(self):
-        arg = f"{self.os_line.get()} {self.os_block.get()}"
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-os", arg, self._current_device()])
-        self._log(out or err)
+        self._xu_do("osd size", lambda x: x.osd_set_size(self.os_line.get(), self.os_block.get()))
 
     def osd_get_oas(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-oas", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("osd autoscale", lambda x: x.osd_get_autoscale())
+        if r: self.oas_line.set(r.line); self.oas_block.set(r.block)
 
     def osd_set_oas(self):
-        arg = f"{self.oas_line.get()} {self.oas_block.get()}"
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-oas", arg, self._current_device()])
-        self._log(out or err)
+        self._xu_do("osd autoscale", lambda x: x.osd_set_autoscale(self.oas_line.get(), self.oas_block.get()))
 
     def osd_get_oc(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-oc", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("osd color", lambda x: x.osd_get_color())
+        if r: self.oc_font.set(r.font); self.oc_border.set(r.border)
 
     def osd_set_oc(self):
-        arg = f"{self.oc_font.get()} {self.oc_border.get()}"
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-oc", arg, self._current_device()])
-        self._log(out or err)
+        self._xu_do("osd color", lambda x: x.osd_set_color(self.oc_font.get(), self.oc_border.get()))
 
     def osd_get_osp(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-osp", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("osd position", lambda x: x.osd_get_start_position())
+        if r:
+            row, col = (r.block_row, r.block_col) if self.osp_type.get() == 2 else (r.line_row, r.line_col)
+            self.osp_row.set(row); self.osp_col.set(col)
 
     def osd_set_osp(self):
-        arg = f"{self.osp_type.get()} {self.osp_row.get()} {self.osp_col.get()}"
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-osp", arg, self._current_device()])
-        self._log(out or err)
+        self._xu_do("osd position", lambda x: x.osd_set_start_position(self.osp_type.get(), self.osp_row.get(), self.osp_col.get()))
 
     def osd_get_oms(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-oms", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("osd multi size", lambda x: x.osd_get_multi_size())
+        if r: self.oms0.set(r.s0); self.oms1.set(r.s1); self.oms2.set(r.s2)
 
     def osd_set_oms(self):
-        arg = f"{self.oms0.get()} {self.oms1.get()} {self.oms2.get()}"
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-oms", arg, self._current_device()])
-        self._log(out or err)
+        self._xu_do("osd multi size", lambda x: x.osd_set_multi_size(self.oms0.get(), self.oms1.get(), self.oms2.get()))
 
     def osd_get_ostr(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-ostr", str(self.ostr_group.get()), self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("osd string", lambda x: x.osd_get_string(self.ostr_group.get()))
+        if r is not None:
+            self.ostr_text.delete(0, "end"); self.ostr_text.insert(0, r)
 
     def osd_set_ostr(self):
-        arg = f"{self.ostr_group.get()} '{self.ostr_text.get()}'"
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-ostr", arg, self._current_device()])
-        self._log(out or err)
+        self._xu_do("osd string", lambda x: x.osd_set_string(self.ostr_group.get(), self.ostr_text.get()))
 
     # ----- RTC tab -----
     def _build_tab_rtc(self, nb):
@@ -377,16 +405,16 @@ class App(tk.Tk):
         self.rtc_label=ttk.Label(t,text="RTC: --"); self.rtc_label.grid(row=r,column=1,columnspan=4,sticky="w")
 
     def rtc_set(self):
-        args = f"{self.rY.get()} {self.rM.get()} {self.rD.get()} {self.rH.get()} {self.rMin.get()} {self.rS.get()}"
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-rtc", args, self._current_device()])
-        self._log(out or err)
+        from datetime import datetime
+        try:
+            t = datetime(self.rY.get(), self.rM.get(), self.rD.get(), self.rH.get(), self.rMin.get(), self.rS.get())
+        except ValueError as e:
+            self._log(f"[rtc] {e}"); return
+        self._xu_do("rtc", lambda x: x.osd_set_rtc(t))
 
     def rtc_get(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-rtc", self._current_device()])
-        self._log(out or err)
-        m = re.search(r'(\d{4})/(\d{1,2})/(\d{1,2}).*?(\d{1,2}):(\d{1,2}):(\d{1,2})', out)
-        if m:
-            self.rtc_label.config(text=f"RTC: {m.group(1)}-{int(m.group(2)):02d}-{int(m.group(3)):02d} {int(m.group(4)):02d}:{int(m.group(5)):02d}:{int(m.group(6)):02d}")
+        r = self._xu_do("rtc", lambda x: x.osd_get_rtc())
+        if r: self.rtc_label.config(text=f"RTC: {r:%Y-%m-%d %H:%M:%S}")
 
     # ----- Motion tab -----
     def _build_tab_motion(self, nb):
@@ -406,31 +434,29 @@ class App(tk.Tk):
         ttk.Button(t,text="GET",command=self.md_get_res).grid(row=r,column=5)
 
     def md_set_en(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-mde", str(self.md_en.get()), self._current_device()])
-        self._log(out or err)
+        self._xu_do("md mode", lambda x: x.md_set_mode(self.md_en.get()))
     def md_get_en(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-mde", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("md mode", lambda x: x.md_get_mode())
+        if r is not None: self.md_en.set(r)
     def md_set_th(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-mdt", str(self.md_th.get()), self._current_device()])
-        self._log(out or err)
+        self._xu_do("md threshold", lambda x: x.md_set_threshold(self.md_th.get()))
     def md_get_th(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-mdt", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("md threshold", lambda x: x.md_get_threshold())
+        if r is not None: self.md_th.set(r)
     def md_set_mask(self):
-        arg = self.md_mask.get().strip()
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-mdm", arg, self._current_device()], timeout=10)
-        self._log(out or err)
+        try:
+            mask = bytes(int(v, 0) for v in self.md_mask.get().split())
+        except ValueError as e:
+            self._log(f"[md mask] {e}"); return
+        self._xu_do("md mask", lambda x: x.md_set_mask(mask))
     def md_get_mask(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-mdm", self._current_device()], timeout=10)
-        self._log(out or err)
+        r = self._xu_do("md mask", lambda x: x.md_get_mask())
+        if r is not None:
+            self.md_mask.delete(0,"end"); self.md_mask.insert(0, " ".join(str(v) for v in r))
     def md_get_res(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-mdr", self._current_device()], timeout=10)
-        self._log(out or err)
-        vals = re.findall(r'\b\d+\b', out)
-        try:
-            self.md_res.delete(0,"end"); self.md_res.insert(0, " ".join(vals[:24]))
-        except Exception: pass
+        r = self._xu_do("md result", lambda x: x.md_get_result())
+        if r is not None:
+            self.md_res.delete(0,"end"); self.md_res.insert(0, " ".join(str(v) for v in r))
 
     # ----- H264/MJPG tab -----
     def _build_tab_h264(self, nb):
@@ -450,29 +476,26 @@ class App(tk.Tk):
         ttk.Button(t,text="SET",command=self.h264_set_sei).grid(row=r,column=2)
 
     def mjpg_set(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-mjb", str(self.mjpg_bps.get()), self._current_device()])
-        self._log(out or err)
+        self._xu_do("mjpg bitrate", lambda x: x.mjpg_set_bitrate(self.mjpg_bps.get()))
     def mjpg_get(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-mjb", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("mjpg bitrate", lambda x: x.mjpg_get_bitrate())
+        if r is not None: self.mjpg_bps.set(r)
     def h264_set_gop(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-gop", str(self.gop.get()), self._current_device()])
-        self._log(out or err)
+        self._xu_do("h264 gop", lambda x: x.h264_set_gop(self.gop.get()))
     def h264_get_gop(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-gop", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("h264 gop", lambda x: x.h264_get_gop())
+        if r is not None: self.gop.set(r)
     def h264_set_cvm(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-cvm", str(self.cvm.get()), self._current_device()])
-        self._log(out or err)
+        self._xu_do("h264 mode", lambda x: x.h264_set_mode(self.cvm.get()))
     def h264_get_cvm(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-cvm", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("h264 mode", lambda x: x.h264_get_mode())
+        if r is not None: self.cvm.set(r)
     def h264_set_if(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-if", str(self.iframe.get()), self._current_device()])
-        self._log(out or err)
+        # like the TestAP's --xuset-if n: an I-frame every n frames, driven from the preview loop
+        self.iframe_every = max(0, self.iframe.get())
+        self._xu_do("h264 iframe", lambda x: x.h264_set_iframe())
     def h264_set_sei(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-sei", self._current_device()])
-        self._log(out or err)
+        self._xu_do("h264 sei", lambda x: x.h264_set_sei(self.sei.get()))
 
     # ----- Misc tab -----
     def _build_tab_misc(self, nb):
@@ -482,7 +505,7 @@ class App(tk.Tk):
         ttk.Button(t,text="SET",command=self.set_mirror).grid(row=r,column=2); ttk.Button(t,text="GET",command=self.get_mirror).grid(row=r,column=3); r+=1
         ttk.Label(t,text="Flip 0/1").grid(row=r,column=0,sticky="w"); tk.Spinbox(t,from_=0,to=1,textvariable=self.flip,width=6).grid(row=r,column=1,sticky="w")
         ttk.Button(t,text="SET",command=self.set_flip).grid(row=r,column=2); ttk.Button(t,text="GET",command=self.get_flip).grid(row=r,column=3); r+=1
-        ttk.Label(t,text="GPIO (hex enable/out)").grid(row=r,column=0,sticky="w"); self.gpio=tk.StringVar(value="00000000")
+        ttk.Label(t,text="GPIO (hex enable/out)").grid(row=r,column=0,sticky="w"); self.gpio=tk.StringVar(value="00 00")
         tk.Entry(t,textvariable=self.gpio,width=16).grid(row=r,column=1,sticky="w"); ttk.Button(t,text="SET",command=self.set_gpio).grid(row=r,column=2)
         ttk.Button(t,text="GET",command=self.get_gpio).grid(row=r,column=3); r+=1
         self.fde1=tk.IntVar(value=0); self.fde2=tk.IntVar(value=0); self.fdc1=tk.IntVar(value=0); self.fdc2=tk.IntVar(value=0)
@@ -496,28 +519,40 @@ class App(tk.Tk):
         ttk.Button(t,text="SET",command=self.set_fdc).grid(row=r,column=3)
 
     def set_mirror(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-mir", self._current_device()])
-        self._log(out or err)
+        self._xu_do("mirror", lambda x: x.img_set_mirror(self.mirror.get()))
     def get_mirror(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-mir", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("mirror", lambda x: x.img_get_mirror())
+        if r is not None: self.mirror.set(r)
     def set_flip(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-flip", self._current_device()])
-        self._log(out or err)
+        self._xu_do("flip", lambda x: x.img_set_flip(self.flip.get()))
     def get_flip(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-flip", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("flip", lambda x: x.img_get_flip())
+        if r is not None: self.flip.set(r)
     def set_gpio(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuset-gpio", self.gpio.get(), self._current_device()])
-        self._log(out or err)
+        try:
+            en, val = (int(v, 16) for v in self.gpio.get().split())
+        except ValueError:
+            self._log("[gpio] expected 'EN OUT' in hex, e.g. '0F 05'"); return
+        self._xu_do("gpio", lambda x: x.gpio_set(en, val))
     def get_gpio(self):
-        rc,out,err = run_tool(self.tool.get(), ["--xuget-gpio", self._current_device()])
-        self._log(out or err)
+        r = self._xu_do("gpio", lambda x: x.gpio_get())
+        if r: self.gpio.set(f"{r.enable:02X} {r.output:02X}")
     def set_fde(self):
-        arg=f"{self.fde1.get()} {self.fde2.get()}"; rc,out,err = run_tool(self.tool.get(), ["--xuset-fde", arg, self._current_device()]); self._log(out or err)
+        self._xu_do("frame drop", lambda x: x.frame_drop_set_enable(self.fde1.get(), self.fde2.get()))
     def set_fdc(self):
-        arg=f"{self.fdc1.get()} {self.fdc2.get()}"; rc,out,err = run_tool(self.tool.get(), ["--xuset-fdc", arg, self._current_device()]); self._log(out or err)
+        self._xu_do("frame drop fps", lambda x: x.frame_drop_set_fps(self.fdc1.get(), self.fdc2.get()))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bus", type=str, default=None, help="shared frame bus name (snxuvc_framebus.py publish)")
+    ap.add_argument("--timing", action="store_true", help="per-frame timing overlay (jitter, drops, latency, drift)")
+    ap.add_argument("--timing-csv", default=None, help="per-frame timing CSV, file or directory (implies --timing)")
+    ap.add_argument("--log-file", default=None, help="spill the full log to this rotating file")
+    ap.add_argument("--log-lines", type=int, default=2000, help="lines kept in the Log tab")
+    args = ap.parse_args()
+    app = App(bus=args.bus, timing=args.timing, timing_csv=args.timing_csv, log_file=args.log_file, log_lines=args.log_lines)
+    app.mainloop()
+    app.logbuf.close()
 
 if __name__ == "__main__":
-    App().mainloop()
-
+    main()
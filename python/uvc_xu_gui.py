@@ -15,6 +15,9 @@ Dependencies:
 
 Usage:
   python3 uvc_xu_gui.py --vid 0x0C45 --pid 0x6366 --device 0
+  python3 uvc_xu_gui.py --bus snxcam0      # frames from snxuvc_framebus.py publish
+  python3 uvc_xu_gui.py --device 0 --timing-csv logs/   # frame timing overlay + per-frame CSV
+  python3 uvc_xu_gui.py --log-file logs/xu.log           # full log in a rotating file
 
 Features:
 - Live preview via OpenCV (select device index with --device).
@@ -25,6 +28,9 @@ Features:
     * Quick payload presets (all-zeros, single-bit toggles).
     * Save labels: give a friendly name to (Unit, Selector), stored in xu_labels.json.
 - Brute-force helper: iterate selectors and try a few payloads; logs transfers (does not guess effects).
+- Log panel keeps a bounded, filterable view (level/tag/find) of a ring buffer; --log-file
+  spills every line to a rotating file, so long brute-force runs stay responsive.
+- --timing: per-frame timing overlay (jitter, seq drops, latency, UVC PTS/SCR drift) via snxuvc_timing.py.
 
 Known limits:
 - Some devices reject GET_LEN/GET_INFO; you can manually specify payload length.
@@ -61,6 +67,18 @@ except Exception as e:
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
+from snxuvc_log import LogBuffer, LogView
+
+def render(frame, overlay: Optional[List[str]] = None, copy: bool = False):
+    """
+    One preview frame of App._video_loop: optional timing overlay (on a copy when the
+    frame is a shared-memory bus view), BGR -> RGB PIL image. snxuvc_bench times this.
+    """
+    if overlay is not None:
+        from snxuvc_timing import draw_overlay
+        frame = draw_overlay(frame.copy() if copy else frame, overlay)
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
 # ---------- UVC XU low-level helpers ----------
 
 SET_CUR = 0x01
@@ -210,7 +228,9 @@ class LabelStore:
 # ---------- GUI ----------
 
 class App(tk.Tk):
-    def __init__(self, vid: int, pid: int, device_index: int, default_units=(3,4), interface: int = 0):
+    def __init__(self, vid: int, pid: int, device_index: int, default_units=(3,4), interface: int = 0,
+                 bus: Optional[str] = None, timing: bool = False, timing_csv: Optional[str] = None,
+                 log_file: Optional[str] = None, log_lines: int = 2000):
         super().__init__()
         self.title("UVC XU GUI — Live + Vendor Controls")
         self.geometry("1200x760")
@@ -224,11 +244,35 @@ class App(tk.Tk):
         # USB control
         self.xu = UVCXU(vid, pid, interface=interface)
         self.labels = LabelStore()
+        self.logbuf = LogBuffer(max(log_lines * 10, 20000), log_file)
+        self.log_lines = log_lines
 
-        # Video
-        self.cap = cv2.VideoCapture(self.cam_index, cv2.CAP_V4L2)
+        # Video (either our own capture, or a shared frame bus owned by another process)
+        self.timing, self.bus = timing or bool(timing_csv), bus
+        if bus:
+            from snxuvc_framebus import BusCapture
+            try:
+                self.cap = BusCapture(bus)
+            except FileNotFoundError as e:                # no publisher under that name
+                messagebox.showerror("Camera Error", str(e))
+                sys.exit(1)
+            if self.timing:
+                from snxuvc_timing import TimedCapture
+                self.cap = TimedCapture(self.cap, csv_path=timing_csv, tag=f"bus_{bus}")
+        elif self.timing:
+            # own V4L2 stream: buffer seq/timestamps and UVC PTS/SCR; OpenCV timestamps as fallback
+            from snxuvc_timing import V4L2Capture, TimedCapture
+            try:
+                self.cap = V4L2Capture(f"/dev/video{self.cam_index}", csv_path=timing_csv)
+            except OSError as e:
+                self.logln(f"[timing] raw V4L2 capture failed ({e}), using OpenCV timestamps")
+                self.cap = TimedCapture(cv2.VideoCapture(self.cam_index, cv2.CAP_V4L2), csv_path=timing_csv,
+                                        tag=f"video{self.cam_index}")
+        else:
+            self.cap = cv2.VideoCapture(self.cam_index, cv2.CAP_V4L2)
         if not self.cap.isOpened():
-            messagebox.showerror("Camera Error", f"Cannot open video device index {self.cam_index}")
+            src = f"frame bus '{bus}'" if bus else f"video device index {self.cam_index}"
+            messagebox.showerror("Camera Error", f"Cannot open {src}")
             sys.exit(1)
 
         # UI layout
@@ -371,7 +415,7 @@ class App(tk.Tk):
         logbox.grid(row=3, column=0, sticky="nsew", padx=8, pady=6)
         logbox.grid_rowconfigure(0, weight=1)
         logbox.grid_columnconfigure(0, weight=1)
-        self.log = tk.Text(logbox, height=10)
+        self.log = LogView(logbox, self.logbuf, self.log_lines, height=10)
         self.log.grid(row=0, column=0, sticky="nsew")
 
     # -------- video loop --------
@@ -379,9 +423,8 @@ class App(tk.Tk):
         while self.running:
             ret, frame = self.cap.read()
             if ret:
-                # Convert to RGB for Tkinter
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(rgb)
+                # bus frames are views into shared memory: the overlay goes on a copy
+                img = render(frame, self.cap.overlay_lines() if self.timing else None, copy=bool(self.bus))
                 imgtk = ImageTk.PhotoImage(image=img)
                 self.canvas.imgtk = imgtk
                 self.canvas.configure(image=imgtk)
@@ -397,9 +440,8 @@ class App(tk.Tk):
         sel = int(self.sel_spin.get())
         return XUAddress(unit_id=unit, selector=sel, interface=self.interface)
 
-    def logln(self, s: str):
-        self.log.insert("end", s + "\n")
-        self.log.see("end")
+    def logln(self, s: str, level: Optional[str] = None, tag: Optional[str] = None):
+        self.logbuf.add(s, level, tag)
 
     def set_payload(self, hexstr: str):
         self.payload_entry.delete(0, "end")
@@ -512,11 +554,11 @@ class App(tk.Tk):
                 addr = XUAddress(unit_id=u, selector=s, interface=self.interface)
                 n = self.xu.get_len(addr) or len(payloads[0])
                 cur = self.xu.get_cur(addr, n)
-                self.logln(f"  S{s:02d} LEN={n} CUR={to_hex(cur) if cur else 'n/a'}")
+                self.logln(f"  S{s:02d} LEN={n} CUR={to_hex(cur) if cur else 'n/a'}", tag="BRUTE")
                 self.update()
                 for p in payloads:
                     ok = self.xu.set_cur(addr, p)
-                    self.logln(f"    SET {to_hex(p)} -> {'OK' if ok else 'FAIL'}")
+                    self.logln(f"    SET {to_hex(p)} -> {'OK' if ok else 'FAIL'}", "info" if ok else "warn", "BRUTE")
                     self.update()
                     time.sleep(0.15)
         except Exception as e:
@@ -529,6 +571,7 @@ class App(tk.Tk):
             self.cap.release()
         except Exception:
             pass
+        self.logbuf.close()
         self.destroy()
 
 def main():
@@ -537,9 +580,15 @@ def main():
     ap.add_argument("--pid", type=lambda x: int(x,0), default=0x6366, help="USB Product ID (e.g., 0x6366)")
     ap.add_argument("--device", type=int, default=0, help="OpenCV video device index")
     ap.add_argument("--interface", type=int, default=0, help="VideoControl interface number (usually 0)")
+    ap.add_argument("--bus", type=str, default=None, help="read frames from a snxuvc_framebus.py publisher instead of --device")
+    ap.add_argument("--timing", action="store_true", help="per-frame timing overlay (jitter, drops, latency, drift)")
+    ap.add_argument("--timing-csv", default=None, help="per-frame timing CSV, file or directory (implies --timing)")
+    ap.add_argument("--log-file", default=None, help="spill the full log to this rotating file")
+    ap.add_argument("--log-lines", type=int, default=2000, help="lines kept in the log panel")
     args = ap.parse_args()
 
-    app = App(args.vid, args.pid, args.device, interface=args.interface)
+    app = App(args.vid, args.pid, args.device, interface=args.interface, bus=args.bus,
+              timing=args.timing, timing_csv=args.timing_csv, log_file=args.log_file, log_lines=args.log_lines)
     app.mainloop()
 
 if __name__ == "__main__":